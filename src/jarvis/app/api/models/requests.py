@@ -1,4 +1,4 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_validator
 from typing import List, Optional, Dict, Any
 
 
@@ -6,6 +6,10 @@ class CreateIndexRequest(BaseModel):
     index_name: str = Field(..., description="Name of the index to create")
     index_body: Dict[str, Any] = Field(..., description="Index configuration and mappings")
 
+class TrainIndexRequest(BaseModel):
+    nlist: Optional[int] = Field(default=None, ge=1, description="Number of IVF lists (k-means clusters). Defaults to the configured value")
+    nprobe: Optional[int] = Field(default=None, ge=1, description="Default number of IVF lists probed per query. Defaults to the configured value")
+
 class DocumentUploadRequest(BaseModel):
     index_name: str = Field(..., description="Target index name")
     title: str = Field(..., description="Document title")
@@ -13,14 +17,57 @@ class DocumentUploadRequest(BaseModel):
     full_text: str = Field(..., description="Full document text")
     created_date: Optional[str] = Field(None, description="Document creation date")
 
-class SearchRequest(BaseModel):
+class SearchParameters(BaseModel):
     index_name: str = Field(..., description="Index to search")
-    query_text: str = Field(..., description="Search query text")
     top_k: int = Field(default=5, ge=1, le=100, description="Number of results to return")
-    algorithm: str = Field(default="linear", description="Search algorithm")
+    algorithm: str = Field(default="linear", description="Search algorithm: 'linear', 'hierarchical', 'matryoshka', 'hnsw' or 'ivf'")
     distance: str = Field(default="cosine", description="Distance metric")
     decay_factor: Optional[float] = Field(default=0.9, description="Decay factor for hierarchical search")
     filter: Optional[Dict[str, Any]] = Field(
         default=None, 
-        description="Metadata filter dictionary. Can contain 'document_id', 'title', 'author', and/or 'created_date'"
+        description=(
+            "Metadata filter on 'document_id', 'title', 'author' and/or 'created_date'. Values match by equality, or use the operators "
+            "$eq, $ne, $in, $nin, $gt, $gte, $lt, $lte (ranges on 'created_date', ISO 8601) and $and/$or, e.g. "
+            '{"author": {"$in": ["John Doe"]}, "created_date": {"$gte": "2025-01-01"}}'
+        )
+    )
+    ef_search: Optional[int] = Field(default=None, ge=1, description="Width of the HNSW search (only for 'hnsw'). Defaults to the index value")
+    nprobe: Optional[int] = Field(default=None, ge=1, description="Number of IVF lists to scan (only for 'ivf'). Defaults to the index value")
+    prefix_dimension: Optional[int] = Field(
+        default=None, ge=1, description="Leading dimensions scored by the coarse pass (only for 'matryoshka'). Defaults to the configured value"
+    )
+    shortlist_multiplier: Optional[int] = Field(
+        default=None, ge=1, le=1000,
+        description="Candidates re-ranked with all the dimensions per requested result (only for 'matryoshka'). Defaults to the configured value"
     )
+
+class SearchRequest(SearchParameters):
+    query_text: str = Field(..., description="Search query text")
+
+class BatchSearchRequest(SearchParameters):
+    query_texts: List[str] = Field(..., min_length=1, max_length=10000, description="Search query texts, searched together with the same parameters")
+
+class VectorSearchRequest(SearchParameters):
+    query_vector: Optional[List[float]] = Field(default=None, description="Query vector")
+    query_vector_base64: Optional[str] = Field(
+        default=None, description="Query vector as the base64 of its little-endian float32 values, instead of 'query_vector'"
+    )
+
+    @model_validator(mode="after")
+    def check_query_vector(self):
+        if (self.query_vector is None) == (self.query_vector_base64 is None):
+            raise ValueError("Exactly one of 'query_vector' and 'query_vector_base64' is required")
+        return self
+
+class BatchVectorSearchRequest(SearchParameters):
+    query_vectors: Optional[List[List[float]]] = Field(default=None, min_length=1, max_length=10000, description="Query vectors")
+    query_vectors_base64: Optional[str] = Field(
+        default=None,
+        description="Query vectors as the base64 of their little-endian float32 values, one vector after the other, instead of 'query_vectors'"
+    )
+
+    @model_validator(mode="after")
+    def check_query_vectors(self):
+        if (self.query_vectors is None) == (self.query_vectors_base64 is None):
+            raise ValueError("Exactly one of 'query_vectors' and 'query_vectors_base64' is required")
+        return self
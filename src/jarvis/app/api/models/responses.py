@@ -30,6 +30,24 @@ class DocumentResponse(BaseModel):
     created_date: Optional[str]
     chunks: List[DocumentChunk]
     
+class BatchSearchResponse(BaseModel):
+    results: List[List[SearchResult]]   # Results of every query, in the order of the queries
+    total_queries: int
+    query_time_ms: float
+
+class RecallResponse(BaseModel):
+    recall: float   # Fraction of the exact (linear) top-k found by the search, averaged over the queries
+    total_queries: int
+    query_time_ms: float
+    exact_query_time_ms: float
+
+class BulkDocumentStatus(BaseModel):
+    line: int   # Line of the document in the uploaded NDJSON (1-based)
+    status: str     # "indexed" or "error"
+    document_id: Optional[UUID] = None
+    chunks: Optional[int] = None
+    error: Optional[str] = None
+
 class SuccessResponse(BaseModel):
     success: bool
     message: str
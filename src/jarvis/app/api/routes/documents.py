@@ -1,27 +1,63 @@
 import sys
 from uuid import UUID
-from fastapi import APIRouter, Depends, HTTPException
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from starlette.requests import ClientDisconnect
+from typing import AsyncIterator, List
 
 # src
 sys.path.append("./")
 from src.jarvis.app.api.models.requests import DocumentUploadRequest
 from src.jarvis.app.api.models.responses import DocumentResponse, SuccessResponse
-from src.jarvis.app.dependencies import get_vector_store_dependency, get_ingestor_dependency
+from src.jarvis.app.dependencies import get_vector_store_dependency, get_ingestor_dependency, get_embedding_pipeline_dependency
 from src.jarvis.app.api.services.document_service import DocumentService
 from src.jarvis.domain.search.vector_store.vector_store import VectorStore
 from src.jarvis.ingestor import Ingestor
+from src.jarvis.infrastructure.embedding.pipeline import EmbeddingPipeline
 
 router = APIRouter()
 
+
+class NDJSONStreamingResponse(StreamingResponse):
+    """
+    StreamingResponse that can be sent while the request body is still being read.
+
+    NOTE: Before ASGI 2.4, Starlette listens for the client disconnection by reading the request
+    messages during the response, which would drop the chunks of a body still being streamed. The
+    disconnection is detected by `request.stream()` instead.
+    """
+    media_type = "application/x-ndjson"
+
+    async def __call__(self, scope, receive, send) -> None:
+        try:
+            await self.stream_response(send)
+        except OSError:
+            raise ClientDisconnect()
+        if self.background is not None:
+            await self.background()
+
+
+async def _ndjson_lines(request: Request) -> AsyncIterator[bytes]:
+    """Split a streamed request body into lines, without buffering more than a line."""
+    buffer = b""
+    async for data in request.stream():
+        buffer += data
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            yield line
+    if buffer:
+        yield buffer
+
+
 @router.post("/", response_model=SuccessResponse)
 async def upload_document(
     request: DocumentUploadRequest,
     vector_store: VectorStore = Depends(get_vector_store_dependency),
-    ingestor: Ingestor = Depends(get_ingestor_dependency)
+    ingestor: Ingestor = Depends(get_ingestor_dependency),
+    pipeline: EmbeddingPipeline = Depends(get_embedding_pipeline_dependency)
 ):
     """Upload and index a document."""
-    service = DocumentService(vector_store, ingestor)
+    service = DocumentService(vector_store, ingestor, pipeline)
     
     try:
         document_id = await service.upload_document(
@@ -38,8 +74,29 @@ async def upload_document(
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
+@router.post("/bulk")
+async def bulk_upload_documents(
+    request: Request,
+    vector_store: VectorStore = Depends(get_vector_store_dependency),
+    ingestor: Ingestor = Depends(get_ingestor_dependency),
+    pipeline: EmbeddingPipeline = Depends(get_embedding_pipeline_dependency)
+):
+    """
+    Upload documents as streamed NDJSON, one DocumentUploadRequest per line.
+
+    The response is NDJSON too: one BulkDocumentStatus per document, sent as soon as the document
+    is indexed (or rejected), while the rest of the upload is still being read.
+    """
+    service = DocumentService(vector_store, ingestor, pipeline)
+
+    async def statuses() -> AsyncIterator[str]:
+        async for status in service.bulk_upload(_ndjson_lines(request)):
+            yield status.model_dump_json(exclude_none=True) + "\n"
+
+    return NDJSONStreamingResponse(statuses())
+
 @router.get("/{index_name}", response_model=List[DocumentResponse])
-async def list_documents(
+def list_documents(
     index_name: str,
     vector_store: VectorStore = Depends(get_vector_store_dependency)
 ):
@@ -48,15 +105,16 @@ async def list_documents(
         raise HTTPException(status_code=404, detail=f"Index '{index_name}' not found")
     
     service = DocumentService(vector_store, None)
-    return await service.list_documents(index_name)
+    return service.list_documents(index_name)
 
 @router.delete("/{index_name}/{document_id}", response_model=SuccessResponse)
-async def delete_document(
+def delete_document(
     index_name: str,
     document_id: UUID,
     vector_store: VectorStore = Depends(get_vector_store_dependency)
 ):
     """Delete a document from an index."""
+    # NOTE: Not async, the WAL write (and its fsync) waits in FastAPI's threadpool
     try:
         vector_store.delete_document(index_name, document_id)
         return SuccessResponse(success=True, message=f"Document '{document_id}' deleted successfully")
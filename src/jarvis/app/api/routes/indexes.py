@@ -1,10 +1,10 @@
 import sys
 from fastapi import APIRouter, Depends, HTTPException
-from typing import List
+from typing import List, Optional
 
 # src
 sys.path.append("./")
-from src.jarvis.app.api.models.requests import CreateIndexRequest
+from src.jarvis.app.api.models.requests import CreateIndexRequest, TrainIndexRequest
 from src.jarvis.app.api.models.responses import IndexInfo, SuccessResponse
 from src.jarvis.app.dependencies import get_vector_store_dependency
 from src.jarvis.domain.search.vector_store.vector_store import VectorStore
@@ -39,14 +39,49 @@ async def get_index_info(
     if not vector_store.index_exists(index_name):
         raise HTTPException(status_code=404, detail=f"Index '{index_name}' not found")
     
-    index_data = vector_store.indexes[index_name]
+    index_data = vector_store.index_snapshot(index_name)
     return IndexInfo(
         name=index_name,
-        dimension=index_data['dimension'],
-        document_count=len(set(meta.get('document_id') for meta in index_data['metadata'])),
-        mappings=index_data['mappings']
+        dimension=index_data.dimension,
+        document_count=index_data.document_count(),
+        mappings=index_data.mappings
     )
 
+@router.post("/{index_name}/train", response_model=SuccessResponse)
+def train_index(
+    index_name: str,
+    request: Optional[TrainIndexRequest] = None,
+    vector_store: VectorStore = Depends(get_vector_store_dependency)
+):
+    """Train the IVF of an index (used by algorithm='ivf')."""
+    # NOTE: Not async on purpose, FastAPI runs it in its threadpool so the k-means doesn't block the event loop
+    if not vector_store.index_exists(index_name):
+        raise HTTPException(status_code=404, detail=f"Index '{index_name}' not found")
+
+    request = request or TrainIndexRequest()
+    try:
+        ivf = vector_store.train_index(index_name, nlist=request.nlist, nprobe=request.nprobe)
+        return SuccessResponse(success=True, message=f"Index '{index_name}' IVF trained with {ivf.nlist} lists")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.post("/{index_name}/snapshot", response_model=SuccessResponse)
+def snapshot_index(
+    index_name: str,
+    vector_store: VectorStore = Depends(get_vector_store_dependency)
+):
+    """Checkpoint an index: save a snapshot to VECTORSTORE_PERSIST_DIR and truncate its WAL."""
+    if not vector_store.index_exists(index_name):
+        raise HTTPException(status_code=404, detail=f"Index '{index_name}' not found")
+    if not vector_store.persist_dir:
+        raise HTTPException(status_code=400, detail="Persistence is disabled (VECTORSTORE_PERSIST_DIR is empty)")
+
+    try:
+        vector_store.save([index_name])
+        return SuccessResponse(success=True, message=f"Index '{index_name}' saved to '{vector_store.persist_dir}'")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
 @router.delete("/{index_name}", response_model=SuccessResponse)
 async def delete_index(
     index_name: str,
@@ -1,24 +1,70 @@
 import sys
+import base64
+import binascii
+from typing import List, Optional
 from fastapi import APIRouter, Depends, HTTPException
 import time
 
+import numpy as np
+
 # src
 sys.path.append("./")
-from src.jarvis.app.api.models.requests import SearchRequest
-from src.jarvis.app.api.models.responses import SearchResponse, SearchResult
+from src.jarvis.app.api.models.requests import BatchSearchRequest, BatchVectorSearchRequest, SearchRequest, VectorSearchRequest
+from src.jarvis.app.api.models.responses import BatchSearchResponse, RecallResponse, SearchResponse, SearchResult
 from src.jarvis.app.dependencies import get_vector_store_dependency, get_retrieval_dependency
 from src.jarvis.domain.search.vector_store.vector_store import VectorStore
 from src.jarvis.retrieval import Retrieval
 
 router = APIRouter()
 
+
+def _query_matrix(vectors: Optional[List[List[float]]], encoded: Optional[str], dimension: int) -> np.ndarray:
+    """
+    (q, dimension) float32 matrix of the query vectors of a request, given as JSON lists or as
+    base64 little-endian float32 values (decoded without any copy or float parsing).
+
+    Raises:
+        HTTPException: 400 if the vectors are malformed, don't match the dimension or are not finite.
+    """
+    if encoded is not None:
+        try:
+            data = base64.b64decode(encoded, validate=True)
+        except binascii.Error as e:
+            raise HTTPException(status_code=400, detail=f"Invalid base64 query vector(s): {e}")
+        if not data or len(data) % (4 * dimension):
+            raise HTTPException(status_code=400, detail=f"Base64 query vector(s) must hold a multiple of {dimension} float32 values, got {len(data)} bytes")
+        queries = np.frombuffer(data, dtype="<f4").reshape(-1, dimension)
+    else:
+        if any(len(vector) != dimension for vector in vectors):
+            raise HTTPException(status_code=400, detail=f"Query vector(s) must have the index dimension {dimension}")
+        queries = np.asarray(vectors, dtype=np.float32).reshape(-1, dimension)
+
+    if not np.isfinite(queries).all():
+        raise HTTPException(status_code=400, detail="Query vector(s) must only contain finite values")
+    return queries
+
+
+def _index_dimension(vector_store: VectorStore, index_name: str) -> int:
+    """
+    Vector dimension of an index.
+
+    Raises:
+        HTTPException: 404 if the index doesn't exist (e.g. deleted since the request was checked).
+    """
+    try:
+        return vector_store.index_dimension(index_name)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+
 @router.post("/text", response_model=SearchResponse)
-async def search_by_text(
+def search_by_text(
     request: SearchRequest,
     vector_store: VectorStore = Depends(get_vector_store_dependency),
     retrieval: Retrieval = Depends(get_retrieval_dependency)
 ):
     """Search using text query (will be converted to vector)."""
+    # NOTE: Not async on purpose, the embedding call and the scan run in FastAPI's threadpool instead of blocking the event loop
     if not vector_store.index_exists(request.index_name):
         raise HTTPException(status_code=404, detail=f"Index '{request.index_name}' not found")
     
@@ -31,7 +77,11 @@ async def search_by_text(
             algorithm=request.algorithm,
             distance=request.distance,
             decay_factor=request.decay_factor,
-            filter=request.filter
+            filter=request.filter,
+            ef_search=request.ef_search,
+            nprobe=request.nprobe,
+            prefix_dimension=request.prefix_dimension,
+            shortlist_multiplier=request.shortlist_multiplier
         )
         query_time_ms = (time.time() - start_time) * 1000
         
@@ -47,3 +97,175 @@ async def search_by_text(
         )
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/batch", response_model=BatchSearchResponse)
+def search_batch(
+    request: BatchSearchRequest,
+    vector_store: VectorStore = Depends(get_vector_store_dependency),
+    retrieval: Retrieval = Depends(get_retrieval_dependency)
+):
+    """Search many text queries against one index (embedded in batches and scored together)."""
+    if not vector_store.index_exists(request.index_name):
+        raise HTTPException(status_code=404, detail=f"Index '{request.index_name}' not found")
+
+    start_time = time.time()
+    try:
+        results = retrieval.search_batch_by_text(
+            index_name=request.index_name,
+            query_texts=request.query_texts,
+            top_k=request.top_k,
+            algorithm=request.algorithm,
+            distance=request.distance,
+            decay_factor=request.decay_factor,
+            filter=request.filter,
+            ef_search=request.ef_search,
+            nprobe=request.nprobe,
+            prefix_dimension=request.prefix_dimension,
+            shortlist_multiplier=request.shortlist_multiplier
+        )
+        query_time_ms = (time.time() - start_time) * 1000
+
+        search_results = [
+            [SearchResult(id=r['id'], score=r['score'], text=r['text'], metadata=r['metadata']) for r in query_results]
+            for query_results in results
+        ]
+
+        return BatchSearchResponse(
+            results=search_results,
+            total_queries=len(search_results),
+            query_time_ms=query_time_ms
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/vector", response_model=SearchResponse)
+def search_by_vector(
+    request: VectorSearchRequest,
+    vector_store: VectorStore = Depends(get_vector_store_dependency)
+):
+    """Search using a precomputed query vector (no embedding call)."""
+    if not vector_store.index_exists(request.index_name):
+        raise HTTPException(status_code=404, detail=f"Index '{request.index_name}' not found")
+
+    start_time = time.time()
+    vectors = None if request.query_vector is None else [request.query_vector]
+    query_vector = _query_matrix(vectors, request.query_vector_base64, _index_dimension(vector_store, request.index_name))
+    if query_vector.shape[0] != 1:
+        raise HTTPException(status_code=400, detail="Use /search/vector/batch to search several query vectors")
+
+    try:
+        results = vector_store.query_index(
+            index_name=request.index_name,
+            query_vector=query_vector[0],
+            top_k=request.top_k,
+            algorithm=request.algorithm,
+            distance=request.distance,
+            decay_factor=request.decay_factor,
+            filter=request.filter,
+            ef_search=request.ef_search,
+            nprobe=request.nprobe,
+            prefix_dimension=request.prefix_dimension,
+            shortlist_multiplier=request.shortlist_multiplier
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    query_time_ms = (time.time() - start_time) * 1000
+
+    search_results = [
+        SearchResult(id=r['id'], score=r['score'], text=r['text'], metadata=r['metadata'])
+        for r in results
+    ]
+
+    return SearchResponse(
+        results=search_results,
+        total_results=len(search_results),
+        query_time_ms=query_time_ms
+    )
+
+@router.post("/vector/batch", response_model=BatchSearchResponse)
+def search_batch_by_vector(
+    request: BatchVectorSearchRequest,
+    vector_store: VectorStore = Depends(get_vector_store_dependency)
+):
+    """Search many precomputed query vectors against one index (scored together, see /search/batch)."""
+    if not vector_store.index_exists(request.index_name):
+        raise HTTPException(status_code=404, detail=f"Index '{request.index_name}' not found")
+
+    start_time = time.time()
+    query_vectors = _query_matrix(request.query_vectors, request.query_vectors_base64, _index_dimension(vector_store, request.index_name))
+
+    try:
+        results = vector_store.query_index_batch(
+            index_name=request.index_name,
+            query_vectors=query_vectors,
+            top_k=request.top_k,
+            algorithm=request.algorithm,
+            distance=request.distance,
+            decay_factor=request.decay_factor,
+            filter=request.filter,
+            ef_search=request.ef_search,
+            nprobe=request.nprobe,
+            prefix_dimension=request.prefix_dimension,
+            shortlist_multiplier=request.shortlist_multiplier
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    query_time_ms = (time.time() - start_time) * 1000
+
+    search_results = [
+        [SearchResult(id=r['id'], score=r['score'], text=r['text'], metadata=r['metadata']) for r in query_results]
+        for query_results in results
+    ]
+
+    return BatchSearchResponse(
+        results=search_results,
+        total_queries=len(search_results),
+        query_time_ms=query_time_ms
+    )
+
+@router.post("/vector/recall", response_model=RecallResponse)
+def measure_recall(
+    request: BatchVectorSearchRequest,
+    vector_store: VectorStore = Depends(get_vector_store_dependency)
+):
+    """Recall of a search (e.g. 'matryoshka', 'hnsw' or 'ivf') against an exact linear scan of the same query vectors, with both timings."""
+    if not vector_store.index_exists(request.index_name):
+        raise HTTPException(status_code=404, detail=f"Index '{request.index_name}' not found")
+
+    query_vectors = _query_matrix(request.query_vectors, request.query_vectors_base64, _index_dimension(vector_store, request.index_name))
+    parameters = request.model_dump(include={"index_name", "top_k", "distance", "filter"})
+
+    try:
+        start_time = time.time()
+        results = vector_store.query_index_batch(
+            query_vectors=query_vectors,
+            algorithm=request.algorithm,
+            decay_factor=request.decay_factor,
+            ef_search=request.ef_search,
+            nprobe=request.nprobe,
+            prefix_dimension=request.prefix_dimension,
+            shortlist_multiplier=request.shortlist_multiplier,
+            **parameters
+        )
+        query_time_ms = (time.time() - start_time) * 1000
+
+        start_time = time.time()
+        exact_results = vector_store.query_index_batch(query_vectors=query_vectors, algorithm="linear", **parameters)
+        exact_query_time_ms = (time.time() - start_time) * 1000
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    return RecallResponse(
+        recall=VectorStore.recall(results, exact_results),
+        total_queries=len(results),
+        query_time_ms=query_time_ms,
+        exact_query_time_ms=exact_query_time_ms
+    )
@@ -1,13 +1,20 @@
 import sys
-from typing import List, Optional
+import asyncio
+from collections import defaultdict
+from typing import AsyncIterator, List, Optional, Tuple
+
+from pydantic import ValidationError
 
 # src
 sys.path.append("./")
-from src.jarvis.app.api.models.responses import DocumentResponse, DocumentChunk
+from src.jarvis.app.api.models.requests import DocumentUploadRequest
+from src.jarvis.app.api.models.responses import BulkDocumentStatus, DocumentResponse, DocumentChunk
 from src.jarvis.domain.search.vector_store.vector_store import VectorStore
 from src.jarvis.ingestor import Ingestor
 from src.jarvis.domain.genai.document import Document, DocumentMetadata
-from src.jarvis.domain.genai.chunk import ChunkMetadata
+from src.jarvis.domain.genai.chunk import Chunk, ChunkMetadata
+from src.jarvis.infrastructure.core.config import genai_config
+from src.jarvis.infrastructure.embedding.pipeline import EmbeddingPipeline
 import logging
 
 # logger
@@ -15,9 +22,10 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 class DocumentService:
-    def __init__(self, vector_store: VectorStore, ingestor: Optional[Ingestor]):
+    def __init__(self, vector_store: VectorStore, ingestor: Optional[Ingestor], pipeline: Optional[EmbeddingPipeline] = None):
         self.vector_store = vector_store
         self.ingestor = ingestor
+        self.pipeline = pipeline
     
     async def upload_document(
         self,
@@ -27,9 +35,18 @@ class DocumentService:
         full_text: str,
         created_date: Optional[str] = None
     ) -> str:
-        """Upload and process a document for indexing."""
+        """
+        Upload and process a document for indexing.
+
+        The text is split into chunks off the event loop and the chunks are embedded in concurrent
+        batches by the embedding pipeline. The document is indexed once all its chunks are embedded,
+        in a single call, so searches (and the result cache) never see part of it. If a batch fails,
+        nothing is indexed.
+        """
         if not self.vector_store.index_exists(index_name):
             raise ValueError(f"Index '{index_name}' does not exist")
+        if not self.ingestor or not self.pipeline:
+            raise ValueError("Ingestor and embedding pipeline are required for document processing")
         
         # Create document metadata
         metadata = DocumentMetadata(
@@ -45,45 +62,183 @@ class DocumentService:
             metadata=metadata
         )
         
-        # Process the document text into chunks with embeddings
-        await self._process_document_chunks(document)
-        
-        # Index the document
-        self.vector_store.index_document(index_name, document)
+        # Split the text into chunks (tokenizing is CPU bound, keep it off the event loop)
+        texts = await asyncio.to_thread(self.ingestor.split_text, full_text)
+
+        # Embed the chunks in concurrent batches (they complete in any order)
+        async for positions, embeddings in self.pipeline.embed(texts, genai_config.COHERE_INPUT_TYPE_INGESTOR):
+            for chunk_id, embedding in zip(positions, embeddings):
+                document.add_chunk(Chunk(
+                    text=texts[chunk_id],
+                    embedding=embedding,
+                    metadata=ChunkMetadata(document_id=metadata.document_id, chunk_id=chunk_id)
+                ))
+
+        # Keep the chunks in order
+        document.chunks.sort(key=lambda chunk: chunk.metadata.chunk_id)
+        await asyncio.to_thread(self.vector_store.index_document, index_name, document)
         
         logger.info(f"Document '{title}' indexed successfully with {len(document.chunks)} chunks")
         return document.metadata.document_id
     
-    async def _process_document_chunks(self, document: Document):
-        """Process document text into chunks using the ingestor logic."""
-        if not self.ingestor:
-            raise ValueError("Ingestor is required for document processing")
-        
-        # Use the ingestor's chunking logic
-        # We'll create a temporary ingestor data structure
-        temp_data = [document]
-        original_data = self.ingestor.data
-        self.ingestor.data = temp_data
-        
+    async def bulk_upload(
+        self,
+        lines: AsyncIterator[bytes],
+        batch_size: int = genai_config.EMBEDDING_BULK_BATCH_SIZE
+    ) -> AsyncIterator[BulkDocumentStatus]:
+        """
+        Upload a stream of documents, one DocumentUploadRequest JSON per line (NDJSON).
+
+        The documents go through three concurrent stages connected by bounded queues, so the stream
+        is never buffered and every stage works on a batch while the next one handles the previous batch:
+
+            1. parsing and validation of the lines, grouped in batches of `batch_size` documents,
+            2. chunking and embedding of all the chunks of a batch (in concurrent requests, see EmbeddingPipeline),
+            3. indexing, with a single `VectorStore.index_documents` call (one lock, one WAL sync) per index and batch.
+
+        Args:
+            lines (AsyncIterator[bytes]): Lines of the upload.
+            batch_size (int, optional): Documents per batch. Defaults to EMBEDDING_BULK_BATCH_SIZE.
+
+        Yields:
+            BulkDocumentStatus: The status of every document, as soon as it is indexed or rejected
+                (in completion order, documents are identified by their line number).
+
+        Raises:
+            ValueError: If the service has no ingestor or embedding pipeline.
+            Exception: The error of the line stream (e.g. the client disconnected). The documents of a failed batch are reported
+                as errors instead.
+        """
+        if not self.ingestor or not self.pipeline:
+            raise ValueError("Ingestor and embedding pipeline are required for document processing")
+
+        # Batches are passed downstream, then None once the stream is over (or the error that stopped it)
+        parsed = asyncio.Queue(maxsize=1)
+        embedded = asyncio.Queue(maxsize=1)
+        statuses = asyncio.Queue()
+        stages = [
+            asyncio.create_task(self._parse_stage(lines, batch_size, parsed, statuses)),
+            asyncio.create_task(self._embed_stage(parsed, embedded, statuses)),
+            asyncio.create_task(self._index_stage(embedded, statuses)),
+        ]
         try:
-            # Generate chunks for this document
-            list(self.ingestor.chunk_generator())
+            while (status := await statuses.get()) is not None:
+                if isinstance(status, Exception):
+                    raise status
+                yield status
         finally:
-            # Restore original data
-            self.ingestor.data = original_data
-    
-    async def list_documents(self, index_name: str) -> List[DocumentResponse]:
+            for stage in stages:
+                stage.cancel()
+            await asyncio.gather(*stages, return_exceptions=True)
+
+    async def _parse_stage(self, lines: AsyncIterator[bytes], batch_size: int, parsed: asyncio.Queue, statuses: asyncio.Queue) -> None:
+        try:
+            batch: List[Tuple[int, DocumentUploadRequest]] = []
+            line_number = 0
+            async for line in lines:
+                line_number += 1
+                if not line.strip():
+                    continue
+                try:
+                    batch.append((line_number, DocumentUploadRequest.model_validate_json(line)))
+                except ValidationError as e:
+                    statuses.put_nowait(BulkDocumentStatus(line=line_number, status="error", error=str(e)))
+                    continue
+
+                if len(batch) >= batch_size:
+                    await parsed.put(batch)
+                    batch = []
+
+            if batch:
+                await parsed.put(batch)
+            await parsed.put(None)
+        except Exception as e:
+            await parsed.put(e)
+
+    async def _embed_stage(self, parsed: asyncio.Queue, embedded: asyncio.Queue, statuses: asyncio.Queue) -> None:
+        try:
+            while (batch := await parsed.get()) is not None:
+                if isinstance(batch, Exception):
+                    raise batch
+                await embedded.put(await self._embed_documents(batch, statuses))
+            await embedded.put(None)
+        except Exception as e:
+            await embedded.put(e)
+
+    async def _embed_documents(
+        self,
+        batch: List[Tuple[int, DocumentUploadRequest]],
+        statuses: asyncio.Queue
+    ) -> List[Tuple[int, str, Document]]:
+        """Chunk and embed a batch of documents. Returns (line number, index name, document) for each document ready to be indexed."""
+        documents = []
+        for line_number, request in batch:
+            if not self.vector_store.index_exists(request.index_name):
+                statuses.put_nowait(BulkDocumentStatus(line=line_number, status="error", error=f"Index '{request.index_name}' does not exist"))
+                continue
+            metadata = DocumentMetadata(title=request.title, author=request.author, created_date=request.created_date)
+            documents.append((line_number, request.index_name, Document(full_text=request.full_text, chunks=[], metadata=metadata)))
+
+        # Split all the documents in a single worker thread call (fanned out to the splitter processes), then embed all their chunks together
+        chunked = await asyncio.to_thread(self.ingestor.split_texts, [document.full_text for _, _, document in documents])
+        texts = [text for chunks in chunked for text in chunks]
+        owners = [(document, chunk_id) for (_, _, document), chunks in zip(documents, chunked) for chunk_id in range(len(chunks))]
+
+        try:
+            async for positions, embeddings in self.pipeline.embed(texts, genai_config.COHERE_INPUT_TYPE_INGESTOR):
+                for position, embedding in zip(positions, embeddings):
+                    document, chunk_id = owners[position]
+                    document.add_chunk(Chunk(
+                        text=texts[position],
+                        embedding=embedding,
+                        metadata=ChunkMetadata(document_id=document.metadata.document_id, chunk_id=chunk_id)
+                    ))
+        except Exception as e:
+            logger.warning(f"Embedding a bulk batch of {len(documents)} document(s) failed: {e!r}")
+            for line_number, _, _ in documents:
+                statuses.put_nowait(BulkDocumentStatus(line=line_number, status="error", error=f"Embedding failed: {e}"))
+            return []
+
+        for _, _, document in documents:
+            document.chunks.sort(key=lambda chunk: chunk.metadata.chunk_id)
+        return documents
+
+    async def _index_stage(self, embedded: asyncio.Queue, statuses: asyncio.Queue) -> None:
+        try:
+            while (documents := await embedded.get()) is not None:
+                if isinstance(documents, Exception):
+                    raise documents
+
+                by_index = defaultdict(list)
+                for line_number, index_name, document in documents:
+                    by_index[index_name].append((line_number, document))
+
+                for index_name, entries in by_index.items():
+                    try:
+                        await asyncio.to_thread(self.vector_store.index_documents, index_name, [document for _, document in entries])
+                    except ValueError as e:
+                        for line_number, _ in entries:
+                            statuses.put_nowait(BulkDocumentStatus(line=line_number, status="error", error=str(e)))
+                        continue
+
+                    for line_number, document in entries:
+                        statuses.put_nowait(BulkDocumentStatus(
+                            line=line_number, status="indexed", document_id=document.metadata.document_id, chunks=len(document.chunks)
+                        ))
+            statuses.put_nowait(None)
+        except Exception as e:
+            statuses.put_nowait(e)
+
+    def list_documents(self, index_name: str) -> List[DocumentResponse]:
         """List all documents in an index."""
-        if not self.vector_store.index_exists(index_name):
-            raise ValueError(f"Index '{index_name}' does not exist")
-        
-        index_data = self.vector_store.indexes[index_name]
-        texts = index_data['texts']
-        metadata = index_data['metadata']
+        index_data = self.vector_store.index_snapshot(index_name)
+        texts = index_data.texts
+        metadata = index_data.metadata
         
         # Group metadata by document_id to get unique documents
         documents = {}
-        for i, meta in enumerate(metadata):
+        for i in index_data.live_rows().tolist():
+            meta = metadata[i]
             chunk_meta = ChunkMetadata(**meta)
             doc_id = chunk_meta.document_id
 
@@ -26,7 +26,11 @@ class SearchService:
         algorithm: str = genai_config.VECTORSTORE_ALGORITHM,
         distance: str = genai_config.VECTORSTORE_DISTANCE,
         decay_factor: float = genai_config.VECTORSTORE_DECAY_FACTOR,
-        filter: Optional[dict] = None
+        filter: Optional[dict] = None,
+        ef_search: Optional[int] = None,
+        nprobe: Optional[int] = None,
+        prefix_dimension: Optional[int] = None,
+        shortlist_multiplier: Optional[int] = None
     ) -> List[Dict[str, Any]]:
         """Search by delegating to the existing Retrieval class."""
         
@@ -40,5 +44,9 @@ class SearchService:
             algorithm=algorithm,
             distance=distance,
             decay_factor=decay_factor,
-            filter=filter
+            filter=filter,
+            ef_search=ef_search,
+            nprobe=nprobe,
+            prefix_dimension=prefix_dimension,
+            shortlist_multiplier=shortlist_multiplier
         )
\ No newline at end of file
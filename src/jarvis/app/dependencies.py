@@ -1,11 +1,17 @@
 import sys
 from functools import lru_cache
+from typing import Optional
 
 # src
 sys.path.append("./")
 from src.jarvis.domain.search.vector_store.vector_store import VectorStore
+from src.jarvis.domain.search.result_cache import QueryResultCache
 from src.jarvis.ingestor import Ingestor
 from src.jarvis.retrieval import Retrieval
+from src.jarvis.infrastructure.embedding.cache import EmbeddingCache
+from src.jarvis.infrastructure.embedding.embedder import build_embedder
+from src.jarvis.infrastructure.embedding.pipeline import EmbeddingPipeline
+from src.jarvis.infrastructure.core.config import genai_config
 import logging
 
 # logger
@@ -16,15 +22,31 @@ logger = logging.getLogger(__name__)
 _vector_store = None
 _ingestor = None
 _retrieval = None
+_embedding_pipeline = None
+_embedding_cache = None
 
 
 @lru_cache()
 def get_vector_store() -> VectorStore:
-    """Dependency to get vector store instance."""
+    """Dependency to get vector store instance.
+
+    With VECTORSTORE_ROLE "reader" (search workers), the store is read-only and follows the snapshots
+    published by the "writer" process (see `run.py --workers`).
+    """
     global _vector_store
     if _vector_store is None:
-        logger.info("Initializing VectorStore")
-        _vector_store = VectorStore()
+        role = genai_config.VECTORSTORE_ROLE
+        if role not in {"standalone", "writer", "reader"}:
+            raise ValueError(f"Unsupported VECTORSTORE_ROLE '{role}'. Supported roles are: {{'standalone', 'writer', 'reader'}}")
+
+        logger.info(f"Initializing VectorStore ({role})")
+        _vector_store = VectorStore(persist_dir=genai_config.VECTORSTORE_PERSIST_DIR or None, read_only=role == "reader")
+        # Map the snapshots of the previous run (and replay their WAL) instead of re-ingesting everything
+        _vector_store.load()
+        if role == "writer":
+            _vector_store.start_publishing(genai_config.VECTORSTORE_PUBLISH_INTERVAL)
+        elif role == "reader":
+            _vector_store.start_refresh(genai_config.VECTORSTORE_REFRESH_INTERVAL)
     return _vector_store
 
 @lru_cache() 
@@ -33,7 +55,7 @@ def get_ingestor() -> Ingestor:
     global _ingestor
     if _ingestor is None:
         logger.info("Initializing Ingestor")
-        _ingestor = Ingestor()
+        _ingestor = Ingestor(cache=get_embedding_cache())
     return _ingestor
 
 @lru_cache()
@@ -42,9 +64,28 @@ def get_retrieval() -> Retrieval:
     global _retrieval
     if _retrieval is None:
         logger.info("Initializing Retrieval")
-        _retrieval = Retrieval(get_vector_store(), get_ingestor())
+        result_cache = QueryResultCache(genai_config.VECTORSTORE_QUERY_CACHE_SIZE) if genai_config.VECTORSTORE_QUERY_CACHE_SIZE > 0 else None
+        _retrieval = Retrieval(get_vector_store(), get_ingestor(), result_cache=result_cache)
     return _retrieval
 
+@lru_cache()
+def get_embedding_pipeline() -> EmbeddingPipeline:
+    """Dependency to get the embedding pipeline instance (its concurrency and rate limits are shared by all the uploads)."""
+    global _embedding_pipeline
+    if _embedding_pipeline is None:
+        logger.info(f"Initializing EmbeddingPipeline ({genai_config.EMBEDDING_PROVIDER})")
+        _embedding_pipeline = EmbeddingPipeline(build_embedder(genai_config.EMBEDDING_PROVIDER), cache=get_embedding_cache())
+    return _embedding_pipeline
+
+@lru_cache()
+def get_embedding_cache() -> Optional[EmbeddingCache]:
+    """Dependency to get the embedding cache instance (None if EMBEDDING_CACHE_PATH is empty)."""
+    global _embedding_cache
+    if _embedding_cache is None and genai_config.EMBEDDING_CACHE_PATH:
+        logger.info(f"Opening the embedding cache '{genai_config.EMBEDDING_CACHE_PATH}'")
+        _embedding_cache = EmbeddingCache(genai_config.EMBEDDING_CACHE_PATH, genai_config.EMBEDDING_CACHE_MAX_BYTES)
+    return _embedding_cache
+
 def get_vector_store_dependency():
     """FastAPI dependency function for VectorStore."""
     return get_vector_store()
@@ -56,3 +97,7 @@ def get_ingestor_dependency():
 def get_retrieval_dependency():
     """FastAPI dependency function for Retrieval."""
     return get_retrieval()
+
+def get_embedding_pipeline_dependency():
+    """FastAPI dependency function for EmbeddingPipeline."""
+    return get_embedding_pipeline()
@@ -1,21 +1,39 @@
 import sys
 import logging
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, RedirectResponse
 
 # src
 sys.path.append("./")
 from src.jarvis.app.api.routes import documents, search, indexes
+from src.jarvis.app.dependencies import get_embedding_cache, get_ingestor, get_retrieval, get_vector_store
+from src.jarvis.infrastructure.core.config import genai_config
 
 # logger
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Recover the indexes on startup, checkpoint them on shutdown so the next start has no WAL to replay
+    vector_store = get_vector_store()
+    yield
+    if vector_store.persist_dir and not vector_store.read_only:
+        vector_store.save()
+    vector_store.close()
+    get_ingestor().close()
+    if get_embedding_cache() is not None:
+        get_embedding_cache().close()
+
+
 app = FastAPI(
     title="JARVIS API",
     description="REST API for vector database operations",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Add CORS middleware
@@ -27,6 +45,20 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+if genai_config.VECTORSTORE_ROLE == "reader":
+    @app.middleware("http")
+    async def forward_writes(request: Request, call_next):
+        """Search workers only serve reads (GET and /search), the writes are sent to the writer process."""
+        if request.method in {"GET", "HEAD", "OPTIONS"} or request.url.path.startswith("/search/"):
+            return await call_next(request)
+        if genai_config.VECTORSTORE_WRITER_URL:
+            # NOTE: 307 keeps the method and the body of the request
+            url = genai_config.VECTORSTORE_WRITER_URL.rstrip("/") + request.url.path
+            if request.url.query:
+                url += "?" + request.url.query
+            return RedirectResponse(url, status_code=307)
+        return JSONResponse(status_code=403, content={"detail": "This is a read-only search worker, send the writes to the writer process"})
+
 # Include routers
 app.include_router(indexes.router, prefix="/indexes", tags=["indexes"])
 app.include_router(documents.router, prefix="/documents", tags=["documents"])
@@ -38,7 +70,14 @@ async def root():
 
 @app.get("/health")
 async def health_check():
-    return {"status": "healthy"}
+    embedding_cache = get_embedding_cache()
+    result_cache = get_retrieval().result_cache
+    return {
+        "status": "healthy",
+        "role": genai_config.VECTORSTORE_ROLE,
+        "embedding_cache": embedding_cache.stats() if embedding_cache is not None else None,
+        "query_cache": result_cache.stats() if result_cache is not None else None,
+    }
 
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,344 @@
+import copy
+import heapq
+import math
+import random
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+
+
+class HNSW:
+    """
+    Hierarchical Navigable Small World graph for approximate nearest neighbour search.
+
+    Each node is a row of the index matrix. Nodes are assigned a random top layer (with an
+    exponentially decaying probability) and, on every layer they belong to, they are linked
+    with up to `M` neighbours (`2 * M` on the bottom layer) chosen with the neighbour selection
+    heuristic of the HNSW paper. A search greedily descends from the entry point through the
+    upper layers and then runs a best-first search of width `ef_search` on the bottom layer.
+
+    Notes and limitations:
+        - The graph only stores node ids; the vectors (and their precomputed norms) are always
+        read from the arrays passed to each method, so the index keeps a single copy of them.
+        - Deleted nodes are tombstoned: they keep routing searches through the graph but are never
+        returned. `repair` reconnects the neighbours of tombstoned nodes and drops them, and
+        `remap` renumbers the nodes once their rows have been compacted.
+        - Adjacency lists are never modified in place (they are replaced), and the layer dictionaries
+        are shared with the graphs obtained by `copy` until one of them adds or repairs nodes, so a copy
+        only costs its tombstone set until it changes.
+        - Distances are euclidean or 1 - cosine similarity. `search` converts them back to the
+        VectorStore score convention (distance for euclidean, similarity for cosine).
+    """
+
+    def __init__(
+        self,
+        distance_metric: str = 'euclidean',
+        M: int = 16,
+        ef_construction: int = 200,
+        ef_search: int = 50,
+        random_seed: Optional[int] = 100
+    ):
+        self.distance_metric = distance_metric.lower()
+        if self.distance_metric not in {'euclidean', 'cosine'}:
+            raise ValueError(f"Unsupported distance metric: {self.distance_metric}")
+        if M < 2:
+            raise ValueError(f"HNSW parameter 'm' must be at least 2, got {M}")
+        if ef_search < 1:
+            raise ValueError(f"HNSW parameter 'ef_search' must be at least 1, got {ef_search}")
+
+        self.M = M
+        self.max_neighbors_0 = 2 * M
+        self.ef_construction = max(ef_construction, M)
+        self.ef_search = ef_search
+
+        self._level_multiplier = 1.0 / math.log(M)
+        self._rng = random.Random(random_seed)
+
+        # One adjacency dictionary per layer: {node: [neighbour nodes]}
+        self._layers: List[Dict[int, List[int]]] = []
+        self._entry_point: Optional[int] = None
+        self._max_level = -1
+        self._deleted: Set[int] = set()
+        self._owns_layers = True    # False while the layer dictionaries are shared with a copy
+
+    def __len__(self) -> int:
+        """Number of nodes in the graph (tombstoned nodes included)."""
+        return len(self._layers[0]) if self._layers else 0
+
+    @property
+    def deleted_count(self) -> int:
+        return len(self._deleted)
+
+    def copy(self) -> "HNSW":
+        """Copy of the graph that can be changed (or searched while this one changes) independently."""
+        graph = copy.copy(self)
+        graph._deleted = set(self._deleted)
+        graph._rng = copy.copy(self._rng)
+        # NOTE: Copy-on-write, the first of the two graphs that adds or repairs nodes copies the layer dictionaries
+        self._owns_layers = graph._owns_layers = False
+        return graph
+
+    def _own_layers(self) -> None:
+        """Copy the layer dictionaries if they are shared with another graph, before changing them."""
+        if not getattr(self, "_owns_layers", True):
+            self._layers = [dict(graph) for graph in self._layers]
+            self._owns_layers = True
+
+    def _max_neighbors(self, layer: int) -> int:
+        return self.max_neighbors_0 if layer == 0 else self.M
+
+    def _distances(self, query: np.ndarray, nodes: List[int], vectors: np.ndarray, norms: np.ndarray) -> np.ndarray:
+        """Distance between a query vector and a small set of nodes (uses the precomputed row norms)."""
+        dot_products = vectors[nodes] @ query
+        query_norm = math.sqrt(float(query @ query))
+
+        if self.distance_metric == 'euclidean':
+            node_norms = norms[nodes]
+            squared = node_norms * node_norms - 2.0 * dot_products + query_norm * query_norm
+            return np.sqrt(np.maximum(squared, 0.0))
+
+        return 1.0 - dot_products / np.maximum(norms[nodes] * query_norm, 1e-10)
+
+    def _pairwise_distances(self, nodes: List[int], vectors: np.ndarray, norms: np.ndarray) -> np.ndarray:
+        """(n, n) distance matrix between a small set of nodes, computed with a single matrix product."""
+        candidates = vectors[nodes]
+        node_norms = norms[nodes]
+        dot_products = candidates @ candidates.T
+
+        if self.distance_metric == 'euclidean':
+            squared = (node_norms * node_norms)[:, None] - 2.0 * dot_products + (node_norms * node_norms)[None, :]
+            return np.sqrt(np.maximum(squared, 0.0))
+
+        return 1.0 - dot_products / np.maximum(np.outer(node_norms, node_norms), 1e-10)
+
+    def _search_layer(
+        self,
+        query: np.ndarray,
+        entry_points: List[Tuple[float, int]],
+        ef: int,
+        layer: int,
+        vectors: np.ndarray,
+        norms: np.ndarray
+    ) -> List[Tuple[float, int]]:
+        """Best-first search of width `ef` on one layer. Returns (distance, node) pairs, closest first."""
+        graph = self._layers[layer]
+        visited = {node for _, node in entry_points}
+
+        candidates = list(entry_points)                      # min-heap on distance
+        heapq.heapify(candidates)
+        results = [(-dist, node) for dist, node in entry_points]   # max-heap on distance
+        heapq.heapify(results)
+        while len(results) > ef:
+            heapq.heappop(results)
+
+        while candidates:
+            dist, node = heapq.heappop(candidates)
+            if len(results) >= ef and dist > -results[0][0]:
+                break
+
+            neighbors = [n for n in graph.get(node, ()) if n not in visited]
+            if not neighbors:
+                continue
+            visited.update(neighbors)
+
+            for neighbor_dist, neighbor in zip(self._distances(query, neighbors, vectors, norms).tolist(), neighbors):
+                if len(results) < ef or neighbor_dist < -results[0][0]:
+                    heapq.heappush(candidates, (neighbor_dist, neighbor))
+                    heapq.heappush(results, (-neighbor_dist, neighbor))
+                    if len(results) > ef:
+                        heapq.heappop(results)
+
+        return sorted((-dist, node) for dist, node in results)
+
+    def _select_neighbors(self, candidates: List[Tuple[float, int]], m: int, vectors: np.ndarray, norms: np.ndarray) -> List[int]:
+        """
+        Neighbour selection heuristic: a candidate (sorted closest first) is kept only if it is
+        closer to the base node than to any neighbour already selected, which keeps links spread
+        in different directions. Pruned candidates fill the remaining slots.
+        """
+        if len(candidates) <= m:
+            return [node for _, node in candidates]
+
+        nodes = [node for _, node in candidates]
+        between = self._pairwise_distances(nodes, vectors, norms)
+
+        selected: List[int] = []
+        pruned: List[int] = []
+        for i, (dist, _) in enumerate(candidates):
+            if len(selected) >= m:
+                break
+            if selected and (between[i, selected] < dist).any():
+                pruned.append(i)
+            else:
+                selected.append(i)
+
+        for i in pruned:
+            if len(selected) >= m:
+                break
+            selected.append(i)
+
+        return [nodes[i] for i in selected]
+
+    def _shrink(self, node: int, neighbors: List[int], m: int, vectors: np.ndarray, norms: np.ndarray) -> List[int]:
+        """Reduce the neighbour list of a node to at most `m` links."""
+        dists = self._distances(vectors[node], neighbors, vectors, norms).tolist()
+        return self._select_neighbors(sorted(zip(dists, neighbors)), m, vectors, norms)
+
+    def _greedy_descent(self, query: np.ndarray, target_level: int, vectors: np.ndarray, norms: np.ndarray) -> List[Tuple[float, int]]:
+        """Greedy search from the entry point down to `target_level` (exclusive)."""
+        entry_dist = float(self._distances(query, [self._entry_point], vectors, norms)[0])
+        entry = [(entry_dist, self._entry_point)]
+        for layer in range(self._max_level, target_level, -1):
+            entry = self._search_layer(query, entry, 1, layer, vectors, norms)[:1]
+
+        return entry
+
+    def add(self, node: int, vectors: np.ndarray, norms: np.ndarray) -> None:
+        """Insert the row `node` of `vectors` (with L2 norms `norms`) into the graph."""
+        query = vectors[node]
+        level = int(-math.log(1.0 - self._rng.random()) * self._level_multiplier)
+
+        self._own_layers()
+        while len(self._layers) <= level:
+            self._layers.append({})
+        for layer in range(level + 1):
+            self._layers[layer][node] = []
+
+        if self._entry_point is None:
+            self._entry_point, self._max_level = node, level
+            return
+
+        entry = self._greedy_descent(query, level, vectors, norms)
+
+        for layer in range(min(level, self._max_level), -1, -1):
+            candidates = self._search_layer(query, entry, self.ef_construction, layer, vectors, norms)
+            # Avoid linking new nodes to tombstones, unless there is nothing else
+            live_candidates = [c for c in candidates if c[1] not in self._deleted] or candidates
+
+            neighbors = self._select_neighbors(live_candidates, self.M, vectors, norms)
+            self._layers[layer][node] = neighbors
+
+            max_neighbors = self._max_neighbors(layer)
+            for neighbor in neighbors:
+                neighbor_links = self._layers[layer][neighbor] + [node]
+                if len(neighbor_links) > max_neighbors:
+                    neighbor_links = self._shrink(neighbor, neighbor_links, max_neighbors, vectors, norms)
+                self._layers[layer][neighbor] = neighbor_links
+
+            entry = candidates
+
+        if level > self._max_level:
+            self._entry_point, self._max_level = node, level
+
+    def search(
+        self,
+        query: List[float],
+        vectors: np.ndarray,
+        norms: np.ndarray,
+        k: int,
+        ef_search: Optional[int] = None,
+        allowed: Optional[np.ndarray] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Approximate k nearest neighbours of a query vector.
+
+        Args:
+            query (List[float]): Query vector.
+            vectors (np.ndarray): Matrix with the vectors of the graph nodes.
+            norms (np.ndarray): L2 norms of the rows of `vectors`.
+            k (int): Number of neighbours to return.
+            ef_search (Optional[int], optional): Width of the bottom layer search. Defaults to the graph's ef_search.
+            allowed (Optional[np.ndarray], optional): Boolean mask of the nodes that can be returned. Defaults to None.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: Nodes and scores of the neighbours, best first.
+        """
+        if self._entry_point is None or k <= 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+
+        query = np.asarray(query, dtype=np.float32)
+        if query.shape[0] != vectors.shape[1]:
+            raise ValueError(f"Vector length mismatch: len(query)={query.shape[0]} != matrix dimension={vectors.shape[1]}")
+
+        n_nodes = len(self)
+        ef = max(ef_search or self.ef_search, k)
+        entry = self._greedy_descent(query, 0, vectors, norms)
+
+        # Tombstones and filtered out nodes are skipped, widening the search until k results are found
+        while True:
+            candidates = self._search_layer(query, entry, ef, 0, vectors, norms)
+            results = [
+                (dist, node) for dist, node in candidates
+                if node not in self._deleted and (allowed is None or allowed[node])
+            ][:k]
+            if len(results) >= k or ef >= n_nodes:
+                break
+            ef = min(2 * ef, n_nodes)
+
+        nodes = np.asarray([node for _, node in results], dtype=np.int64)
+        dists = np.asarray([dist for dist, _ in results], dtype=np.float32)
+
+        return nodes, (1.0 - dists if self.distance_metric == 'cosine' else dists)
+
+    def mark_deleted(self, nodes: Iterable[int]) -> None:
+        """Tombstone nodes: they stay in the graph for routing but are no longer returned."""
+        self._deleted.update(nodes)
+
+    def repair(self, vectors: np.ndarray, norms: np.ndarray) -> None:
+        """
+        Drop the tombstoned nodes from the graph. Every live node that was linked to a tombstone
+        is reconnected by re-selecting its links among its live neighbours and the live neighbours
+        of its deleted neighbours. `vectors` and `norms` must still contain the rows of the tombstoned nodes.
+        """
+        if not self._deleted:
+            return
+
+        self._own_layers()
+        deleted = self._deleted
+        for layer, graph in enumerate(self._layers):
+            max_neighbors = self._max_neighbors(layer)
+            for node, neighbors in graph.items():
+                if node in deleted or not any(n in deleted for n in neighbors):
+                    continue
+
+                candidates = {n for n in neighbors if n not in deleted}
+                for neighbor in neighbors:
+                    if neighbor in deleted:
+                        candidates.update(n for n in graph.get(neighbor, ()) if n not in deleted)
+                candidates.discard(node)
+
+                graph[node] = self._shrink(node, list(candidates), max_neighbors, vectors, norms) if candidates else []
+
+        for graph in self._layers:
+            for node in deleted:
+                graph.pop(node, None)
+
+        # Drop the empty top layers and pick a new entry point if the old one was deleted
+        while self._layers and not self._layers[-1]:
+            self._layers.pop()
+        self._max_level = len(self._layers) - 1
+        if self._entry_point in deleted:
+            self._entry_point = next(iter(self._layers[-1])) if self._layers else None
+
+        self._deleted = set()
+
+    def remap(self, kept: np.ndarray) -> None:
+        """
+        Renumber the nodes after the index rows were compacted.
+
+        Args:
+            kept (np.ndarray): Old row position of each surviving row, in their new order.
+        """
+        if not self._layers:
+            return
+
+        new_ids = np.full(int(kept.max()) + 1 if kept.size else 0, -1, dtype=np.int64)
+        new_ids[kept] = np.arange(kept.size)
+        lookup = new_ids.tolist()
+
+        self._layers = [
+            {lookup[node]: [lookup[n] for n in neighbors] for node, neighbors in graph.items()}
+            for graph in self._layers
+        ]
+        self._owns_layers = True
+        self._entry_point = lookup[self._entry_point]
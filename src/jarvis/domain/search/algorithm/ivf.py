@@ -0,0 +1,200 @@
+import copy
+from typing import List, Optional
+
+import numpy as np
+
+
+def nearest_centroids(vectors: np.ndarray, centroids: np.ndarray, batch_size: int = 65536) -> np.ndarray:
+    """Return the index of the closest centroid (euclidean) of every row, processing the rows in batches."""
+    centroid_sq_norms = np.einsum("ij,ij->i", centroids, centroids)
+    labels = np.empty(vectors.shape[0], dtype=np.int32)
+
+    for start in range(0, vectors.shape[0], batch_size):
+        batch = vectors[start:start + batch_size]
+        # ||x||² is the same for every centroid, so it doesn't change the argmin
+        distances = centroid_sq_norms[None, :] - 2.0 * (batch @ centroids.T)
+        labels[start:start + batch_size] = np.argmin(distances, axis=1)
+
+    return labels
+
+
+class MiniBatchKMeans:
+    """
+    Mini-batch k-means trainer (Sculley, 2010).
+
+    Every iteration assigns a random mini-batch of points to their nearest centroid and moves
+    each centroid towards the mean of its points with a per-centroid learning rate of
+    1 / (points seen so far), so training costs O(iterations * batch_size * k * d) regardless
+    of the number of points.
+    """
+
+    def __init__(
+        self,
+        n_clusters: int,
+        batch_size: int = 1024,
+        max_iter: int = 100,
+        tolerance: float = 1e-4,
+        random_seed: Optional[int] = 100
+    ):
+        if n_clusters < 1:
+            raise ValueError(f"The number of clusters must be at least 1, got {n_clusters}")
+
+        self.n_clusters = n_clusters
+        self.batch_size = batch_size
+        self.max_iter = max_iter
+        self.tolerance = tolerance
+        self._rng = np.random.default_rng(random_seed)
+
+    def fit(self, vectors: np.ndarray) -> np.ndarray:
+        """
+        Train the centroids.
+
+        Args:
+            vectors (np.ndarray): (n, d) training points, n >= n_clusters.
+
+        Returns:
+            np.ndarray: (n_clusters, d) float32 centroids.
+        """
+        n_points = vectors.shape[0]
+        if n_points < self.n_clusters:
+            raise ValueError(f"Need at least {self.n_clusters} points to train {self.n_clusters} clusters, got {n_points}")
+
+        vectors = np.asarray(vectors, dtype=np.float32)
+        centroids = vectors[self._rng.choice(n_points, self.n_clusters, replace=False)].copy()
+        counts = np.zeros(self.n_clusters, dtype=np.float64)
+        batch_size = min(self.batch_size, n_points)
+
+        for _ in range(self.max_iter):
+            batch = vectors[self._rng.choice(n_points, batch_size, replace=False)]
+            labels = nearest_centroids(batch, centroids)
+
+            batch_counts = np.bincount(labels, minlength=self.n_clusters)
+            batch_sums = np.zeros_like(centroids)
+            np.add.at(batch_sums, labels, batch)
+
+            updated = batch_counts > 0
+            counts[updated] += batch_counts[updated]
+            step = (batch_sums[updated] - batch_counts[updated, None] * centroids[updated]) / counts[updated, None]
+            centroids[updated] += step.astype(np.float32)
+
+            # Clusters that never got a point are re-seeded with random points
+            empty = counts == 0
+            if empty.any():
+                centroids[empty] = vectors[self._rng.choice(n_points, int(empty.sum()), replace=False)]
+
+            if np.max(np.abs(step), initial=0.0) < self.tolerance:
+                break
+
+        return centroids
+
+
+class IVF:
+    """
+    Inverted-file index: the rows of an index are partitioned into `nlist` lists by their
+    nearest k-means centroid, and a query only scores the rows of the `nprobe` lists whose
+    centroids are closest to it.
+
+    Notes and limitations:
+        - Row ids are the positions of the rows in the index matrix. Rows have to be added in
+        the same order as they are appended to the index (`add`), and renumbered after the index
+        is compacted (`remap`). Deleted rows are filtered out by the caller.
+        - Each list is kept as a list of row id arrays (one per `add` call) that is merged the
+        first time the list is probed, so appends never copy the existing lists. The arrays are never
+        modified in place, so a `copy` shares them.
+        - The coarse quantizer is trained with euclidean k-means; lists are probed with the metric
+        of the query.
+    """
+
+    def __init__(self, centroids: np.ndarray, nprobe: int = 8):
+        if nprobe < 1:
+            raise ValueError(f"IVF parameter 'nprobe' must be at least 1, got {nprobe}")
+
+        self.centroids = np.asarray(centroids, dtype=np.float32)
+        self.centroid_norms = np.linalg.norm(self.centroids, axis=1)
+        self.nprobe = nprobe
+        self.trained_size = 0   # Number of live rows in the index when the centroids were trained
+        self.requested_nlist = self.nlist   # nlist asked for (it is capped by the number of rows when training)
+
+        self._n_rows = 0
+        self._lists: List[List[np.ndarray]] = [[] for _ in range(self.nlist)]
+
+    @property
+    def nlist(self) -> int:
+        return self.centroids.shape[0]
+
+    def __len__(self) -> int:
+        """Number of rows assigned to a list."""
+        return self._n_rows
+
+    @classmethod
+    def train(
+        cls,
+        vectors: np.ndarray,
+        nlist: int,
+        nprobe: int = 8,
+        batch_size: int = 1024,
+        max_iter: int = 100
+    ) -> "IVF":
+        """Train the coarse quantizer on a set of vectors and return an empty IVF."""
+        kmeans = MiniBatchKMeans(n_clusters=nlist, batch_size=batch_size, max_iter=max_iter)
+        return cls(kmeans.fit(vectors), nprobe=nprobe)
+
+    def copy(self) -> "IVF":
+        """Copy of the IVF that can be changed (or searched while this one changes) independently."""
+        ivf = copy.copy(self)
+        ivf._lists = [list(pieces) for pieces in self._lists]
+        return ivf
+
+    def add(self, vectors: np.ndarray) -> None:
+        """Assign the next rows of the index (in order) to their lists."""
+        if vectors.shape[0] == 0:
+            return
+
+        labels = nearest_centroids(vectors, self.centroids)
+        rows = np.arange(self._n_rows, self._n_rows + vectors.shape[0])
+        self._n_rows += vectors.shape[0]
+
+        # Group the new rows by list with a single sort
+        order = np.argsort(labels, kind="stable")
+        bounds = np.searchsorted(labels[order], np.arange(self.nlist + 1))
+        for list_id in np.flatnonzero(np.diff(bounds)).tolist():
+            self._lists[list_id].append(rows[order[bounds[list_id]:bounds[list_id + 1]]])
+
+    def _list_rows(self, list_id: int) -> np.ndarray:
+        pieces = self._lists[list_id]
+        if not pieces:
+            return np.empty(0, dtype=np.int64)
+        if len(pieces) > 1:
+            pieces[:] = [np.concatenate(pieces)]
+        return pieces[0]
+
+    def candidates(self, query: List[float], distance_metric: str, nprobe: Optional[int] = None) -> np.ndarray:
+        """Row ids of the lists closest to the query."""
+        query = np.asarray(query, dtype=np.float32)
+        nprobe = min(nprobe or self.nprobe, self.nlist)
+
+        dot_products = self.centroids @ query
+        if distance_metric == 'cosine':
+            keys = -dot_products / np.maximum(self.centroid_norms * np.linalg.norm(query), 1e-10)
+        else:
+            keys = self.centroid_norms * self.centroid_norms - 2.0 * dot_products
+
+        probed = np.argpartition(keys, nprobe - 1)[:nprobe] if nprobe < self.nlist else np.arange(self.nlist)
+        rows = [self._list_rows(list_id) for list_id in probed.tolist()]
+
+        return np.sort(np.concatenate(rows)) if rows else np.empty(0, dtype=np.int64)
+
+    def remap(self, kept: np.ndarray) -> None:
+        """
+        Renumber the rows after the index was compacted.
+
+        Args:
+            kept (np.ndarray): Old row position of each surviving row, in their new order.
+        """
+        new_ids = np.full(self._n_rows, -1, dtype=np.int64)
+        new_ids[kept] = np.arange(kept.size)
+
+        for list_id in range(self.nlist):
+            rows = new_ids[self._list_rows(list_id)]
+            self._lists[list_id] = [rows[rows >= 0]]
+        self._n_rows = kept.size
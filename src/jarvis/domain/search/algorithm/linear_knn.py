@@ -1,9 +1,11 @@
 import sys
-from typing import List
+from typing import List, Optional
+
+import numpy as np
 
 #src
 sys.path.append("./")
-from src.jarvis.domain.search.utils import euclidean_distance, cosine_similarity
+from src.jarvis.domain.search.utils import euclidean_distance, cosine_similarity, euclidean_distances, cosine_similarities
 
 
 class LinearKNN:
@@ -19,6 +21,8 @@ class LinearKNN:
         finding the k-nearest neighbors (this is done in VectorStore, following a similar
         approach as the OpenSearch native client). Instead, it simply computes the distance 
         or similarity score between two vectors.
+        - `score_batch` scores one query against a whole matrix in a single BLAS-backed call,
+        which is what VectorStore uses. `score` is kept for pairwise comparisons.
     """
 
     def __init__(self, distance_metric: str = 'euclidean'):
@@ -40,3 +44,26 @@ class LinearKNN:
             return cosine_similarity(a, b)
         else:
             raise ValueError(f"Unsupported distance metric: {self.distance_metric}")
+
+    def score_batch(self, query: List[float], matrix: np.ndarray, norms: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Return the distance or similarity score between a query vector and every row of a matrix.
+
+        Args:
+            query (List[float]): Query vector, or (q, d) matrix of queries.
+            matrix (np.ndarray): (n, d) matrix with the stored vectors.
+            norms (Optional[np.ndarray], optional): Precomputed L2 norms of the matrix rows. Defaults to None.
+
+        Returns:
+            np.ndarray: (n,) array of scores, (q, n) for a matrix of queries.
+        """
+        query = np.asarray(query, dtype=np.float32)
+        if query.shape[-1] != matrix.shape[1]:
+            raise ValueError(f"Vector length mismatch: len(query)={query.shape[-1]} != matrix dimension={matrix.shape[1]}")
+
+        if self.distance_metric == 'euclidean':
+            return euclidean_distances(query, matrix, None if norms is None else norms * norms)
+        elif self.distance_metric == 'cosine':
+            return cosine_similarities(query, matrix, norms)
+        else:
+            raise ValueError(f"Unsupported distance metric: {self.distance_metric}")
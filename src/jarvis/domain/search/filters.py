@@ -0,0 +1,289 @@
+"""
+Metadata filter language of `VectorStore.query_index`.
+
+    {"author": "John Doe"}                                      # Equality (implicit $eq)
+    {"author": {"$in": ["John Doe", "Jane Doe"]}}               # $eq, $ne, $in, $nin
+    {"created_date": {"$gte": "2025-01-01", "$lt": "2025-07-01"}}    # $gt, $gte, $lt, $lte (range fields only)
+    {"$or": [{"author": "John Doe"}, {"title": "Odyssey"}]}     # $and, $or (a dict with several keys is an $and)
+
+Filters compile into a tree of nodes evaluated against the posting lists of the index (and the
+sorted keys of the range fields). Every node can estimate the number of rows it matches without
+materializing them, which is used to evaluate the conjunctions from the most selective condition
+and by the VectorStore to choose between pre-filtering and post-filtering.
+
+NOTE: created_date values are compared as strings, so range filters need ISO 8601 dates.
+"""
+
+import sys
+from bisect import bisect_left, bisect_right
+from typing import Any, List, Optional
+from uuid import UUID
+
+import numpy as np
+
+# src
+sys.path.append("./")
+from src.jarvis.domain.search.vector_store.columnar_index import ColumnarIndex, document_key
+
+COMPARISON_OPERATORS = {"$eq", "$ne", "$in", "$nin"}
+RANGE_OPERATORS = {"$gt", "$gte", "$lt", "$lte"}
+LOGICAL_OPERATORS = {"$and", "$or"}
+
+# A conjunct that would match more than this many times the current candidates is checked row by
+# row on the candidates instead of materializing (and intersecting) its posting lists
+RESIDUAL_CHECK_RATIO = 16
+
+_NO_MATCH = object()    # Posting key of a value that can't match any row (e.g. an invalid document id)
+
+
+def _union(postings: List[np.ndarray]) -> np.ndarray:
+    """Sorted union of the (disjoint) posting lists of different values."""
+    if not postings:
+        return np.empty(0, dtype=np.int64)
+    if len(postings) == 1:
+        return postings[0]
+    return np.sort(np.concatenate(postings))
+
+
+def _posting_key(field: str, value: Any) -> Any:
+    if field == "document_id":
+        try:
+            return document_key(value)
+        except ValueError:
+            return _NO_MATCH
+    return value
+
+
+class FilterNode:
+    """A compiled filter condition."""
+
+    def estimate(self, index: ColumnarIndex) -> int:
+        """Upper bound of the number of live rows that match, computed without materializing them."""
+        raise NotImplementedError
+
+    def rows(self, index: ColumnarIndex) -> np.ndarray:
+        """Sorted positions of the live rows that match."""
+        raise NotImplementedError
+
+    def matches(self, index: ColumnarIndex, rows: np.ndarray) -> np.ndarray:
+        """Boolean mask of the given (live) rows that match, checked row by row."""
+        raise NotImplementedError
+
+
+class In(FilterNode):
+    """`field` equals one of `values` ($eq is an $in with a single value)."""
+
+    def __init__(self, field: str, values: List[Any]):
+        self.field = field
+        self.values = values
+
+    def _postings(self, index: ColumnarIndex) -> List[np.ndarray]:
+        return [index.find_rows(self.field, value) for value in self.values]
+
+    def estimate(self, index: ColumnarIndex) -> int:
+        return sum(rows.size for rows in self._postings(index))
+
+    def rows(self, index: ColumnarIndex) -> np.ndarray:
+        return _union([rows for rows in self._postings(index) if rows.size])
+
+    def matches(self, index: ColumnarIndex, rows: np.ndarray) -> np.ndarray:
+        keys = {_posting_key(self.field, value) for value in self.values}
+        return np.fromiter((value in keys for value in index.field_values(self.field, rows)), dtype=bool, count=rows.size)
+
+
+class NotIn(FilterNode):
+    """`field` equals none of `values` ($ne is a $nin with a single value)."""
+
+    def __init__(self, field: str, values: List[Any]):
+        self.excluded = In(field, values)
+
+    def estimate(self, index: ColumnarIndex) -> int:
+        return len(index) - self.excluded.estimate(index)
+
+    def rows(self, index: ColumnarIndex) -> np.ndarray:
+        return np.setdiff1d(index.live_rows(), self.excluded.rows(index), assume_unique=True)
+
+    def matches(self, index: ColumnarIndex, rows: np.ndarray) -> np.ndarray:
+        return ~self.excluded.matches(index, rows)
+
+
+class Range(FilterNode):
+    """`field` is within the bounds (rows whose value is null never match)."""
+
+    def __init__(
+        self,
+        field: str,
+        low: Any = None,
+        high: Any = None,
+        include_low: bool = True,
+        include_high: bool = True
+    ):
+        self.field = field
+        self.low = low
+        self.high = high
+        self.include_low = include_low
+        self.include_high = include_high
+
+    def _postings(self, index: ColumnarIndex) -> List[np.ndarray]:
+        keys = index.sorted_keys(self.field)
+        start, end = 0, len(keys)
+        if self.low is not None:
+            start = bisect_left(keys, self.low) if self.include_low else bisect_right(keys, self.low)
+        if self.high is not None:
+            end = bisect_right(keys, self.high) if self.include_high else bisect_left(keys, self.high)
+        return [index.find_rows(self.field, key) for key in keys[start:end]]
+
+    def estimate(self, index: ColumnarIndex) -> int:
+        return sum(rows.size for rows in self._postings(index))
+
+    def rows(self, index: ColumnarIndex) -> np.ndarray:
+        return _union(self._postings(index))
+
+    def _contains(self, value: Any) -> bool:
+        if value is None:
+            return False
+        if self.low is not None and (value < self.low or (value == self.low and not self.include_low)):
+            return False
+        if self.high is not None and (value > self.high or (value == self.high and not self.include_high)):
+            return False
+        return True
+
+    def matches(self, index: ColumnarIndex, rows: np.ndarray) -> np.ndarray:
+        return np.fromiter(map(self._contains, index.field_values(self.field, rows)), dtype=bool, count=rows.size)
+
+
+class And(FilterNode):
+
+    def __init__(self, children: List[FilterNode]):
+        self.children = children
+
+    def estimate(self, index: ColumnarIndex) -> int:
+        return min(child.estimate(index) for child in self.children)
+
+    def rows(self, index: ColumnarIndex) -> np.ndarray:
+        # Start from the most selective condition, then narrow down its rows with the others
+        plan = sorted(((child.estimate(index), i, child) for i, child in enumerate(self.children)), key=lambda item: item[:2])
+        rows = plan[0][2].rows(index)
+
+        for estimate, _, child in plan[1:]:
+            if rows.size == 0:
+                break
+            if estimate > RESIDUAL_CHECK_RATIO * rows.size:
+                rows = rows[child.matches(index, rows)]
+            else:
+                rows = np.intersect1d(rows, child.rows(index), assume_unique=True)
+        return rows
+
+    def matches(self, index: ColumnarIndex, rows: np.ndarray) -> np.ndarray:
+        mask = np.ones(rows.size, dtype=bool)
+        for child in self.children:
+            mask[mask] = child.matches(index, rows[mask])
+        return mask
+
+
+class Or(FilterNode):
+
+    def __init__(self, children: List[FilterNode]):
+        self.children = children
+
+    def estimate(self, index: ColumnarIndex) -> int:
+        return min(len(index), sum(child.estimate(index) for child in self.children))
+
+    def rows(self, index: ColumnarIndex) -> np.ndarray:
+        return np.unique(np.concatenate([child.rows(index) for child in self.children]))
+
+    def matches(self, index: ColumnarIndex, rows: np.ndarray) -> np.ndarray:
+        mask = np.zeros(rows.size, dtype=bool)
+        for child in self.children:
+            mask[~mask] = child.matches(index, rows[~mask])
+        return mask
+
+
+def compile_filter(filter_dict: Optional[dict]) -> Optional[FilterNode]:
+    """
+    Compile a metadata filter into a tree of FilterNodes.
+
+    Args:
+        filter_dict (Optional[dict]): Filter (see the module docstring for the syntax).
+
+    Returns:
+        Optional[FilterNode]: The compiled filter, None if there is no filter.
+
+    Raises:
+        ValueError: If the filter uses unknown keys or operators, or malformed operands.
+    """
+    if not filter_dict:
+        return None
+    return _compile(filter_dict)
+
+
+def _compile(filter_dict: Any) -> FilterNode:
+    if not isinstance(filter_dict, dict) or not filter_dict:
+        raise ValueError(f"A filter must be a non-empty dictionary, got {filter_dict!r}")
+
+    valid_filter_keys = set(ColumnarIndex.INDEXED_FIELDS)
+    invalid_keys = {key for key in filter_dict if key not in valid_filter_keys | LOGICAL_OPERATORS}
+    if invalid_keys:
+        raise ValueError(f"Invalid filter keys: {invalid_keys}. Valid keys are: {valid_filter_keys} and the operators {LOGICAL_OPERATORS}")
+
+    conditions = []
+    for key, value in filter_dict.items():
+        if key in LOGICAL_OPERATORS:
+            if not isinstance(value, list) or not value:
+                raise ValueError(f"'{key}' expects a non-empty list of filters")
+            children = [_compile(child) for child in value]
+            conditions.append(And(children) if key == "$and" else Or(children))
+        else:
+            conditions.extend(_compile_field(key, value))
+
+    return conditions[0] if len(conditions) == 1 else And(conditions)
+
+
+def _check_values(field: str, values: List[Any]) -> List[Any]:
+    for value in values:
+        # NOTE: UUIDs are the type of the stored document ids (ChunkMetadata.document_id)
+        if not isinstance(value, (str, int, float, bool, UUID)) and value is not None:
+            raise ValueError(f"Filter values of '{field}' must be scalars, got {value!r}")
+    return values
+
+
+def _compile_field(field: str, condition: Any) -> List[FilterNode]:
+    if not isinstance(condition, dict):
+        return [In(field, _check_values(field, [condition]))]
+    if not condition:
+        raise ValueError(f"Empty condition for filter key '{field}'")
+
+    unknown = set(condition) - COMPARISON_OPERATORS - RANGE_OPERATORS
+    if unknown:
+        raise ValueError(f"Unsupported filter operators {unknown}. Supported operators are: {COMPARISON_OPERATORS | RANGE_OPERATORS}")
+
+    nodes = []
+    for operator in ("$in", "$nin"):
+        if operator in condition and not isinstance(condition[operator], list):
+            raise ValueError(f"'{operator}' expects a list of values for filter key '{field}'")
+    if "$eq" in condition:
+        nodes.append(In(field, _check_values(field, [condition["$eq"]])))
+    if "$in" in condition:
+        nodes.append(In(field, _check_values(field, condition["$in"])))
+    if "$ne" in condition:
+        nodes.append(NotIn(field, _check_values(field, [condition["$ne"]])))
+    if "$nin" in condition:
+        nodes.append(NotIn(field, _check_values(field, condition["$nin"])))
+
+    bounds = RANGE_OPERATORS & set(condition)
+    if bounds:
+        if field not in ColumnarIndex.RANGE_FIELDS:
+            raise ValueError(f"Range operators are only supported on {set(ColumnarIndex.RANGE_FIELDS)}, not on '{field}'")
+        if not all(isinstance(condition[operator], str) for operator in bounds):
+            raise ValueError(f"Range bounds of '{field}' must be ISO 8601 date strings")
+        if {"$gt", "$gte"} <= bounds or {"$lt", "$lte"} <= bounds:
+            raise ValueError(f"Filter key '{field}' can't have two lower or two upper bounds")
+        nodes.append(Range(
+            field,
+            low=condition.get("$gte", condition.get("$gt")),
+            high=condition.get("$lte", condition.get("$lt")),
+            include_low="$gt" not in condition,
+            include_high="$lt" not in condition,
+        ))
+
+    return nodes
@@ -0,0 +1,286 @@
+import sys
+
+import numpy as np
+
+# src
+sys.path.append("./")
+from src.jarvis.domain.search.algorithm.ivf import MiniBatchKMeans, nearest_centroids
+
+SCAN_BLOCK_SIZE = 65536     # Rows decoded/scored at once, bounds the temporary memory of a scan
+
+
+class Quantizer:
+    """
+    Base class of the vector quantizers: vectors are encoded as compact uint8 codes and
+    scored with asymmetric distance computation (the query stays in full precision).
+
+    Attributes:
+        training_size (int): Number of vectors the index collects (in full precision) before training the quantizer.
+        rerank (bool): Keep the full-precision vectors after training, to re-rank the best candidates exactly.
+        rerank_multiplier (int): Number of candidates re-ranked per requested result.
+    """
+    type: str = ""
+
+    def __init__(self, dimension: int, training_size: int, rerank: bool = False, rerank_multiplier: int = 4):
+        if training_size < 1:
+            raise ValueError(f"Quantization 'training_size' must be at least 1, got {training_size}")
+        if rerank_multiplier < 1:
+            raise ValueError(f"Quantization 'rerank_multiplier' must be at least 1, got {rerank_multiplier}")
+
+        self.dimension = dimension
+        self.training_size = training_size
+        self.rerank = rerank
+        self.rerank_multiplier = rerank_multiplier
+        self.is_trained = False
+
+    @property
+    def code_size(self) -> int:
+        """Bytes per encoded vector."""
+        raise NotImplementedError
+
+    def train(self, vectors: np.ndarray) -> None:
+        raise NotImplementedError
+
+    def encode(self, vectors: np.ndarray) -> np.ndarray:
+        raise NotImplementedError
+
+    def decode(self, codes: np.ndarray) -> np.ndarray:
+        raise NotImplementedError
+
+    def _dot_products(self, query: np.ndarray, codes: np.ndarray) -> np.ndarray:
+        """Approximate dot products between the query and a block of codes."""
+        raise NotImplementedError
+
+    def _squared_distances(self, query: np.ndarray, codes: np.ndarray, norms: np.ndarray) -> np.ndarray:
+        """Approximate squared euclidean distances, from the dot products and the exact row norms."""
+        squared = norms * norms - 2.0 * self._dot_products(query, codes) + float(query @ query)
+        return np.maximum(squared, 0.0)
+
+    def score(self, query: np.ndarray, codes: np.ndarray, norms: np.ndarray, distance_metric: str) -> np.ndarray:
+        """
+        Approximate distance/similarity between a query vector and every encoded row.
+
+        Args:
+            query (np.ndarray): Query vector.
+            codes (np.ndarray): (n, code_size) codes of the rows.
+            norms (np.ndarray): Exact L2 norms of the rows (computed before encoding).
+            distance_metric (str): "euclidean" or "cosine".
+
+        Returns:
+            np.ndarray: (n,) array of scores.
+        """
+        query = np.asarray(query, dtype=np.float32)
+        if query.shape[0] != self.dimension:
+            raise ValueError(f"Vector length mismatch: len(query)={query.shape[0]} != matrix dimension={self.dimension}")
+
+        scores = np.empty(codes.shape[0], dtype=np.float32)
+        query_norm = float(np.sqrt(query @ query))
+
+        for start in range(0, codes.shape[0], SCAN_BLOCK_SIZE):
+            block = slice(start, start + SCAN_BLOCK_SIZE)
+            if distance_metric == 'euclidean':
+                scores[block] = np.sqrt(self._squared_distances(query, codes[block], norms[block]))
+            elif distance_metric == 'cosine':
+                denominator = norms[block] * query_norm
+                scores[block] = self._dot_products(query, codes[block]) / np.maximum(denominator, 1e-10)
+            else:
+                raise ValueError(f"Unsupported distance metric: {distance_metric}")
+
+        return scores
+
+
+class ScalarQuantizer(Quantizer):
+    """
+    int8 scalar quantization: every dimension is mapped to 256 levels between the minimum and
+    maximum seen in the training vectors (values out of range are clipped). 4x smaller than float32.
+    """
+    type = "int8"
+
+    def __init__(self, dimension: int, training_size: int, rerank: bool = False, rerank_multiplier: int = 4):
+        super().__init__(dimension, training_size, rerank, rerank_multiplier)
+        self.low = np.zeros(dimension, dtype=np.float32)
+        self.step = np.ones(dimension, dtype=np.float32)
+
+    @property
+    def code_size(self) -> int:
+        return self.dimension
+
+    def train(self, vectors: np.ndarray) -> None:
+        self.low = vectors.min(axis=0).astype(np.float32)
+        self.step = np.maximum((vectors.max(axis=0) - self.low) / 255.0, 1e-12).astype(np.float32)
+        self.is_trained = True
+
+    def encode(self, vectors: np.ndarray) -> np.ndarray:
+        return np.clip(np.rint((vectors - self.low) / self.step), 0, 255).astype(np.uint8)
+
+    def decode(self, codes: np.ndarray) -> np.ndarray:
+        return self.low + codes.astype(np.float32) * self.step
+
+    def _dot_products(self, query: np.ndarray, codes: np.ndarray) -> np.ndarray:
+        # q·x̂ = q·low + (q * step)·code
+        return codes.astype(np.float32) @ (query * self.step) + float(query @ self.low)
+
+
+class ProductQuantizer(Quantizer):
+    """
+    Product quantization: vectors are split into `m` sub-vectors and each one is replaced by the
+    id of its nearest centroid among 256 (trained with k-means per subspace), i.e. `m` bytes per
+    vector (32x smaller than float32 with m = d / 8). Scans use per-query lookup tables of
+    sub-vector dot products/distances, so scoring a row is `m` table lookups.
+    """
+    type = "pq"
+    N_CENTROIDS = 256
+
+    def __init__(self, dimension: int, m: int, training_size: int, rerank: bool = False, rerank_multiplier: int = 4):
+        if m < 1 or dimension % m != 0:
+            raise ValueError(f"PQ parameter 'm' must divide the vector dimension {dimension}, got {m}")
+        if training_size < self.N_CENTROIDS:
+            raise ValueError(f"PQ needs a 'training_size' of at least {self.N_CENTROIDS}, got {training_size}")
+
+        super().__init__(dimension, training_size, rerank, rerank_multiplier)
+        self.m = m
+        self.sub_dimension = dimension // m
+        self.codebooks = np.zeros((m, self.N_CENTROIDS, self.sub_dimension), dtype=np.float32)
+        self._offsets = np.arange(m) * self.N_CENTROIDS
+
+    @property
+    def code_size(self) -> int:
+        return self.m
+
+    def _split(self, vectors: np.ndarray) -> np.ndarray:
+        """(n, d) -> (n, m, d / m)"""
+        return vectors.reshape(vectors.shape[0], self.m, self.sub_dimension)
+
+    def train(self, vectors: np.ndarray) -> None:
+        sub_vectors = self._split(np.asarray(vectors, dtype=np.float32))
+        for j in range(self.m):
+            kmeans = MiniBatchKMeans(n_clusters=self.N_CENTROIDS, batch_size=1024, max_iter=50)
+            self.codebooks[j] = kmeans.fit(np.ascontiguousarray(sub_vectors[:, j]))
+        self.is_trained = True
+
+    def encode(self, vectors: np.ndarray) -> np.ndarray:
+        sub_vectors = self._split(np.asarray(vectors, dtype=np.float32))
+        codes = np.empty((vectors.shape[0], self.m), dtype=np.uint8)
+        for j in range(self.m):
+            codes[:, j] = nearest_centroids(np.ascontiguousarray(sub_vectors[:, j]), self.codebooks[j])
+        return codes
+
+    def decode(self, codes: np.ndarray) -> np.ndarray:
+        return self.codebooks[np.arange(self.m), codes].reshape(codes.shape[0], self.dimension)
+
+    def _lookup(self, table: np.ndarray, codes: np.ndarray) -> np.ndarray:
+        """Sum over the subspaces of table[j, code_j] for every row."""
+        return np.take(table.ravel(), codes.astype(np.intp) + self._offsets).sum(axis=1)
+
+    def _dot_products(self, query: np.ndarray, codes: np.ndarray) -> np.ndarray:
+        table = np.einsum("jkd,jd->jk", self.codebooks, self._split(query[None, :])[0])
+        return self._lookup(table, codes)
+
+    def _squared_distances(self, query: np.ndarray, codes: np.ndarray, norms: np.ndarray) -> np.ndarray:
+        # Exact per-subspace distances to the centroids are more accurate than the norm expansion
+        diff = self.codebooks - self._split(query[None, :])[0][:, None, :]
+        table = np.einsum("jkd,jkd->jk", diff, diff)
+        return self._lookup(table, codes)
+
+
+class BinaryQuantizer(Quantizer):
+    """
+    Binary quantization: every dimension is reduced to its sign bit, packed 8 per byte, i.e. d / 8
+    bytes per vector (32x smaller than float32, 128 bytes at 1024-d). There is nothing to learn, so
+    the rows are encoded from the first one indexed (`training_size` defaults to 1).
+
+    Scans binarize the query too and count the bits that differ from every code (XOR and popcount,
+    64 bits at a time). The Hamming distance h estimates the angle between the vectors (θ ≈ π h / d),
+    which is too coarse to rank the final results: it is meant to shortlist the candidates that are
+    re-ranked with the full-precision vectors, so `rerank` defaults to True (with a larger shortlist).
+    """
+    type = "binary"
+    DEFAULT_RERANK_MULTIPLIER = 10
+
+    def __init__(self, dimension: int, training_size: int = 1, rerank: bool = True, rerank_multiplier: int = DEFAULT_RERANK_MULTIPLIER):
+        super().__init__(dimension, training_size, rerank, rerank_multiplier)
+
+    @property
+    def code_size(self) -> int:
+        return (self.dimension + 7) // 8
+
+    def train(self, vectors: np.ndarray) -> None:
+        self.is_trained = True
+
+    def encode(self, vectors: np.ndarray) -> np.ndarray:
+        return np.packbits(np.asarray(vectors) > 0, axis=1)
+
+    def decode(self, codes: np.ndarray) -> np.ndarray:
+        # Unit vectors with the signs of the codes
+        bits = np.unpackbits(codes, axis=1, count=self.dimension).astype(np.float32)
+        return (2.0 * bits - 1.0) / np.float32(np.sqrt(self.dimension))
+
+    def hamming_distances(self, query_code: np.ndarray, codes: np.ndarray) -> np.ndarray:
+        """Number of differing bits between a code and every row of a block of codes."""
+        if codes.shape[1] % 8 == 0:
+            # NOTE: Popcount of 64-bit words, 8x fewer operations than per byte
+            codes = np.ascontiguousarray(codes).view(np.uint64)
+            query_code = query_code.view(np.uint64)
+        return np.bitwise_count(codes ^ query_code).sum(axis=1, dtype=np.int32)
+
+    def score(self, query: np.ndarray, codes: np.ndarray, norms: np.ndarray, distance_metric: str) -> np.ndarray:
+        """
+        Approximate distance/similarity between a query vector and every encoded row, from the
+        angle estimated by their Hamming distance (and the exact norms, for euclidean).
+        """
+        query = np.asarray(query, dtype=np.float32)
+        if query.shape[0] != self.dimension:
+            raise ValueError(f"Vector length mismatch: len(query)={query.shape[0]} != matrix dimension={self.dimension}")
+        if distance_metric not in ('euclidean', 'cosine'):
+            raise ValueError(f"Unsupported distance metric: {distance_metric}")
+
+        query_code = self.encode(query[None, :])[0]
+        query_norm = float(np.sqrt(query @ query))
+        scores = np.empty(codes.shape[0], dtype=np.float32)
+
+        for start in range(0, codes.shape[0], SCAN_BLOCK_SIZE):
+            block = slice(start, start + SCAN_BLOCK_SIZE)
+            cosines = np.cos(self.hamming_distances(query_code, codes[block]) * np.float32(np.pi / self.dimension))
+            if distance_metric == 'euclidean':
+                squared = norms[block] * norms[block] - 2.0 * query_norm * norms[block] * cosines + query_norm * query_norm
+                scores[block] = np.sqrt(np.maximum(squared, 0.0))
+            else:
+                scores[block] = cosines
+
+        return scores
+
+
+def build_quantizer(config: dict, dimension: int, training_size: int, rerank_multiplier: int) -> Quantizer:
+    """
+    Build the quantizer described by the 'quantization' of a knn_vector mapping.
+
+    Args:
+        config (dict): {"type": "int8" | "pq" | "binary", "m": int (pq only, defaults to dimension / 8), "training_size": int, "rerank": bool, "rerank_multiplier": int}
+            (binary defaults to a training size of 1 and to re-ranking 10 candidates per result, see `BinaryQuantizer`).
+        dimension (int): Vector dimension of the index.
+        training_size (int): Default training size.
+        rerank_multiplier (int): Default re-rank multiplier.
+
+    Returns:
+        Quantizer: The (untrained) quantizer.
+    """
+    kwargs = dict(
+        training_size=config.get("training_size", training_size),
+        rerank=bool(config.get("rerank", False)),
+        rerank_multiplier=config.get("rerank_multiplier", rerank_multiplier),
+    )
+
+    quantization_type = config.get("type")
+    if quantization_type == ScalarQuantizer.type:
+        return ScalarQuantizer(dimension, **kwargs)
+    elif quantization_type == ProductQuantizer.type:
+        return ProductQuantizer(dimension, m=config.get("m", max(dimension // 8, 1)), **kwargs)
+    elif quantization_type == BinaryQuantizer.type:
+        kwargs.update(
+            training_size=config.get("training_size", 1),
+            rerank=bool(config.get("rerank", True)),
+            rerank_multiplier=config.get("rerank_multiplier", BinaryQuantizer.DEFAULT_RERANK_MULTIPLIER),
+        )
+        return BinaryQuantizer(dimension, **kwargs)
+    else:
+        raise ValueError(f"Unsupported quantization type '{quantization_type}'. Supported types are: {{'int8', 'pq', 'binary'}}")
@@ -0,0 +1,71 @@
+import json
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional
+
+
+class QueryResultCache:
+    """
+    In-memory LRU cache of search results.
+
+    Keys include the version of the index (see `VectorStore.index_version`), which changes on every
+    mutation of the index: the entries of the previous versions are never hit again and age out of
+    the LRU, so there is no invalidation to run on the write path.
+
+    Notes:
+        - Thread-safe (a single lock around the OrderedDict).
+        - `hits` and `misses` count the lookups since the cache was created.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(index_name: str, index_version: int, query_text: str, filter: Optional[dict], **params: Any) -> Hashable:
+        """
+        Build the key of a search.
+
+        Args:
+            index_name (str): Name of the index.
+            index_version (int): Current version of the index.
+            query_text (str): Normalized query text.
+            filter (Optional[dict]): Metadata filter (serialized canonically, so the order of its keys doesn't matter).
+            **params: The other search parameters (top_k, algorithm, distance, ...).
+
+        Returns:
+            Hashable: The key.
+        """
+        filter_key = json.dumps(filter, sort_keys=True, default=str) if filter else None
+        return (index_name, index_version, query_text, filter_key, tuple(sorted(params.items())))
+
+    def get(self, key: Hashable) -> Optional[List[Dict[str, Any]]]:
+        """Results of a search, None if they are not cached."""
+        with self._lock:
+            results = self._entries.get(key)
+            if results is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        # NOTE: A new list per hit, the result dicts themselves are shared and must not be modified
+        return list(results)
+
+    def put(self, key: Hashable, results: List[Dict[str, Any]]) -> None:
+        """Store the results of a search, evicting the least recently used entry if the cache is full."""
+        with self._lock:
+            self._entries[key] = tuple(results)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "entries": len(self._entries)}
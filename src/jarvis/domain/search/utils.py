@@ -1,3 +1,6 @@
+from typing import Optional
+
+import numpy as np
 
 
 def euclidean_distance(a: list[float], b: list[float]) -> float:
@@ -20,4 +23,118 @@ def cosine_similarity(a: list[float], b: list[float]) -> float:
     if denominator < 1e-10: # Fixed SonarQube warning: "Do not perform equality checks with floating point values."
         return 0.0
 
-    return dot_product / denominator
\ No newline at end of file
+    return dot_product / denominator
+
+
+def euclidean_distances(query: np.ndarray, matrix: np.ndarray, squared_norms: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Calculate the Euclidean distance between a query vector and every row of a matrix.
+
+    Uses the expansion ||a - b||² = ||a||² - 2a·b + ||b||², so the whole batch costs a single
+    matrix-vector product. `squared_norms` are the precomputed ||b||² of the matrix rows.
+    With a (q, d) matrix of queries, returns the (q, n) distances of a single matrix-matrix product.
+    """
+    query = np.asarray(query, dtype=np.float32)
+    if squared_norms is None:
+        squared_norms = np.einsum("ij,ij->i", matrix, matrix)
+
+    squared = squared_norms - 2.0 * _dot_products(query, matrix) + np.einsum("...i,...i->...", query, query)[..., None]
+    np.maximum(squared, 0.0, out=squared)   # Rounding errors can make (almost) identical vectors slightly negative
+
+    return np.sqrt(squared, out=squared)
+
+def cosine_similarities(query: np.ndarray, matrix: np.ndarray, norms: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Calculate the cosine similarity between a query vector and every row of a matrix.
+
+    `norms` are the precomputed L2 norms of the matrix rows. Rows (or queries) with a zero
+    norm get a similarity of 0.0, as in `cosine_similarity`. With a (q, d) matrix of queries,
+    returns the (q, n) similarities.
+    """
+    query = np.asarray(query, dtype=np.float32)
+    if norms is None:
+        norms = np.sqrt(np.einsum("ij,ij->i", matrix, matrix))
+
+    denominator = norms * np.sqrt(np.einsum("...i,...i->...", query, query))[..., None]
+    dot_products = _dot_products(query, matrix)
+
+    similarities = np.zeros_like(dot_products)
+    np.divide(dot_products, denominator, out=similarities, where=denominator >= 1e-10)
+
+    return similarities
+
+def _dot_products(query: np.ndarray, matrix: np.ndarray) -> np.ndarray:
+    """(n,) dot products of a query with the rows of a matrix, or (q, n) for a matrix of queries."""
+    return matrix @ query if query.ndim == 1 else query @ matrix.T
+
+def top_k_indices(scores: np.ndarray, k: int, largest: bool) -> np.ndarray:
+    """
+    Return the positions of the k best scores, best first, without sorting the whole array.
+
+    The k-th best value is found with a partial partition (O(n)) and only the winners are sorted.
+    Ties are broken by position (lower first), so the result is stable and deterministic even when
+    several candidates share the k-th score.
+
+    Args:
+        scores (np.ndarray): (n,) array of scores.
+        k (int): Number of positions to return.
+        largest (bool): True if higher scores are better (similarities), False for distances.
+
+    Returns:
+        np.ndarray: Positions of the k best scores, ordered from best to worst.
+    """
+    keys = -scores if largest else scores   # Lower key is always better
+    n = keys.shape[0]
+
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+
+    if k >= n:
+        candidates = np.arange(n)
+    else:
+        threshold = np.partition(keys, k - 1)[k - 1]
+        better = np.flatnonzero(keys < threshold)
+        ties = np.flatnonzero(keys == threshold)[:k - better.size]
+        candidates = np.concatenate([better, ties])
+
+    # Sort the winners by key and then by position
+    order = np.lexsort((candidates, keys[candidates]))
+
+    return candidates[order]
+
+def top_k_indices_batch(scores: np.ndarray, k: int, largest: bool) -> np.ndarray:
+    """
+    Row-wise `top_k_indices` of a (q, n) matrix of scores (one row per query), with the same tie-breaking.
+
+    Args:
+        scores (np.ndarray): (q, n) array of scores.
+        k (int): Number of positions to return per row.
+        largest (bool): True if higher scores are better (similarities), False for distances.
+
+    Returns:
+        np.ndarray: (q, min(k, n)) positions of the best scores of every row, ordered from best to worst.
+    """
+    keys = -scores if largest else scores   # Lower key is always better
+    n_rows, n = keys.shape
+    k = min(max(k, 0), n)
+
+    if k == 0:
+        return np.empty((n_rows, 0), dtype=np.int64)
+
+    if k == n:
+        candidates = np.broadcast_to(np.arange(n), keys.shape)
+    else:
+        candidates = np.argpartition(keys, k - 1, axis=1)[:, :k]
+
+        # The partition picks arbitrary positions among the ties of the k-th score: redo those rows
+        threshold = np.take_along_axis(keys, candidates, axis=1).max(axis=1, keepdims=True)
+        ambiguous = np.flatnonzero((keys <= threshold).sum(axis=1) > k)
+        if ambiguous.size:
+            candidates = candidates.copy()
+            for row in ambiguous:
+                candidates[row] = top_k_indices(scores[row], k, largest)
+
+    # Sort the winners of every row by key and then by position
+    order = np.lexsort((candidates, np.take_along_axis(keys, candidates, axis=1)), axis=1)
+
+    return np.take_along_axis(candidates, order, axis=1)
@@ -0,0 +1,544 @@
+import sys
+import copy
+from typing import Any, Dict, List, Optional, Tuple
+from uuid import UUID
+
+import numpy as np
+
+# src
+sys.path.append("./")
+from src.jarvis.domain.search.algorithm.hierarchical_knn import hierarchical_weights, weighted_row_norms
+from src.jarvis.domain.search.algorithm.hnsw import HNSW
+from src.jarvis.domain.search.algorithm.ivf import IVF
+from src.jarvis.domain.search.quantization import Quantizer, SCAN_BLOCK_SIZE
+
+
+def document_key(document_id: Any) -> bytes:
+    """Return the fixed-width (16 bytes) key used to store a document ID in the columnar arrays."""
+    if not isinstance(document_id, UUID):
+        document_id = UUID(str(document_id))
+    return document_id.bytes
+
+
+def stored_document_key(value: bytes) -> bytes:
+    """Key of a value read back from the 'S16' column (numpy strips the trailing NUL bytes)."""
+    return value.ljust(16, b"\x00")
+
+
+def _group_rows(values: List[Any], rows: np.ndarray) -> Dict[Any, np.ndarray]:
+    """Group (sorted) row positions by value, returning {value: sorted rows with that value}."""
+    # NOTE: The rows of an append or a delete usually belong to a single document
+    if values.count(values[0]) == len(values):
+        return {values[0]: rows}
+
+    groups: Dict[Any, List[int]] = {}
+    for value, row in zip(values, rows.tolist()):
+        groups.setdefault(value, []).append(row)
+    return {value: np.asarray(group, dtype=np.int64) for value, group in groups.items()}
+
+
+def _grow(array: Optional[np.ndarray], capacity: int, size: int) -> Optional[np.ndarray]:
+    """Copy the first `size` rows of a column into a new array with room for `capacity` rows."""
+    if array is None:
+        return None
+    grown = np.empty((capacity,) + array.shape[1:], dtype=array.dtype)
+    grown[:size] = array[:size]
+    return grown
+
+
+def _take(array: Optional[np.ndarray], rows: np.ndarray, capacity: int) -> Optional[np.ndarray]:
+    """Copy some rows of a column into a new array with room for `capacity` rows."""
+    if array is None:
+        return None
+    taken = np.empty((capacity,) + array.shape[1:], dtype=array.dtype)
+    np.take(array, rows, axis=0, out=taken[:rows.size])
+    return taken
+
+
+class ColumnarIndex:
+    """
+    Columnar storage backend of a single VectorStore index.
+
+    Vectors are kept in one contiguous float32 matrix (4 bytes per dimension instead of a
+    Python float object per dimension), with their L2 norms, chunk ids and document ids stored
+    in parallel arrays aligned with the matrix rows. Texts and metadata stay as plain Python lists since
+    they are only read back when a search result is materialized.
+
+    Notes:
+        - The arrays are over-allocated and the capacity is doubled every time it runs out,
+        so appending chunks is amortized O(1) per row. Only the first `size` rows are valid.
+        - Document IDs are stored as their 16 raw UUID bytes.
+        - Posting lists (`value -> sorted live rows`) are maintained on append/delete/compaction for
+        the `INDEXED_FIELDS`, so finding the rows of a document (to update or delete it) or the rows
+        matching a metadata filter costs the number of matching rows instead of a scan of the index.
+        - Norms are computed once at insertion time, so batch scoring (cosine and the euclidean
+        expansion) never has to recompute them per query. The norms weighted by the hierarchical
+        weights of a decay factor, and the norms of the prefixes of a given length (matryoshka searches),
+        are computed on their first search, then maintained like the plain norms (for the last
+        `MAX_DERIVED_NORMS` decay factors / prefix lengths).
+        - Deleted rows are only tombstoned (`alive` mask). They are physically removed by `compact`,
+        which runs once the fraction of tombstones exceeds `compaction_threshold`. When the index
+        has an HNSW graph, compaction is also when the graph is repaired around the deleted nodes.
+        - An optional HNSW graph and a (trained) IVF are kept in sync with the rows: they are renumbered
+        on compaction, and new rows are added to the IVF on append. The HNSW graph only holds the
+        first `hnsw_size` rows: inserting rows is too slow for the write lock, so the later rows are
+        linked into a copy of the graph without it (see `VectorStore.link_hnsw`) and the copy is swapped
+        in (`swap_hnsw`). `layout_version` changes every time rows are moved, so work done on a copy
+        of the rows can detect it is stale.
+        - With a quantizer, the index stores full-precision rows until a trained copy of the quantizer
+        is swapped in with the codes of the rows (`swap_quantizer`, trained without the lock by
+        `VectorStore.train_quantizer` once the index holds `training_size` vectors); it then keeps a uint8
+        code per row. The float32 matrix is dropped at that point unless the quantizer re-ranks with
+        full precision (`rerank`).
+        - Stored rows are never rewritten in place (appends write past `size` or into grown arrays,
+        compaction and quantizer training build new arrays), and a published quantizer is never modified,
+        so a `snapshot` can be scanned without any lock while the index keeps changing.
+    """
+    INITIAL_CAPACITY = 64
+    INDEXED_FIELDS = ("document_id", "title", "author", "created_date")
+    RANGE_FIELDS = ("created_date",)    # Indexed fields whose values are also kept sorted, for range filters
+    MAX_DERIVED_NORMS = 4   # Decay factors / prefix lengths whose norms are maintained
+
+    def __init__(
+        self,
+        dimension: int,
+        mappings: Dict[str, Any],
+        capacity: int = INITIAL_CAPACITY,
+        compaction_threshold: float = 0.2,
+        hnsw: Optional[HNSW] = None,
+        quantizer: Optional[Quantizer] = None
+    ):
+        self.dimension = dimension
+        self.mappings = mappings
+        self.compaction_threshold = compaction_threshold
+        self.hnsw = hnsw
+        self.hnsw_size = 0  # Rows [0, hnsw_size) are in the HNSW graph
+        self.quantizer = quantizer
+        self.ivf: Optional[IVF] = None
+        self.layout_version = 0
+        self.texts: List[str] = []
+        self.metadata: List[dict] = []
+
+        capacity = max(int(capacity), 1)
+        self._vectors = np.empty((capacity, dimension), dtype=np.float32)
+        self._codes: Optional[np.ndarray] = None
+        self._norms = np.empty(capacity, dtype=np.float32)
+        self._derived_norms: Dict[Tuple[str, Any], np.ndarray] = {}    # ("hierarchical", decay_factor) / ("prefix", length) -> norms
+        self._chunk_ids = np.empty(capacity, dtype=np.int64)
+        self._document_ids = np.empty(capacity, dtype="S16")
+        self._alive = np.empty(capacity, dtype=bool)
+        self._size = 0
+        self._n_deleted = 0
+        self._postings: Dict[str, Dict[Any, np.ndarray]] = {field: {} for field in self.INDEXED_FIELDS}
+        self._sorted_keys: Dict[str, Optional[List[Any]]] = {field: None for field in self.RANGE_FIELDS}
+
+    @classmethod
+    def from_columns(
+        cls,
+        dimension: int,
+        mappings: Dict[str, Any],
+        vectors: Optional[np.ndarray],
+        codes: Optional[np.ndarray],
+        norms: np.ndarray,
+        chunk_ids: np.ndarray,
+        document_ids: np.ndarray,
+        alive: np.ndarray,
+        texts: List[str],
+        metadata: List[dict],
+        compaction_threshold: float = 0.2,
+        hnsw: Optional[HNSW] = None,
+        quantizer: Optional[Quantizer] = None,
+        ivf: Optional[IVF] = None,
+        hnsw_size: Optional[int] = None
+    ) -> "ColumnarIndex":
+        """
+        Rebuild an index around existing columns (e.g. memory-mapped from a snapshot) without copying them.
+
+        The columns are used as the initial storage, with a capacity equal to their number of rows,
+        so the first append moves them to regular (growable) arrays. `hnsw_size` defaults to all the rows.
+        """
+        index = cls(dimension, mappings, compaction_threshold=compaction_threshold, hnsw=hnsw, quantizer=quantizer)
+        index.ivf = ivf
+        if norms.shape[0] == 0:
+            return index
+
+        index._vectors = vectors
+        index._codes = codes
+        index._norms = norms
+        index._chunk_ids = chunk_ids
+        index._document_ids = document_ids
+        index._alive = alive
+        index.texts = texts
+        index.metadata = metadata
+        index._size = norms.shape[0]
+        index.hnsw_size = index._size if hnsw_size is None else hnsw_size
+        index._n_deleted = int(index._size - np.count_nonzero(alive))
+        index._add_postings(index.live_rows())
+        return index
+
+    def __len__(self) -> int:
+        """Number of live rows."""
+        return self._size - self._n_deleted
+
+    @property
+    def size(self) -> int:
+        """Number of stored rows, tombstones included (i.e. the number of rows of `vectors`)."""
+        return self._size
+
+    @property
+    def capacity(self) -> int:
+        return self._norms.shape[0]
+
+    @property
+    def has_vectors(self) -> bool:
+        """False once a quantized index has dropped its full-precision vectors."""
+        return self._vectors is not None
+
+    @property
+    def is_quantized(self) -> bool:
+        return self._codes is not None
+
+    @property
+    def vectors(self) -> np.ndarray:
+        """(size, dimension) float32 view over the stored vectors."""
+        if self._vectors is None:
+            raise ValueError("The index only keeps quantized codes, enable the quantization 'rerank' to keep the full-precision vectors")
+        return self._vectors[:self._size]
+
+    @property
+    def codes(self) -> Optional[np.ndarray]:
+        """(size, code_size) uint8 view over the quantized codes (None if the index is not quantized)."""
+        return None if self._codes is None else self._codes[:self._size]
+
+    @property
+    def norms(self) -> np.ndarray:
+        """L2 norm of each stored vector."""
+        return self._norms[:self._size]
+
+    def weighted_norms(self, decay_factor: float) -> np.ndarray:
+        """
+        L2 norm of each stored vector weighted by the hierarchical weights of `decay_factor` (see HierarchicalKNN).
+
+        NOTE: The first call for a decay factor computes the norms of all the rows and keeps them up to date
+        afterwards, so it must hold the index lock (at least shared) like any other change to the index.
+        """
+        return self._maintained_norms(("hierarchical", decay_factor))
+
+    def prefix_norms(self, length: int) -> np.ndarray:
+        """
+        L2 norm of the first `length` dimensions of each stored vector (see `weighted_norms` for the locking).
+        """
+        return self._maintained_norms(("prefix", length))
+
+    def _row_norms(self, key: Tuple[str, Any], vectors: np.ndarray) -> np.ndarray:
+        """Derived norms (see `_derived_norms`) of some float32 vectors."""
+        kind, value = key
+        if kind == "prefix":
+            return np.linalg.norm(vectors[:, :value], axis=1)
+        return weighted_row_norms(vectors, hierarchical_weights(self.dimension, value, power=2))
+
+    def _maintained_norms(self, key: Tuple[str, Any]) -> np.ndarray:
+        """Derived norms of all the rows, computed on the first call for a key and maintained afterwards."""
+        norms = self._derived_norms.get(key)
+        if norms is None:
+            norms = np.empty(self.capacity, dtype=np.float32)
+            for start in range(0, self._size, SCAN_BLOCK_SIZE):
+                end = min(start + SCAN_BLOCK_SIZE, self._size)
+                norms[start:end] = self._row_norms(key, self.get_vectors(slice(start, end)))
+
+            if len(self._derived_norms) >= self.MAX_DERIVED_NORMS:
+                self._derived_norms.pop(list(self._derived_norms)[0], None)
+            self._derived_norms[key] = norms
+        return norms[:self._size]
+
+    @property
+    def alive(self) -> np.ndarray:
+        """Boolean mask of the rows that have not been deleted."""
+        return self._alive[:self._size]
+
+    @property
+    def chunk_ids(self) -> np.ndarray:
+        return self._chunk_ids[:self._size]
+
+    @property
+    def document_ids(self) -> np.ndarray:
+        return self._document_ids[:self._size]
+
+    def _reserve(self, n_rows: int) -> None:
+        """Make sure there is room for `n_rows` rows, doubling the capacity when needed."""
+        if n_rows <= self.capacity:
+            return
+
+        new_capacity = self.capacity
+        while new_capacity < n_rows:
+            new_capacity *= 2
+
+        self._vectors = _grow(self._vectors, new_capacity, self._size)
+        self._codes = _grow(self._codes, new_capacity, self._size)
+        self._norms = _grow(self._norms, new_capacity, self._size)
+        self._derived_norms = {key: _grow(norms, new_capacity, self._size) for key, norms in self._derived_norms.items()}
+        self._chunk_ids = _grow(self._chunk_ids, new_capacity, self._size)
+        self._document_ids = _grow(self._document_ids, new_capacity, self._size)
+        self._alive = _grow(self._alive, new_capacity, self._size)
+
+    def append(
+        self,
+        vectors: np.ndarray,
+        chunk_ids: List[int],
+        document_ids: List[Any],
+        texts: List[str],
+        metadata: List[dict]
+    ) -> None:
+        """Append a batch of rows to the index.
+
+        Args:
+            vectors (np.ndarray): (n, dimension) matrix with the vectors of the new rows.
+            chunk_ids (List[int]): Chunk id of each row.
+            document_ids (List[Any]): Document id (UUID) of each row.
+            texts (List[str]): Text of each row.
+            metadata (List[dict]): Metadata of each row.
+        """
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(-1, self.dimension)
+        n_new = vectors.shape[0]
+        if not (n_new == len(chunk_ids) == len(document_ids) == len(texts) == len(metadata)):
+            raise ValueError("All the columns of the appended rows must have the same length")
+        if n_new == 0:
+            return
+
+        self._reserve(self._size + n_new)
+        start, end = self._size, self._size + n_new
+        if self._vectors is not None:
+            self._vectors[start:end] = vectors
+        if self._codes is not None:
+            self._codes[start:end] = self.quantizer.encode(vectors)
+        self._norms[start:end] = np.linalg.norm(vectors, axis=1)
+        for key, norms in self._derived_norms.items():
+            norms[start:end] = self._row_norms(key, vectors)
+        self._chunk_ids[start:end] = chunk_ids
+        self._document_ids[start:end] = [document_key(doc_id) for doc_id in document_ids]
+        self._alive[start:end] = True
+        self.texts.extend(texts)
+        self.metadata.extend(metadata)
+        self._size = end
+
+        self._add_postings(np.arange(start, end))
+
+        if self.ivf is not None:
+            self.ivf.add(vectors)
+
+    def swap_hnsw(self, hnsw: HNSW, size: int) -> None:
+        """
+        Replace the HNSW graph by a copy of it to which the rows [hnsw_size, size) were added.
+
+        The rows deleted since the copy was taken are tombstoned in it. The index must not have been
+        compacted meanwhile (same `layout_version`).
+        """
+        hnsw.mark_deleted(np.flatnonzero(~self._alive[:size]).tolist())
+        self.hnsw, self.hnsw_size = hnsw, size
+
+    def swap_quantizer(self, quantizer: Quantizer, codes: np.ndarray) -> None:
+        """
+        Replace the untrained quantizer by a trained copy of it, with the codes of the first rows.
+
+        The rows appended after `codes` were computed are encoded here. The index must not have been
+        compacted meanwhile (same `layout_version`). Unless the quantizer re-ranks with full precision,
+        the float32 vectors are dropped.
+
+        Args:
+            quantizer (Quantizer): The trained quantizer.
+            codes (np.ndarray): (n, code_size) codes of the rows [0, n).
+        """
+        n_encoded = codes.shape[0]
+        self._codes = np.empty((self.capacity, quantizer.code_size), dtype=np.uint8)
+        self._codes[:n_encoded] = codes
+        self._codes[n_encoded:self._size] = quantizer.encode(self._vectors[n_encoded:self._size])
+        self.quantizer = quantizer
+
+        if not quantizer.rerank:
+            self._vectors = None
+
+    def get_vectors(self, rows: Any, prefix: Optional[int] = None) -> np.ndarray:
+        """
+        Float32 vectors of some rows (positions or slice), decoded from the codes if the index has no full-precision vectors.
+
+        With `prefix`, only the first `prefix` dimensions of the vectors (a strided view for a slice of
+        full-precision rows, so only those dimensions are read by a scan).
+        """
+        columns = slice(None) if prefix is None else slice(0, prefix)
+        if self._vectors is not None:
+            return self._vectors[:self._size][rows, columns]
+        return self.quantizer.decode(self._codes[:self._size][rows])[:, columns]
+
+    def vector_blocks(self, start: int = 0, end: Optional[int] = None):
+        """Yield the float32 vectors of the rows [start, end) in blocks of bounded size."""
+        end = self._size if end is None else end
+        for block_start in range(start, end, SCAN_BLOCK_SIZE):
+            yield self.get_vectors(slice(block_start, min(block_start + SCAN_BLOCK_SIZE, end)))
+
+    def field_values(self, field: str, rows: np.ndarray) -> List[Any]:
+        """Posting list keys of some rows for an indexed field (document ids are their 16 UUID bytes)."""
+        if field == "document_id":
+            return [stored_document_key(key) for key in self._document_ids[rows].tolist()]
+        return [self.metadata[row].get(field) for row in rows.tolist()]
+
+    def _add_postings(self, rows: np.ndarray) -> None:
+        """Add new (sorted, higher than any indexed) rows to the posting lists."""
+        if rows.size == 0:
+            return
+        for field, postings in self._postings.items():
+            for value, value_rows in _group_rows(self.field_values(field, rows), rows).items():
+                existing = postings.get(value)
+                if existing is None:
+                    postings[value] = value_rows
+                    if field in self._sorted_keys:
+                        self._sorted_keys[field] = None     # New key, sorted again on the next range filter
+                else:
+                    postings[value] = np.concatenate((existing, value_rows))
+
+    def _remove_postings(self, rows: np.ndarray) -> None:
+        """Remove deleted (sorted) rows from the posting lists."""
+        for field, postings in self._postings.items():
+            for value, value_rows in _group_rows(self.field_values(field, rows), rows).items():
+                remaining = np.setdiff1d(postings[value], value_rows, assume_unique=True)
+                if remaining.size:
+                    postings[value] = remaining
+                else:
+                    del postings[value]
+                    if field in self._sorted_keys:
+                        self._sorted_keys[field] = None
+
+    def find_rows(self, field: str, value: Any) -> np.ndarray:
+        """
+        Sorted positions of the live rows whose `field` equals `value`.
+
+        Raises:
+            ValueError: If the field is not indexed.
+        """
+        if field not in self._postings:
+            raise ValueError(f"Field '{field}' is not indexed. Indexed fields are: {set(self.INDEXED_FIELDS)}")
+
+        if field == "document_id":
+            try:
+                value = document_key(value)
+            except ValueError:
+                return np.empty(0, dtype=np.int64)
+        try:
+            return self._postings[field].get(value, np.empty(0, dtype=np.int64))
+        except TypeError:   # Unhashable value, it can't match any row
+            return np.empty(0, dtype=np.int64)
+
+    def sorted_keys(self, field: str) -> List[Any]:
+        """
+        Sorted (non-null) values of a range field that match at least one live row.
+
+        Raises:
+            ValueError: If the field is not a range field.
+        """
+        if field not in self._sorted_keys:
+            raise ValueError(f"Field '{field}' doesn't support range filters. Range fields are: {set(self.RANGE_FIELDS)}")
+        if self._sorted_keys[field] is None:
+            self._sorted_keys[field] = sorted(key for key in self._postings[field] if key is not None)
+        return self._sorted_keys[field]
+
+    def find_document(self, document_id: Any) -> np.ndarray:
+        """Return the row positions that belong to a document (empty if it is not indexed)."""
+        return self.find_rows("document_id", document_id)
+
+    def live_rows(self) -> np.ndarray:
+        """Positions of the rows that have not been deleted."""
+        if self._n_deleted == 0:
+            return np.arange(self._size)
+        return np.flatnonzero(self.alive)
+
+    def delete_rows(self, rows: np.ndarray) -> None:
+        """Tombstone the given row positions, compacting the index if there are too many tombstones."""
+        rows = np.asarray(rows, dtype=np.int64)
+        rows = np.unique(rows[self._alive[rows]])
+        if rows.size == 0:
+            return
+
+        self._alive[rows] = False
+        self._n_deleted += rows.size
+
+        self._remove_postings(rows)
+        if self.hnsw is not None:
+            self.hnsw.mark_deleted(rows.tolist())
+
+        if self._n_deleted > self.compaction_threshold * self._size:
+            self.compact()
+
+    def compact(self) -> None:
+        """Physically remove the tombstoned rows, moving the live rows to the front of the arrays."""
+        if self._n_deleted == 0:
+            return
+
+        # The graph has to be repaired while the vectors of the deleted nodes are still there
+        if self.hnsw is not None:
+            self.hnsw.repair(self.vectors, self.norms)
+
+        kept = np.flatnonzero(self.alive)
+        new_size = kept.size
+
+        # NOTE: The live rows are copied to new arrays (not moved in place), snapshots may still be reading the old ones
+        capacity = self.capacity
+        self._vectors = _take(self._vectors, kept, capacity)
+        self._codes = _take(self._codes, kept, capacity)
+        self._norms = _take(self._norms, kept, capacity)
+        self._derived_norms = {key: _take(norms, kept, capacity) for key, norms in self._derived_norms.items()}
+        self._chunk_ids = _take(self._chunk_ids, kept, capacity)
+        self._document_ids = _take(self._document_ids, kept, capacity)
+        self._alive = np.empty(capacity, dtype=bool)
+        self._alive[:new_size] = True
+        self.texts = [self.texts[i] for i in kept]
+        self.metadata = [self.metadata[i] for i in kept]
+        self._size = new_size
+        self._n_deleted = 0
+        self.layout_version += 1
+
+        # The posting lists only hold live rows, renumbering them keeps them sorted
+        new_rows = np.full(kept[-1] + 1 if new_size else 0, -1, dtype=np.int64)
+        new_rows[kept] = np.arange(new_size)
+        for postings in self._postings.values():
+            for value, value_rows in postings.items():
+                postings[value] = new_rows[value_rows]
+
+        if self.hnsw is not None:
+            self.hnsw.remap(kept)
+            self.hnsw_size = int(np.searchsorted(kept, self.hnsw_size))
+        if self.ivf is not None:
+            self.ivf.remap(kept)
+
+    def snapshot(self, with_structures: bool = False) -> "ColumnarIndex":
+        """
+        Read-only view of the current rows, unaffected by the later changes of the index.
+
+        The view shares the storage of the index (taking it is O(1) apart from a copy of the `alive`
+        mask), which is safe because stored rows are never rewritten in place. It is meant to be scored,
+        materialized or saved without holding the index lock.
+
+        NOTE: The posting lists are shared with the index, and `texts`/`metadata` may hold rows
+        appended after the snapshot (past its `size`).
+
+        Args:
+            with_structures (bool, optional): Include copies of the HNSW graph and the IVF (which are modified
+                in place), and the quantizer. The copies share their storage with the structures of the index
+                (see `HNSW.copy` and `IVF.copy`), so taking them costs the HNSW tombstones and the IVF list
+                pieces. Defaults to False (the view has no HNSW graph nor IVF).
+
+        Returns:
+            ColumnarIndex: The view.
+        """
+        view = copy.copy(self)
+        view._alive = self._alive[:self._size].copy()
+        view._derived_norms = dict(self._derived_norms)
+        if with_structures:
+            # NOTE: A published quantizer is never modified (see `swap_quantizer`), the view shares it
+            view.hnsw = self.hnsw.copy() if self.hnsw is not None else None
+            view.ivf = self.ivf.copy() if self.ivf is not None else None
+        else:
+            view.hnsw = view.ivf = None
+        return view
+
+    def document_count(self) -> int:
+        """Number of distinct documents stored in the index."""
+        return len(self._postings["document_id"])
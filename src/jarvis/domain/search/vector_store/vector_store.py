@@ -1,14 +1,36 @@
+import os
 import sys
+import copy
+import time
+import logging
+import itertools
 import threading    # I will use locks to prevents multiple threads from executing the code simultaneously
-from typing import Dict, Any, List, Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional, Tuple
+
+import numpy as np
 
 # src
 sys.path.append("./")
 from src.jarvis.domain.search.algorithm.linear_knn import LinearKNN
 from src.jarvis.domain.search.algorithm.hierarchical_knn import HierarchicalKNN
+from src.jarvis.domain.search.algorithm.hnsw import HNSW
+from src.jarvis.domain.search.algorithm.ivf import IVF
+from src.jarvis.domain.search.vector_store.columnar_index import ColumnarIndex
+from src.jarvis.domain.search.vector_store.rwlock import ReadWriteLock
+from src.jarvis.domain.search.quantization import Quantizer, build_quantizer
+from src.jarvis.domain.search.utils import top_k_indices, top_k_indices_batch
+from src.jarvis.domain.search.filters import compile_filter
 from src.jarvis.domain.genai.document import Document
 from src.jarvis.infrastructure.core.config import genai_config
+from src.jarvis.infrastructure.persistence.snapshot import (
+    current_generation, delete_snapshot, index_directory, list_index_directories, load_index, read_manifest, save_index
+)
+from src.jarvis.infrastructure.persistence.wal import WAL_FILE, WriteAheadLog
 
+# logger
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
 
 class VectorStore:
     """
@@ -16,19 +38,131 @@ class VectorStore:
 
     This stores chunks as the primary searchable units, since they contain the embeddings.
     Documents are tracked separately for metadata and organization.
+
+    Concurrency:
+        - The store lock only protects the registry of indexes (and their WALs), it is never held
+        while an index is read or modified.
+        - Every index has its own ReadWriteLock: searches share it, writes to the index take it
+        exclusively, so writes to one index never block the searches or the writes of another one.
+        - Writers do the expensive preparation (validation, float32 conversion) before locking.
+        Linear/hierarchical/matryoshka searches only hold the lock to plan the filter, then score a
+        `ColumnarIndex.snapshot` of the rows without any lock (NumPy/BLAS release the GIL while
+        scoring), so they run in parallel with each other and with the writes.
+        - Every mutation of an index bumps its version (see `index_version`), which callers use to
+        invalidate what they derived from the index (e.g. cached search results).
+
+    Multi-process:
+        - A single writer process owns the mutations and publishes a snapshot generation of the
+        modified indexes every few seconds (`start_publishing`). Every publish rewrites the whole
+        snapshot of an index, so big indexes are republished less often (see `publish`).
+        - Search workers open the store `read_only`: they only memory-map the published generations
+        (shared by all the workers through the OS page cache) and swap in the new ones as they are
+        published (`start_refresh`), without restarting. Their mutations raise a ValueError.
     """
-    def __init__(self):
+    ALGORITHMS = ("linear", "hierarchical", "matryoshka", "hnsw", "ivf")
+
+    def __init__(self, persist_dir: Optional[str] = None, read_only: bool = False):
         """
         Initialize the vector store.
 
-        Structure: {index_name: {'texts': [], 'vectors': [], 'metadata': [], 'dimension': int, 'mappings': {}}}
+        Structure: {index_name: ColumnarIndex}, where each ColumnarIndex holds the float32 vector
+        matrix, the parallel chunk/document id arrays, the texts, the metadata, the dimension and the mappings.
+
+        Args:
+            persist_dir (Optional[str], optional): Directory where the indexes are persisted (snapshots
+                and write-ahead logs). Defaults to None (purely in-memory store).
+            read_only (bool, optional): Serve the snapshots published in `persist_dir` by a writer process,
+                without any WAL nor mutation. Defaults to False.
+
+        Raises:
+            ValueError: If the store is read-only without a persistence directory.
         """
-        self.indexes: Dict[str, Dict[str, Any]] = {}
-        self._lock = threading.RLock()
+        if read_only and not persist_dir:
+            raise ValueError("A read-only vector store needs the persistence directory of the writer")
+
+        self.persist_dir = persist_dir
+        self.read_only = read_only
+        self.indexes: Dict[str, ColumnarIndex] = {}
+        self._wals: Dict[str, WriteAheadLog] = {}
+        self._index_locks: Dict[str, ReadWriteLock] = {}
+        self._versions: Dict[str, int] = {}
+        self._version_clock = itertools.count(1)  # Shared by all the indexes, so a re-created index never reuses a version
+        self._lock = threading.RLock()  # Protects the registry of indexes (indexes, _index_locks, _wals, ...)
+        self._save_lock = threading.Lock()  # Serializes the snapshots (and the index deletions with them)
+        self._training = set()   # Indexes with an IVF training running in background
+        self._linking = set()   # Indexes with new rows being linked into their HNSW graph in background
+        self._quantizing = set()    # Indexes with their quantizer being trained in background
+        self._checkpointing = set()   # Indexes with a snapshot being written in background
+        self._published: Dict[str, int] = {}   # Writer: version of each index in its last snapshot
+        self._saved: Dict[str, Tuple[float, float]] = {}   # Writer: (monotonic end time, seconds taken) of the last snapshot of each index
+        self._generations: Dict[str, Tuple[str, Optional[str]]] = {}    # Reader: (generation, snapshot id) loaded per index
+        self._stopped = threading.Event()   # Stops the background refresh/publishing
+
+        # Thread pool of the sharded scans (see `_brute_force_search`)
+        self._scan_shards = genai_config.VECTORSTORE_SCAN_SHARDS or os.cpu_count() or 1
+        self._scan_pool = ThreadPoolExecutor(max_workers=self._scan_shards, thread_name_prefix="vectorstore-scan") if self._scan_shards > 1 else None
 
     def __len__(self):
         return len(self.indexes)
 
+    def _index_lock(self, index_name: str) -> Tuple[ColumnarIndex, ReadWriteLock]:
+        """Return an index and its lock.
+
+        Raises:
+            ValueError: If the index does not exist.
+        """
+        with self._lock:
+            if index_name not in self.indexes:
+                raise ValueError(f"Index '{index_name}' does not exist")
+            return self.indexes[index_name], self._index_locks[index_name]
+
+    def _check_writable(self) -> None:
+        if self.read_only:
+            raise ValueError("The vector store is read-only (search worker), the writes go to the writer process")
+
+    def _check_index(self, index_name: str, index_data: ColumnarIndex) -> None:
+        """Make sure an index was not deleted (or re-created) while waiting for its lock."""
+        if self.indexes.get(index_name) is not index_data:
+            raise ValueError(f"Index '{index_name}' does not exist")
+
+    def index_dimension(self, index_name: str) -> int:
+        """
+        Dimension of the vectors of an index.
+
+        Raises:
+            ValueError: If the index does not exist.
+        """
+        index_data, _ = self._index_lock(index_name)
+        return index_data.dimension
+
+    def index_version(self, index_name: str) -> int:
+        """
+        Version of an index, which changes whenever its documents (or its IVF) change.
+
+        Raises:
+            ValueError: If the index does not exist.
+        """
+        with self._lock:
+            if index_name not in self._versions:
+                raise ValueError(f"Index '{index_name}' does not exist")
+            return self._versions[index_name]
+
+    def _bump_version(self, index_name: str) -> None:
+        """Mark an index as modified (called with the index write-locked, or before it is published)."""
+        self._versions[index_name] = next(self._version_clock)
+
+    def index_snapshot(self, index_name: str) -> ColumnarIndex:
+        """
+        Read-only view of the current rows of an index (see `ColumnarIndex.snapshot`), which can be
+        read without any lock while the index keeps being modified.
+
+        Raises:
+            ValueError: If the index does not exist.
+        """
+        index_data, lock = self._index_lock(index_name)
+        with lock.read():
+            return index_data.snapshot()
+
     def index_exists(self, index_name: str):
         """Check if an index exists
 
@@ -51,7 +185,24 @@ class VectorStore:
                 "mappings": {
                     "properties": {
                         "texts": {"type": "List[str]"},
-                        "vectors": {"type": "List[knn_vector]", "dimension": 1024},
+                        "vectors": {
+                            "type": "List[knn_vector]",
+                            "dimension": 1024,
+                            # Optional, builds an HNSW graph incrementally as documents are indexed
+                            "method": {
+                                "name": "hnsw",
+                                "space_type": "cosine",
+                                "parameters": {"m": 16, "ef_construction": 200, "ef_search": 50}
+                            },
+                            # Optional, stores the vectors as int8 ("int8"), product quantization ("pq") or sign bit ("binary") codes
+                            "quantization": {
+                                "type": "pq",
+                                "m": 128,
+                                "training_size": 10000,
+                                "rerank": True,
+                                "rerank_multiplier": 4
+                            }
+                        },
                         "metadata": {
                             "type": "object",
                             "properties": {
@@ -65,28 +216,82 @@ class VectorStore:
                 }
             }
         """
+        self._check_writable()
         with self._lock:
             if index_name in self.indexes:
                 raise ValueError(f"Index '{index_name}' already exists")
 
-            # Extract vector dimension from index_body mappings
-            vector_props = index_body.get("mappings", {}).get("properties", {})
-            dimension = None
-            for _, props in vector_props.items():
-                if props.get("type") == "List[knn_vector]" and "dimension" in props:
-                    dimension = props["dimension"]
-                    break
+            index_data = self._new_index(index_body)
 
-            if dimension is None:
-                raise ValueError("Index definition must include a 'knn_vector' field with a 'dimension' property.")
+            if self.persist_dir:
+                directory = index_directory(self.persist_dir, index_name)
+                delete_snapshot(directory)  # Leftover of an index that could not be recovered
+                os.makedirs(directory)
+                wal = self._open_wal(directory)
+                wal.sync(wal.append("create_index", (index_body,)))
+                self._wals[index_name] = wal
 
-            self.indexes[index_name] = {
-                'texts': [],
-                'vectors': [],
-                'metadata': [],
-                'dimension': dimension,
-                'mappings': index_body.get('mappings', {}),
-            }
+            self.indexes[index_name] = index_data
+            self._index_locks[index_name] = ReadWriteLock()
+            self._bump_version(index_name)
+
+    def _new_index(self, index_body: dict) -> ColumnarIndex:
+        """Build the (empty) ColumnarIndex described by an index body."""
+        # Extract vector dimension from index_body mappings
+        vector_props = index_body.get("mappings", {}).get("properties", {})
+        dimension = None
+        method = None
+        quantization = None
+        for _, props in vector_props.items():
+            if props.get("type") == "List[knn_vector]" and "dimension" in props:
+                dimension = props["dimension"]
+                method = props.get("method")
+                quantization = props.get("quantization")
+                break
+
+        if dimension is None:
+            raise ValueError("Index definition must include a 'knn_vector' field with a 'dimension' property.")
+
+        quantizer = self._build_quantizer(quantization, dimension)
+        # NOTE: The HNSW graph is walked with the full-precision vectors, so they have to be kept
+        if method and quantizer is not None and not quantizer.rerank:
+            raise ValueError("An 'hnsw' knn_vector method needs the full-precision vectors, set 'rerank' to true in the quantization")
+
+        return ColumnarIndex(
+            dimension=dimension,
+            mappings=index_body.get('mappings', {}),
+            compaction_threshold=genai_config.VECTORSTORE_COMPACTION_THRESHOLD,
+            hnsw=self._build_hnsw(method),
+            quantizer=quantizer,
+        )
+
+    def _build_hnsw(self, method: Optional[dict]) -> Optional[HNSW]:
+        """Build the (empty) HNSW graph described by the 'method' of a knn_vector mapping, if any."""
+        if not method:
+            return None
+
+        if method.get("name") != "hnsw":
+            raise ValueError(f"Unsupported knn_vector method '{method.get('name')}'. Supported methods are: {{'hnsw'}}")
+
+        parameters = method.get("parameters", {})
+        return HNSW(
+            distance_metric=method.get("space_type", genai_config.VECTORSTORE_DISTANCE),
+            M=parameters.get("m", genai_config.VECTORSTORE_HNSW_M),
+            ef_construction=parameters.get("ef_construction", genai_config.VECTORSTORE_HNSW_EF_CONSTRUCTION),
+            ef_search=parameters.get("ef_search", genai_config.VECTORSTORE_HNSW_EF_SEARCH),
+        )
+
+    def _build_quantizer(self, quantization: Optional[dict], dimension: int) -> Optional[Quantizer]:
+        """Build the (untrained) quantizer described by the 'quantization' of a knn_vector mapping, if any."""
+        if not quantization:
+            return None
+
+        return build_quantizer(
+            quantization,
+            dimension,
+            training_size=genai_config.VECTORSTORE_QUANTIZATION_TRAINING_SIZE,
+            rerank_multiplier=genai_config.VECTORSTORE_QUANTIZATION_RERANK_MULTIPLIER,
+        )
 
     def delete_index(self, index_name: str) -> None:
         """Delete an index
@@ -94,10 +299,65 @@ class VectorStore:
         Args:
             index_name (str): Index name
         """
-        with self._lock:
-            if index_name not in self.indexes:
-                raise ValueError(f"Index '{index_name}' does not exist")
+        self._check_writable()
+        index_data, lock = self._index_lock(index_name)
+
+        # Wait for the in-flight writes (and snapshots), so that the deletion is the last record of the WAL
+        with self._save_lock, lock.write(), self._lock:
+            self._check_index(index_name, index_data)
             del self.indexes[index_name]
+            del self._index_locks[index_name]
+            del self._versions[index_name]
+            self._published.pop(index_name, None)
+            self._saved.pop(index_name, None)
+
+            wal = self._wals.pop(index_name, None)
+            if wal is not None:
+                wal.sync(wal.append("delete_index", ()))
+                wal.close()
+                delete_snapshot(index_directory(self.persist_dir, index_name))
+
+    def _document_rows(
+        self,
+        document: Document,
+        dimension: int
+    ) -> Tuple[np.ndarray, List[int], List[Any], List[str], List[dict]]:
+        """Build the columnar rows (one per chunk) of a document.
+
+        Args:
+            document (Document): Document whose chunks are converted into rows.
+            dimension (int): Dimension of the target index.
+
+        Returns:
+            Tuple[np.ndarray, List[int], List[Any], List[str], List[dict]]: Vectors, chunk ids, document ids, texts and metadata.
+
+        Raises:
+            ValueError: If the dimension of any chunk embedding doesn't match the index dimension.
+        """
+        for chunk in document.chunks:
+            if len(chunk.embedding) != dimension:
+                raise ValueError(
+                    f"Vector dimension {len(chunk.embedding)} doesn't match index dimension {dimension}"
+                )
+
+        vectors = np.asarray([chunk.embedding for chunk in document.chunks], dtype=np.float32).reshape(-1, dimension)
+        chunk_ids = [chunk.metadata.chunk_id for chunk in document.chunks]
+        document_ids = [document.metadata.document_id] * len(document.chunks)
+        texts = [chunk.text for chunk in document.chunks]
+
+        # Combined metadata: document metadata + chunk metadata
+        metadata = [
+            {
+                "document_id": document.metadata.document_id,
+                "title": document.metadata.title,
+                "author": document.metadata.author,
+                "created_date": document.metadata.created_date,
+                "chunk_id": chunk_id
+            }
+            for chunk_id in chunk_ids
+        ]
+
+        return vectors, chunk_ids, document_ids, texts, metadata
 
     def index_document(
         self,
@@ -110,34 +370,40 @@ class VectorStore:
             index_name (str): Index name
             doc (Document): Document to index
         """
-        with self._lock:
-            if index_name not in self.indexes:
-                raise ValueError(f"Index '{index_name}' does not exist")
+        self.index_documents(index_name, [document])
 
-            index_data = self.indexes[index_name]
-            dimension = index_data['dimension']
-
-            # Index each chunk in the Document separately
-            for chunk in document.chunks:
-                text = chunk.text
-                vector = chunk.embedding
-                if len(vector) != dimension:
-                    raise ValueError(
-                        f"Vector dimension {len(vector)} doesn't match index dimension {dimension}"
-                    )
-
-                # Combined metadata: document metadata + chunk metadata
-                metadata = {
-                    "document_id": document.metadata.document_id,
-                    "title": document.metadata.title,
-                    "author": document.metadata.author,
-                    "created_date": document.metadata.created_date,
-                    "chunk_id": chunk.metadata.chunk_id
-                }
+    def index_documents(self, index_name: str, documents: List[Document]) -> None:
+        """
+        Index several documents with a single write: the index lock is taken, and the WAL record
+        written (and synced), once for the whole batch.
+
+        Args:
+            index_name (str): Index name
+            documents (List[Document]): Documents to index
+
+        Raises:
+            ValueError: If the index does not exist or the dimension of any chunk embedding doesn't match the index dimension.
+        """
+        self._check_writable()
+        index_data, lock = self._index_lock(index_name)
+        if not documents:
+            return
 
-                index_data['texts'].append(text)
-                index_data['vectors'].append(vector)
-                index_data['metadata'].append(metadata)
+        # Index all the chunks of the Documents in a single columnar append
+        vectors, chunk_ids, document_ids, texts, metadata = zip(*(self._document_rows(document, index_data.dimension) for document in documents))
+        chain = itertools.chain.from_iterable
+        args = ((np.concatenate(vectors), list(chain(chunk_ids)), list(chain(document_ids)), list(chain(texts)), list(chain(metadata))),)
+
+        with lock.write():
+            self._check_index(index_name, index_data)
+            logged = self._log(index_name, "index_document", args)
+            self._apply(index_data, "index_document", args)
+            self._bump_version(index_name)
+            self._maybe_retrain_ivf(index_name, index_data)
+            self._maybe_link_hnsw(index_name, index_data)
+            self._maybe_train_quantizer(index_name, index_data)
+
+        self._commit(index_name, logged)
 
     def update_document(self, index_name: str, document: Document) -> None:
         """
@@ -151,39 +417,30 @@ class VectorStore:
         Raises:
             ValueError: If the index or document doesn't exist.
         """
-        with self._lock:
-            if index_name not in self.indexes:
-                raise ValueError(f"Index '{index_name}' does not exist")
+        self._check_writable()
+        index_data, lock = self._index_lock(index_name)
+        document_id = document.metadata.document_id
 
-            index_data = self.indexes[index_name]
-            dimension = index_data['dimension']
-
-            # Check if document exists by scanning metadata
-            exists = any(meta.get('document_id') == document.document_id for meta in index_data['metadata'])
-            if not exists:
-                raise ValueError(f"Document with ID '{document.document_id}' not found in index '{index_name}'")
-
-            # Delete old chunks related to the document
-            self.delete_document(index_name, document.document_id)
-
-            # Index the updated document chunks (reuse your index_document method logic)
-            for chunk in document.chunks:
-                text = chunk.text
-                vector = chunk.embedding
-                if len(vector) != dimension:
-                    raise ValueError(
-                        f"Vector dimension {len(vector)} doesn't match index dimension {dimension}"
-                    )
-                metadata = {
-                    "document_id": document.document_id,
-                    "title": document.metadata.title,
-                    "author": document.metadata.author,
-                    "created_date": document.metadata.created_date,
-                    "chunk_id": chunk.chunk_id
-                }
-                index_data['texts'].append(text)
-                index_data['vectors'].append(vector)
-                index_data['metadata'].append(metadata)
+        # Build (and validate) the new rows before touching the old ones
+        args = (document_id, self._document_rows(document, index_data.dimension))
+
+        with lock.write():
+            self._check_index(index_name, index_data)
+
+            rows = index_data.find_document(document_id)
+            if rows.size == 0:
+                raise ValueError(f"Document with ID '{document_id}' not found in index '{index_name}'")
+
+            logged = self._log(index_name, "update_document", args)
+
+            # Replace the old chunks related to the document
+            self._apply(index_data, "update_document", args)
+            self._bump_version(index_name)
+            self._maybe_retrain_ivf(index_name, index_data)
+            self._maybe_link_hnsw(index_name, index_data)
+            self._maybe_train_quantizer(index_name, index_data)
+
+        self._commit(index_name, logged)
 
     def delete_document(self, index_name: str, doc_id: str) -> None:
         """
@@ -196,30 +453,339 @@ class VectorStore:
         Raises:
             ValueError: If the index does not exist or the document ID is not found.
         """
-        with self._lock:
-            if index_name not in self.indexes:
-                raise ValueError(f"Index '{index_name}' does not exist")
-            
-            index_data = self.indexes[index_name]
+        self._check_writable()
+        index_data, lock = self._index_lock(index_name)
 
-            # Find all indices where the metadata's document_id matches the requested doc_id
-            idxs = [
-                i for i, meta in enumerate(index_data['metadata'])
-                if meta.get('document_id') == doc_id
-            ]
+        with lock.write():
+            self._check_index(index_name, index_data)
 
-            # If the list of indices is empty, the document was not found
-            if not idxs:
+            # Find all the rows where the document_id matches the requested doc_id
+            rows = index_data.find_document(doc_id)
+
+            # If there are no rows, the document was not found
+            if rows.size == 0:
                 raise ValueError(f"Document with ID '{doc_id}' not found in index '{index_name}'")
 
-            # Delete items from the lists by index, starting from the end
-            # to avoid messing up the indices of subsequent items.
-            for idx in sorted(idxs, reverse=True):
-                del index_data['texts'][idx]
-                del index_data['vectors'][idx]
-                del index_data['metadata'][idx]
+            logged = self._log(index_name, "delete_document", (doc_id,))
+            self._apply(index_data, "delete_document", (doc_id,))
+            self._bump_version(index_name)
+
+        self._commit(index_name, logged)
+
+    def _apply(self, index_data: ColumnarIndex, operation: str, args: Tuple) -> None:
+        """Apply a (validated) document mutation to an index. Shared by the write path and the WAL replay."""
+        if operation == "index_document":
+            index_data.append(*args[0])
+        elif operation == "update_document":
+            document_id, rows = args
+            index_data.delete_rows(index_data.find_document(document_id))
+            index_data.append(*rows)
+        elif operation == "delete_document":
+            index_data.delete_rows(index_data.find_document(args[0]))
+        else:
+            raise ValueError(f"Unknown operation '{operation}'")
+
+    def _log(self, index_name: str, operation: str, args: Tuple) -> Optional[Tuple[WriteAheadLog, int]]:
+        """Append a mutation to the WAL of an index before it is applied (no-op without persistence)."""
+        wal = self._wals.get(index_name)
+        if wal is None:
+            return None
+        return wal, wal.append(operation, args)
+
+    def _commit(self, index_name: str, logged: Optional[Tuple[WriteAheadLog, int]]) -> None:
+        """
+        Wait until a logged mutation is durable and checkpoint the WAL if it grew too much.
+
+        NOTE: Called after releasing the store lock, so concurrent writers share the same fsync (group commit).
+        """
+        if logged is None:
+            return
+        wal, lsn = logged
+        wal.sync(lsn)
+        if wal.size >= genai_config.VECTORSTORE_WAL_CHECKPOINT_BYTES:
+            self._schedule_checkpoint(index_name)
+
+    def _schedule_checkpoint(self, index_name: str) -> None:
+        """Snapshot an index in background (which truncates its WAL), unless one is already running."""
+        with self._lock:
+            if index_name in self._checkpointing or index_name not in self._wals:
+                return
+            self._checkpointing.add(index_name)
+
+        threading.Thread(target=self._background_checkpoint, args=(index_name,), daemon=True).start()
+
+    def _background_checkpoint(self, index_name: str) -> None:
+        try:
+            self.save([index_name])
+        except (ValueError, OSError) as e:
+            logger.warning(f"Background checkpoint of index '{index_name}' failed: {e}")
+        finally:
+            with self._lock:
+                self._checkpointing.discard(index_name)
+
+    def train_index(self, index_name: str, nlist: Optional[int] = None, nprobe: Optional[int] = None) -> IVF:
+        """
+        Train the IVF (inverted-file) index used by the "ivf" algorithm, replacing the previous one.
+
+        The centroids are trained with mini-batch k-means on a sample of the live rows. Training and
+        the assignment of the rows to their lists run on a snapshot, without holding the index lock, so the
+        index can still be searched and updated meanwhile; rows appended during the training are assigned at the end.
+
+        Args:
+            index_name (str): Name of the index.
+            nlist (Optional[int], optional): Number of lists (k-means clusters). Defaults to VECTORSTORE_IVF_NLIST.
+            nprobe (Optional[int], optional): Default number of lists probed per query. Defaults to VECTORSTORE_IVF_NPROBE.
+
+        Returns:
+            IVF: The trained IVF.
+
+        Raises:
+            ValueError: If the index does not exist (or is deleted during the training) or is empty.
+        """
+        self._check_writable()
+        index_data, lock = self._index_lock(index_name)
+
+        with lock.read():
+            self._check_index(index_name, index_data)
+            live_rows = index_data.live_rows()
+            if live_rows.size == 0:
+                raise ValueError(f"Index '{index_name}' is empty, there is nothing to train the IVF on")
+
+            requested_nlist = nlist or genai_config.VECTORSTORE_IVF_NLIST
+            nlist = min(requested_nlist, live_rows.size)
+            nprobe = nprobe or genai_config.VECTORSTORE_IVF_NPROBE
+
+            # Copy a sample of the live rows; the rest of the work reads the current rows in place
+            n_samples = nlist * genai_config.VECTORSTORE_IVF_TRAINING_POINTS_PER_LIST
+            if live_rows.size > n_samples:
+                live_rows = np.sort(np.random.default_rng().choice(live_rows, n_samples, replace=False))
+            training_vectors = index_data.get_vectors(live_rows)
+            snapshot = index_data.snapshot()
+            layout_version = index_data.layout_version
+            trained_size = len(index_data)
+
+        ivf = IVF.train(
+            training_vectors,
+            nlist=nlist,
+            nprobe=nprobe,
+            batch_size=genai_config.VECTORSTORE_IVF_KMEANS_BATCH_SIZE,
+            max_iter=genai_config.VECTORSTORE_IVF_KMEANS_MAX_ITER,
+        )
+        for vectors in snapshot.vector_blocks():
+            ivf.add(vectors)
+        ivf.trained_size = trained_size
+        ivf.requested_nlist = requested_nlist
+
+        with lock.write():
+            if self.indexes.get(index_name) is not index_data:
+                raise ValueError(f"Index '{index_name}' was deleted while training its IVF")
+
+            if index_data.layout_version != layout_version:
+                # The rows were compacted meanwhile: the centroids are still valid, but not the lists
+                trained = ivf
+                ivf = IVF(trained.centroids, nprobe=nprobe)
+                ivf.trained_size, ivf.requested_nlist = trained.trained_size, trained.requested_nlist
+                for vectors in index_data.vector_blocks():
+                    ivf.add(vectors)
+            else:
+                # Assign the rows appended during the training
+                for vectors in index_data.vector_blocks(len(ivf)):
+                    ivf.add(vectors)
+
+            index_data.ivf = ivf
+            self._bump_version(index_name)  # The "ivf" results change with the lists
+
+        logger.info(f"IVF of index '{index_name}' trained with {ivf.nlist} lists on {training_vectors.shape[0]} vectors")
+        # NOTE: The IVF is not in the WAL, a snapshot keeps the training across restarts
+        self._schedule_checkpoint(index_name)
+        return ivf
+
+    def link_hnsw(self, index_name: str) -> int:
+        """
+        Insert the rows indexed since the last call into the HNSW graph of an index.
+
+        The rows are inserted into a copy of the graph (see `HNSW.copy`) without holding the index lock,
+        then the copy replaces the graph under the write lock. Until then, HNSW searches scan the rows
+        missing from the graph exactly. Writes start this in background; calling it waits until every row
+        indexed so far is in the graph.
+
+        Args:
+            index_name (str): Name of the index.
+
+        Returns:
+            int: Number of rows inserted into the graph.
+
+        Raises:
+            ValueError: If the index does not exist (or is deleted meanwhile) or has no HNSW graph.
+        """
+        self._check_writable()
+        index_data, lock = self._index_lock(index_name)
+        linked = 0
+
+        while True:
+            with lock.read():
+                self._check_index(index_name, index_data)
+                hnsw = index_data.hnsw
+                if hnsw is None:
+                    raise ValueError(f"Index '{index_name}' was not created with an 'hnsw' knn_vector method")
+                start, end = index_data.hnsw_size, index_data.size
+                if start == end:
+                    return linked
+                graph = hnsw.copy()
+                snapshot = index_data.snapshot()
+                layout_version = index_data.layout_version
+
+            # NOTE: The rows [start, end) are never rewritten, the insertion reads them without the lock
+            for row in range(start, end):
+                graph.add(row, snapshot.vectors, snapshot.norms)
+
+            with lock.write():
+                if self.indexes.get(index_name) is not index_data:
+                    raise ValueError(f"Index '{index_name}' was deleted while linking its HNSW graph")
+                # Retry on the current graph if the rows were compacted (or the graph replaced) meanwhile
+                if index_data.hnsw is hnsw and index_data.layout_version == layout_version:
+                    index_data.swap_hnsw(graph, end)
+                    self._bump_version(index_name)  # The "hnsw" results change with the graph
+                    linked += end - start
+
+    def _maybe_link_hnsw(self, index_name: str, index_data: ColumnarIndex) -> None:
+        """Start linking the new rows of an index into its HNSW graph in background, unless it is already running."""
+        if index_data.hnsw is None or index_data.hnsw_size == index_data.size:
+            return
+
+        with self._lock:
+            if index_name in self._linking:
+                return
+            self._linking.add(index_name)
+        threading.Thread(target=self._background_link, args=(index_name, index_data), daemon=True).start()
+
+    def _background_link(self, index_name: str, index_data: ColumnarIndex) -> None:
+        try:
+            while True:
+                self.link_hnsw(index_name)
+                with self._lock:
+                    # NOTE: Rows appended after the last check found the linking running, so they are linked here
+                    if index_data.hnsw_size == index_data.size or self.indexes.get(index_name) is not index_data:
+                        self._linking.discard(index_name)
+                        return
+        except ValueError as e:
+            logger.warning(f"Background HNSW linking of index '{index_name}' failed: {e}")
+            with self._lock:
+                self._linking.discard(index_name)
+
+    def train_quantizer(self, index_name: str) -> Quantizer:
+        """
+        Train the quantizer of an index and encode its rows, once the index holds `training_size` vectors.
+
+        A copy of the quantizer is trained on a sample of the live rows, and the rows of a snapshot are
+        encoded, without holding the index lock; the trained copy and the codes then replace the quantizer
+        under the write lock, where only the rows appended meanwhile are encoded. Writes start this in
+        background; calling it waits until the quantizer is trained.
+
+        Args:
+            index_name (str): Name of the index.
+
+        Returns:
+            Quantizer: The quantizer of the index (still untrained if the index holds fewer than `training_size` vectors).
+
+        Raises:
+            ValueError: If the index does not exist (or is deleted during the training) or is not quantized.
+        """
+        self._check_writable()
+        index_data, lock = self._index_lock(index_name)
+        quantizer = None
+
+        while True:
+            with lock.read():
+                self._check_index(index_name, index_data)
+                current = index_data.quantizer
+                if current is None:
+                    raise ValueError(f"Index '{index_name}' was not created with a knn_vector 'quantization'")
+                if current.is_trained or (quantizer is None and len(index_data) < current.training_size):
+                    return current
+                if quantizer is None:
+                    # Copy a sample of the live rows; the encoding reads the current rows in place
+                    live_rows = index_data.live_rows()
+                    if live_rows.size > current.training_size:
+                        live_rows = np.sort(np.random.default_rng().choice(live_rows, current.training_size, replace=False))
+                    training_vectors = index_data.get_vectors(live_rows)
+                snapshot = index_data.snapshot()
+                layout_version = index_data.layout_version
+
+            # NOTE: The published quantizer is never trained in place, snapshots may be scoring with it
+            if quantizer is None:
+                quantizer = copy.deepcopy(current)
+                quantizer.train(training_vectors)
+            codes = np.empty((snapshot.size, quantizer.code_size), dtype=np.uint8)
+            start = 0
+            for vectors in snapshot.vector_blocks():
+                codes[start:start + vectors.shape[0]] = quantizer.encode(vectors)
+                start += vectors.shape[0]
+
+            with lock.write():
+                if self.indexes.get(index_name) is not index_data:
+                    raise ValueError(f"Index '{index_name}' was deleted while training its quantizer")
+                if index_data.quantizer is not current:
+                    return index_data.quantizer     # Trained by a concurrent call
+                # Encode the rows again if they were compacted meanwhile (the trained quantizer is still valid)
+                if index_data.layout_version == layout_version:
+                    index_data.swap_quantizer(quantizer, codes)
+                    self._bump_version(index_name)  # The quantized results replace the exact ones
+                    break
+
+        logger.info(f"Quantizer of index '{index_name}' trained on {training_vectors.shape[0]} vectors")
+        return quantizer
+
+    def _maybe_train_quantizer(self, index_name: str, index_data: ColumnarIndex) -> None:
+        """Start training the quantizer of an index in background once it holds `training_size` vectors."""
+        quantizer = index_data.quantizer
+        if quantizer is None or quantizer.is_trained or len(index_data) < quantizer.training_size:
+            return
 
-    def query_index(self, index_name: str, query_vector: List[float], top_k: Optional[int] = genai_config.VECTORSTORE_TOP_K, algorithm: Optional[str] = genai_config.VECTORSTORE_ALGORITHM, distance: Optional[str] = genai_config.VECTORSTORE_DISTANCE, decay_factor: Optional[float] = genai_config.VECTORSTORE_DECAY_FACTOR, filter: Optional[dict] = None) -> List[dict]:
+        with self._lock:
+            if index_name in self._quantizing:
+                return
+            self._quantizing.add(index_name)
+        threading.Thread(target=self._background_quantize, args=(index_name,), daemon=True).start()
+
+    def _background_quantize(self, index_name: str) -> None:
+        try:
+            self.train_quantizer(index_name)
+        except ValueError as e:
+            logger.warning(f"Background quantizer training of index '{index_name}' failed: {e}")
+        finally:
+            with self._lock:
+                self._quantizing.discard(index_name)
+
+    def _maybe_retrain_ivf(self, index_name: str, index_data: ColumnarIndex) -> None:
+        """Start a background IVF training if the index grew enough since the last one."""
+        ivf = index_data.ivf
+        growth = genai_config.VECTORSTORE_IVF_RETRAIN_GROWTH
+        if ivf is None or growth <= 0:
+            return
+        if len(index_data) < ivf.trained_size * (1 + growth):
+            return
+
+        with self._lock:
+            if index_name in self._training:
+                return
+            self._training.add(index_name)
+        threading.Thread(
+            target=self._background_train,
+            args=(index_name, ivf.requested_nlist, ivf.nprobe),
+            daemon=True,
+        ).start()
+
+    def _background_train(self, index_name: str, nlist: int, nprobe: int) -> None:
+        try:
+            self.train_index(index_name, nlist=nlist, nprobe=nprobe)
+        except ValueError as e:
+            logger.warning(f"Background IVF training of index '{index_name}' failed: {e}")
+        finally:
+            with self._lock:
+                self._training.discard(index_name)
+
+    def query_index(self, index_name: str, query_vector: List[float], top_k: Optional[int] = genai_config.VECTORSTORE_TOP_K, algorithm: Optional[str] = genai_config.VECTORSTORE_ALGORITHM, distance: Optional[str] = genai_config.VECTORSTORE_DISTANCE, decay_factor: Optional[float] = genai_config.VECTORSTORE_DECAY_FACTOR, filter: Optional[dict] = None, ef_search: Optional[int] = None, nprobe: Optional[int] = None, prefix_dimension: Optional[int] = None, shortlist_multiplier: Optional[int] = None) -> List[dict]:
         """
         Query an index by a query vector to find the top-k nearest neighbors.
 
@@ -227,9 +793,16 @@ class VectorStore:
             index_name (str): Name of the index to query.
             query_vector (List[float]): Input query vector.
             top_k (int, optional): Number of nearest neighbors to return. Defaults to 5.
-            algorithm (Optional[str], optional): Search algorithm to use (e.g., "linear"). Defaults to "linear".
+            algorithm (Optional[str], optional): Search algorithm to use ("linear", "hierarchical", "matryoshka", "hnsw" or "ivf"). Defaults to "linear".
             distance (Optional[str], optional): Distance or similarity metric to use ("cosine" or "euclidean"). Defaults to "euclidean".
-            filter (Optional[dict], optional): Metadata filter dictionary. Can contain 'document_id', 'title', 'author', and/or 'created_date'. Defaults to None.
+            filter (Optional[dict], optional): Metadata filter on 'document_id', 'title', 'author' and/or 'created_date', with the
+                operators $eq, $ne, $in, $nin, $and, $or and $gt/$gte/$lt/$lte on 'created_date' (see `domain.search.filters`). Defaults to None.
+            ef_search (Optional[int], optional): Width of the HNSW search (only used by "hnsw"). Defaults to the value of the index.
+            nprobe (Optional[int], optional): Number of IVF lists to scan (only used by "ivf"). Defaults to the value of the index.
+            prefix_dimension (Optional[int], optional): Leading dimensions scored by the coarse pass of "matryoshka", which
+                re-ranks a shortlist of the candidates with all the dimensions. Defaults to VECTORSTORE_MATRYOSHKA_PREFIX_DIMENSION.
+            shortlist_multiplier (Optional[int], optional): Candidates re-ranked by "matryoshka" per requested result.
+                Defaults to VECTORSTORE_MATRYOSHKA_SHORTLIST_MULTIPLIER.
 
         Returns:
             List[dict]: List of results, each result is a dictionary with the following keys:
@@ -239,101 +812,718 @@ class VectorStore:
                 - metadata (dict): Document metadata (excluding vector_field).
 
         Raises:
-            ValueError: If the specified index does not exist or if filter contains invalid keys.
+            ValueError: If the specified index does not exist, if filter is invalid, if the prefix dimension is larger than the
+                index dimension, or if the index has no HNSW graph for "hnsw" or no trained IVF for "ivf".
             NotImplementedError: If the specified algorithm is not implemented.
         """
-        with self._lock:
-            if index_name not in self.indexes:
-                raise ValueError(f"Index '{index_name}' does not exist")
+        index_data, lock = self._index_lock(index_name)
 
-            # Validate the filter
-            self._validate_filter(filter)
+        # Validate and compile the filter
+        plan = compile_filter(filter)
 
-            if algorithm not in {"linear", "hierarchical"}:
-                raise NotImplementedError(f"Algorithm '{algorithm}' is not implemented")
+        if algorithm not in self.ALGORITHMS:
+            raise NotImplementedError(f"Algorithm '{algorithm}' is not implemented")
+        prefix = self._matryoshka_prefix(index_data, prefix_dimension, shortlist_multiplier) if algorithm == "matryoshka" else None
 
-            # Select the appropriate KNN class
-            if algorithm == "linear":
-                knn = LinearKNN(distance_metric=distance.lower())
-            elif algorithm == "hierarchical":
-                knn = HierarchicalKNN(distance_metric=distance.lower(), decay_factor=decay_factor)
-                
-            index_data = self.indexes[index_name]
-            vectors = index_data['vectors']
-            texts = index_data['texts']
-            metadata = index_data['metadata']
-            
-            if not vectors:
+        with lock.read():
+            if len(index_data) == 0:
                 return []
 
             # Apply filter
-            vectors, texts, metadata = self.apply_filter(vectors, texts, metadata, filter)
+            rows = index_data.live_rows() if plan is None else plan.rows(index_data)
 
-            if not vectors:
+            if rows.size == 0:
                 return []
 
-            # Calculate similarities/distances using LinearKNN
-            similarities = []
-            for i, stored_vector in enumerate(vectors):
-                # Use the LinearKNN.score() method to calculate scores
-                score = knn.score(query_vector, stored_vector)
-                similarities.append({
-                    'id': metadata[i]['document_id'],
-                    'score': score,
-                    'text': texts[i],
-                    'metadata': metadata[i]
-                })
-            
-            # Sort by score
-            # NOTE: For cosine similarity -> higher is better (descending)
-            # NOTE: For euclidean distance -> lower is better (ascending)
-            if distance.lower() == "cosine":
-                similarities.sort(key=lambda x: x['score'], reverse=True)
-            elif distance.lower() == "euclidean":
-                similarities.sort(key=lambda x: x['score'], reverse=False)
-            
-            return similarities[:top_k]
+            k = rows.size if top_k is None else top_k
 
+            if algorithm == "hnsw":
+                rows, scores = self._hnsw_search(index_name, index_data, query_vector, k, distance, rows if plan else None, ef_search)
+                return self._build_results(index_data, rows, scores)
+            if algorithm == "ivf":
+                rows, scores = self._ivf_search(index_name, index_data, query_vector, k, distance, rows if plan else None, nprobe)
+                return self._build_results(index_data, rows, scores)
 
-    def _validate_filter(self, filter: Optional[dict]) -> None:
-        """Validate that filter contains only allowed keys."""
-        if filter is not None:
-            valid_filter_keys = {'document_id', 'title', 'author', 'created_date'}
-            invalid_keys = set(filter.keys()) - valid_filter_keys
-            if invalid_keys:
-                raise ValueError(f"Invalid filter keys: {invalid_keys}. Valid keys are: {valid_filter_keys}")
+            # Post-filter (scan the whole index in place) when the filter keeps most of the rows
+            post_filter = plan is not None and plan.estimate(index_data) > genai_config.VECTORSTORE_FILTER_POSTFILTER_SELECTIVITY * index_data.size
+            if algorithm == "hierarchical":
+                index_data.weighted_norms(decay_factor)     # Computed (under the lock) on the first search with this decay factor
+            elif algorithm == "matryoshka":
+                index_data.prefix_norms(prefix[0])
+            snapshot = index_data.snapshot()
 
+        # The scan runs on the snapshot, without blocking the writes to the index
+        rows, scores = self._brute_force_search(snapshot, query_vector, k, algorithm, distance, decay_factor, rows, post_filter, prefix)
+        return self._build_results(snapshot, rows, scores)
 
-    def apply_filter(self, vectors, texts, metadata, filter_dict):
+    def query_index_batch(
+        self,
+        index_name: str,
+        query_vectors: List[List[float]],
+        top_k: Optional[int] = genai_config.VECTORSTORE_TOP_K,
+        algorithm: Optional[str] = genai_config.VECTORSTORE_ALGORITHM,
+        distance: Optional[str] = genai_config.VECTORSTORE_DISTANCE,
+        decay_factor: Optional[float] = genai_config.VECTORSTORE_DECAY_FACTOR,
+        filter: Optional[dict] = None,
+        ef_search: Optional[int] = None,
+        nprobe: Optional[int] = None,
+        prefix_dimension: Optional[int] = None,
+        shortlist_multiplier: Optional[int] = None
+    ) -> List[List[dict]]:
         """
-        Filters vectors, texts, and metadata based on a metadata filter dictionary.
+        Query an index with several query vectors at once (see `query_index` for the arguments).
 
-        Args:
-            vectors (List[List[float]]): List of vectors.
-            texts (List[str]): List of text chunks.
-            metadata (List[dict]): List of metadata dictionaries.
-            filter_dict (dict): Dictionary with filter conditions.
+        Linear, hierarchical and matryoshka searches score all the queries together, as a (queries x rows) matrix
+        product computed block by block, instead of scanning the index once per query. The "hnsw" and "ivf"
+        searches (and the linear scans of quantized indexes) still run query by query, with a single
+        filter evaluation and lock acquisition for the whole batch.
 
         Returns:
-            Tuple[List[List[float]], List[str], List[dict]]: Filtered vectors, texts, and metadata.
+            List[List[dict]]: The results of every query (see `query_index`), in the order of the queries.
+
+        Raises:
+            ValueError: If the specified index does not exist, if filter is invalid, if the queries (or the prefix dimension)
+                don't match the index dimension, or if the index has no HNSW graph for "hnsw" or no trained IVF for "ivf".
+            NotImplementedError: If the specified algorithm is not implemented.
+        """
+        index_data, lock = self._index_lock(index_name)
+
+        # Validate and compile the filter
+        plan = compile_filter(filter)
+
+        if algorithm not in self.ALGORITHMS:
+            raise NotImplementedError(f"Algorithm '{algorithm}' is not implemented")
+        prefix = self._matryoshka_prefix(index_data, prefix_dimension, shortlist_multiplier) if algorithm == "matryoshka" else None
+
+        queries = np.asarray(query_vectors, dtype=np.float32)
+        if queries.size == 0:
+            return [[] for _ in query_vectors]
+        if queries.ndim != 2 or queries.shape[1] != index_data.dimension:
+            raise ValueError(f"Query vectors must all have the index dimension {index_data.dimension}")
+
+        with lock.read():
+            if len(index_data) == 0:
+                return [[] for _ in query_vectors]
+
+            rows = index_data.live_rows() if plan is None else plan.rows(index_data)
+
+            if rows.size == 0:
+                return [[] for _ in query_vectors]
+
+            k = rows.size if top_k is None else top_k
+
+            if algorithm == "hnsw":
+                return [
+                    self._build_results(index_data, *self._hnsw_search(index_name, index_data, query, k, distance, rows if plan else None, ef_search))
+                    for query in queries
+                ]
+            if algorithm == "ivf":
+                return [
+                    self._build_results(index_data, *self._ivf_search(index_name, index_data, query, k, distance, rows if plan else None, nprobe))
+                    for query in queries
+                ]
+
+            post_filter = plan is not None and plan.estimate(index_data) > genai_config.VECTORSTORE_FILTER_POSTFILTER_SELECTIVITY * index_data.size
+            if algorithm == "hierarchical":
+                index_data.weighted_norms(decay_factor)
+            elif algorithm == "matryoshka":
+                index_data.prefix_norms(prefix[0])
+            snapshot = index_data.snapshot()
+
+        if algorithm == "linear" and snapshot.is_quantized:
+            # NOTE: The asymmetric distances of the quantizer are computed one query at a time
+            return [
+                self._build_results(snapshot, *self._brute_force_search(snapshot, query, k, algorithm, distance, decay_factor, rows, post_filter))
+                for query in queries
+            ]
+
+        rows, scores = self._brute_force_search_batch(snapshot, queries, k, algorithm, distance, decay_factor, rows, post_filter, prefix)
+        return [self._build_results(snapshot, query_rows, query_scores) for query_rows, query_scores in zip(rows, scores)]
+
+    def _matryoshka_prefix(self, index_data: ColumnarIndex, prefix_dimension: Optional[int], shortlist_multiplier: Optional[int]) -> Tuple[int, int]:
+        """
+        (prefix dimension, shortlist multiplier) of a matryoshka search, with their defaults.
+
+        Raises:
+            ValueError: If the prefix dimension is not between 1 and the index dimension, or the multiplier is below 1.
         """
-        if not filter_dict:
-            return vectors, texts, metadata
+        if prefix_dimension is None:
+            prefix_dimension = min(genai_config.VECTORSTORE_MATRYOSHKA_PREFIX_DIMENSION, index_data.dimension)
+        if shortlist_multiplier is None:
+            shortlist_multiplier = genai_config.VECTORSTORE_MATRYOSHKA_SHORTLIST_MULTIPLIER
+
+        if not 1 <= prefix_dimension <= index_data.dimension:
+            raise ValueError(f"Prefix dimension must be between 1 and the index dimension {index_data.dimension}, got {prefix_dimension}")
+        if shortlist_multiplier < 1:
+            raise ValueError(f"Shortlist multiplier must be at least 1, got {shortlist_multiplier}")
+        return prefix_dimension, shortlist_multiplier
+
+    def _brute_force_search(
+        self,
+        index_data: ColumnarIndex,
+        query_vector: List[float],
+        k: int,
+        algorithm: str,
+        distance: str,
+        decay_factor: Optional[float],
+        rows: np.ndarray,
+        post_filter: bool = False,
+        prefix: Optional[Tuple[int, int]] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Score the query against every candidate row and keep the top-k (rows and scores, best first).
+
+        Large scans are split into shards of contiguous candidate rows that are scored in parallel on
+        the scan thread pool (NumPy/BLAS release the GIL), then the top-k of every shard are merged.
+        """
+        shards = self._shards(rows)
+        if len(shards) == 1:
+            return self._scan(index_data, query_vector, k, algorithm, distance, decay_factor, rows, post_filter, prefix)
+
+        results = list(self._scan_pool.map(
+            lambda shard: self._scan(index_data, query_vector, k, algorithm, distance, decay_factor, shard, post_filter, prefix),
+            shards,
+        ))
+        rows = np.concatenate([shard_rows for shard_rows, _ in results])
+        scores = np.concatenate([shard_scores for _, shard_scores in results])
+
+        winners = top_k_indices(scores, k, largest=distance.lower() == "cosine")
+        return rows[winners], scores[winners]
+
+    def _brute_force_search_batch(
+        self,
+        index_data: ColumnarIndex,
+        queries: np.ndarray,
+        k: int,
+        algorithm: str,
+        distance: str,
+        decay_factor: Optional[float],
+        rows: np.ndarray,
+        post_filter: bool = False,
+        prefix: Optional[Tuple[int, int]] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        `_brute_force_search` of a (q, d) matrix of queries: (q, k) rows and scores, best first for every query.
+        """
+        shards = self._shards(rows)
+        if len(shards) == 1:
+            return self._scan_batch(index_data, queries, k, algorithm, distance, decay_factor, rows, post_filter, prefix)
+
+        results = list(self._scan_pool.map(
+            lambda shard: self._scan_batch(index_data, queries, k, algorithm, distance, decay_factor, shard, post_filter, prefix),
+            shards,
+        ))
+        rows = np.concatenate([shard_rows for shard_rows, _ in results], axis=1)
+        scores = np.concatenate([shard_scores for _, shard_scores in results], axis=1)
+
+        winners = top_k_indices_batch(scores, k, largest=distance.lower() == "cosine")
+        return np.take_along_axis(rows, winners, axis=1), np.take_along_axis(scores, winners, axis=1)
+
+    def _scan_batch(
+        self,
+        index_data: ColumnarIndex,
+        queries: np.ndarray,
+        k: int,
+        algorithm: str,
+        distance: str,
+        decay_factor: Optional[float],
+        rows: np.ndarray,
+        post_filter: bool,
+        prefix: Optional[Tuple[int, int]] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        `_scan` of a (q, d) matrix of queries against some (sorted) candidate rows.
+
+        The candidates are scored in blocks of VECTORSTORE_BATCH_SEARCH_BLOCK scores, each with a single
+        matrix-matrix product, and the top-k of every block are merged into the running top-k of each query.
+        Matryoshka searches keep the top `k * shortlist_multiplier` prefix scores instead, and re-rank them
+        with all the dimensions query by query.
+        """
+        if algorithm == "hierarchical":
+            knn = HierarchicalKNN(distance_metric=distance.lower(), decay_factor=decay_factor)
+        else:
+            knn = LinearKNN(distance_metric=distance.lower())
+
+        largest = distance.lower() == "cosine"
+        final_k = k
+        if algorithm == "matryoshka":
+            prefix_dimension, shortlist_multiplier = prefix
+            full_queries, queries = queries, queries[:, :prefix_dimension]
+            k = k * shortlist_multiplier
+        block_size = max(genai_config.VECTORSTORE_BATCH_SEARCH_BLOCK // queries.shape[0], 1)
+        best_rows = np.empty((queries.shape[0], 0), dtype=np.int64)
+        best_scores = np.empty((queries.shape[0], 0), dtype=np.float32)
+
+        for block_start in range(0, rows.size, block_size):
+            block = rows[block_start:block_start + block_size]
+            start, end = int(block[0]), int(block[-1]) + 1
+            in_place = post_filter or block.size == end - start
+            span = slice(start, end) if in_place else block
+
+            if algorithm == "linear":
+                scores = knn.score_batch(queries, index_data.get_vectors(span), index_data.norms[span])
+            elif algorithm == "matryoshka":
+                scores = knn.score_batch(queries, index_data.get_vectors(span, prefix=prefix_dimension), index_data.prefix_norms(prefix_dimension)[span])
+            else:
+                scores = knn.score_batch(queries, index_data.get_vectors(span), index_data.weighted_norms(decay_factor)[span])
+            if in_place and block.size < end - start:
+                scores = scores[:, block - start]
+
+            # NOTE: The blocks are in row order, so the ties of the merge are still broken by row
+            winners = top_k_indices_batch(scores, k, largest=largest)
+            best_rows = np.concatenate([best_rows, block[winners]], axis=1)
+            best_scores = np.concatenate([best_scores, np.take_along_axis(scores, winners, axis=1)], axis=1)
+            winners = top_k_indices_batch(best_scores, k, largest=largest)
+            best_rows = np.take_along_axis(best_rows, winners, axis=1)
+            best_scores = np.take_along_axis(best_scores, winners, axis=1)
+
+        if algorithm == "matryoshka":
+            # Re-rank the shortlist of every query with all the dimensions
+            reranked = [self._rerank(index_data, query, shortlist, final_k, knn, largest) for query, shortlist in zip(full_queries, best_rows)]
+            best_rows = np.stack([query_rows for query_rows, _ in reranked])
+            best_scores = np.stack([query_scores for _, query_scores in reranked])
+
+        return best_rows, best_scores
+
+    def _rerank(self, index_data: ColumnarIndex, query_vector: np.ndarray, rows: np.ndarray, k: int, knn: LinearKNN, largest: bool) -> Tuple[np.ndarray, np.ndarray]:
+        """Score a shortlist of candidate rows with their full-precision vectors and keep the top-k (rows and scores, best first)."""
+        scores = knn.score_batch(query_vector, index_data.get_vectors(rows), index_data.norms[rows])
+        winners = top_k_indices(scores, k, largest=largest)
+        return rows[winners], scores[winners]
+
+    def _shards(self, rows: np.ndarray) -> List[np.ndarray]:
+        """Split the candidate rows of a scan into VECTORSTORE_SCAN_SHARDS shards of at least VECTORSTORE_SCAN_MIN_SHARD_ROWS rows."""
+        n_shards = min(self._scan_shards, rows.size // max(genai_config.VECTORSTORE_SCAN_MIN_SHARD_ROWS, 1))
+        if n_shards <= 1:
+            return [rows]
+        return np.array_split(rows, n_shards)
+
+    def _scan(
+        self,
+        index_data: ColumnarIndex,
+        query_vector: List[float],
+        k: int,
+        algorithm: str,
+        distance: str,
+        decay_factor: Optional[float],
+        rows: np.ndarray,
+        post_filter: bool,
+        prefix: Optional[Tuple[int, int]] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Score the query against some (sorted) candidate rows and keep the top-k (rows and scores, best first).
+
+        Contiguous candidates are scored in place on their slice of the index. With `post_filter`, the
+        whole slice between the first and the last candidate is scored and the scores of the candidates are
+        picked afterwards, which is cheaper than gathering the candidate vectors when they are most of the slice.
+
+        Matryoshka searches (`prefix` = (prefix dimension, shortlist multiplier)) score the first dimensions of
+        every candidate, then re-rank the best `k * shortlist_multiplier` candidates with all the dimensions.
+        """
+        # Select the appropriate KNN class
+        if algorithm == "hierarchical":
+            knn = HierarchicalKNN(distance_metric=distance.lower(), decay_factor=decay_factor)
+        else:
+            knn = LinearKNN(distance_metric=distance.lower())
+
+        largest = distance.lower() == "cosine"
+        start, end = int(rows[0]), int(rows[-1]) + 1
+        span = slice(start, end)
+        in_place = post_filter or rows.size == end - start
+        post_filtered = in_place and rows.size < end - start
+        norms = index_data.norms[span] if in_place else index_data.norms[rows]
+
+        if algorithm == "linear" and index_data.is_quantized:
+            # Asymmetric distances between the full-precision query and the quantized rows
+            codes = index_data.codes[span] if in_place else index_data.codes[rows]
+            scores = index_data.quantizer.score(query_vector, codes, norms, distance.lower())
+            if post_filtered:
+                scores = scores[rows - start]
+            if not index_data.has_vectors:
+                winners = top_k_indices(scores, k, largest=largest)
+                return rows[winners], scores[winners]
+
+            # Re-rank a shortlist of the best candidates with the full-precision vectors
+            shortlist = top_k_indices(scores, k * index_data.quantizer.rerank_multiplier, largest=largest)
+            return self._rerank(index_data, query_vector, rows[shortlist], k, knn, largest)
+
+        if algorithm == "matryoshka":
+            # Coarse pass on the leading dimensions (a strided view of the rows when in place)
+            prefix_dimension, shortlist_multiplier = prefix
+            query_prefix = np.asarray(query_vector, dtype=np.float32)[:prefix_dimension]
+            prefix_norms = index_data.prefix_norms(prefix_dimension)
+            scores = knn.score_batch(
+                query_prefix,
+                index_data.get_vectors(span if in_place else rows, prefix=prefix_dimension),
+                prefix_norms[span] if in_place else prefix_norms[rows]
+            )
+            if post_filtered:
+                scores = scores[rows - start]
+
+            shortlist = top_k_indices(scores, k * shortlist_multiplier, largest=largest)
+            return self._rerank(index_data, query_vector, rows[shortlist], k, knn, largest)
+
+        # Score the query against all the candidate rows in a single batched call
+        # NOTE: Indexes that dropped their full-precision vectors are decoded from the codes
+        vectors = index_data.get_vectors(span if in_place else rows)
+
+        if algorithm == "linear":
+            scores = knn.score_batch(query_vector, vectors, norms)
+        else:
+            scores = knn.score_batch(query_vector, vectors, index_data.weighted_norms(decay_factor)[span if in_place else rows])
+        if post_filtered:
+            scores = scores[rows - start]
+
+        # Select the top-k rows without sorting all of them
+        # NOTE: For cosine similarity -> higher is better (descending)
+        # NOTE: For euclidean distance -> lower is better (ascending)
+        winners = top_k_indices(scores, k, largest=largest)
+
+        return rows[winners], scores[winners]
+
+    def _hnsw_search(
+        self,
+        index_name: str,
+        index_data: ColumnarIndex,
+        query_vector: List[float],
+        k: int,
+        distance: str,
+        rows: Optional[np.ndarray],
+        ef_search: Optional[int]
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Approximate top-k search on the HNSW graph of the index (rows and scores, best first)."""
+        hnsw = index_data.hnsw
+        if hnsw is None:
+            raise ValueError(f"Index '{index_name}' was not created with an 'hnsw' knn_vector method")
+        if distance.lower() != hnsw.distance_metric:
+            raise ValueError(
+                f"Index '{index_name}' HNSW graph was built for '{hnsw.distance_metric}' distance, not '{distance.lower()}'"
+            )
 
-        filtered_indices = [
-            i for i, meta in enumerate(metadata)
-            if all(meta.get(k) == v for k, v in filter_dict.items())
+        # Pre-filter: an exact scan of a few matching rows is cheaper (and exact) compared to a graph walk that skips most nodes
+        if rows is not None and rows.size <= genai_config.VECTORSTORE_FILTER_EXACT_SCAN_ROWS:
+            return self._brute_force_search(index_data, query_vector, k, "linear", distance, None, rows)
+
+        allowed = None
+        if rows is not None:
+            allowed = np.zeros(index_data.size, dtype=bool)
+            allowed[rows] = True
+
+        nodes, scores = hnsw.search(query_vector, index_data.vectors, index_data.norms, k, ef_search=ef_search, allowed=allowed)
+
+        # Rows not linked into the graph yet (see `link_hnsw`) are scanned exactly and merged with the graph results
+        linked = index_data.hnsw_size
+        if linked < index_data.size:
+            unlinked = np.arange(linked, index_data.size) if rows is None else rows[rows >= linked]
+            unlinked = unlinked[index_data.alive[unlinked]]
+            if unlinked.size:
+                unlinked, unlinked_scores = self._brute_force_search(index_data, query_vector, k, "linear", distance, None, unlinked)
+                nodes, scores = np.concatenate((nodes, unlinked)), np.concatenate((scores, unlinked_scores))
+                winners = top_k_indices(scores, k, largest=hnsw.distance_metric == "cosine")
+                nodes, scores = nodes[winners], scores[winners]
+
+        return nodes, scores
+
+    def _ivf_search(
+        self,
+        index_name: str,
+        index_data: ColumnarIndex,
+        query_vector: List[float],
+        k: int,
+        distance: str,
+        rows: Optional[np.ndarray],
+        nprobe: Optional[int]
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Exact top-k search restricted to the rows of the closest IVF lists (rows and scores, best first)."""
+        ivf = index_data.ivf
+        if ivf is None:
+            raise ValueError(f"Index '{index_name}' has no trained IVF, train it first")
+
+        if rows is not None and rows.size <= genai_config.VECTORSTORE_FILTER_EXACT_SCAN_ROWS:
+            return self._brute_force_search(index_data, query_vector, k, "linear", distance, None, rows)
+
+        candidates = ivf.candidates(query_vector, distance.lower(), nprobe)
+        candidates = candidates[index_data.alive[candidates]]
+        if rows is not None:
+            candidates = np.intersect1d(candidates, rows, assume_unique=True)
+
+        if candidates.size == 0:
+            return candidates, np.empty(0, dtype=np.float32)
+
+        return self._brute_force_search(index_data, query_vector, k, "linear", distance, None, candidates)
+
+    def _build_results(self, index_data: ColumnarIndex, rows: np.ndarray, scores: np.ndarray) -> List[dict]:
+        """Materialize the result dictionaries of the winning rows."""
+        texts = index_data.texts
+        metadata = index_data.metadata
+        return [
+            {
+                'id': metadata[row]['document_id'],
+                'score': score,
+                'text': texts[row],
+                'metadata': metadata[row]
+            }
+            for row, score in zip(rows.tolist(), scores.tolist())
         ]
-        
-        return (
-            [vectors[i] for i in filtered_indices],
-            [texts[i] for i in filtered_indices],
-            [metadata[i] for i in filtered_indices]
-        )
 
+    @staticmethod
+    def recall(results: List[List[dict]], exact_results: List[List[dict]]) -> float:
+        """
+        Recall of approximate searches (e.g. "matryoshka", "hnsw" or "ivf"): the fraction of the exact results
+        (e.g. of a "linear" search with the same parameters) that they found, averaged over the queries.
+
+        Args:
+            results (List[List[dict]]): Results of every query (see `query_index_batch`).
+            exact_results (List[List[dict]]): Exact results of the same queries.
+
+        Returns:
+            float: The recall, between 0 and 1 (1 if there are no exact results).
+        """
+        recalls = []
+        for query_results, query_exact in zip(results, exact_results):
+            if not query_exact:
+                continue
+            # NOTE: A chunk is identified by its document and its chunk id
+            found = {(r['metadata']['document_id'], r['metadata']['chunk_id']) for r in query_results}
+            recalls.append(sum((r['metadata']['document_id'], r['metadata']['chunk_id']) in found for r in query_exact) / len(query_exact))
+        return float(np.mean(recalls)) if recalls else 1.0
+
+
+    def apply_filter(self, index_data: ColumnarIndex, filter_dict: Optional[dict]) -> np.ndarray:
+        """
+        Select the rows of an index that match a metadata filter.
+
+        Args:
+            index_data (ColumnarIndex): Index whose rows are filtered.
+            filter_dict (dict): Filter (see `domain.search.filters` for the syntax).
+
+        Returns:
+            np.ndarray: Sorted positions of the matching live rows (all the live rows if there is no filter).
+
+        Raises:
+            ValueError: If the filter is invalid.
+        """
+        plan = compile_filter(filter_dict)
+        return index_data.live_rows() if plan is None else plan.rows(index_data)
+
+    def save(self, index_names: Optional[List[str]] = None) -> None:
+        """
+        Checkpoint indexes: write a snapshot of each one (see `infrastructure.persistence.snapshot` for
+        the format) and drop the records of its WAL contained in the snapshot. The snapshot is taken
+        under the index lock but written without it, so the index stays searchable and writable meanwhile.
+
+        Args:
+            index_names (Optional[List[str]], optional): Indexes to save. Defaults to all of them.
+
+        Raises:
+            ValueError: If the store has no persistence directory or an index does not exist.
+        """
+        self._check_writable()
+        if not self.persist_dir:
+            raise ValueError("The vector store has no persistence directory")
+
+        with self._lock:
+            names = list(self.indexes) if index_names is None else index_names
+
+        with self._save_lock:
+            for index_name in names:
+                index_data, lock = self._index_lock(index_name)
+                with lock.read():
+                    self._check_index(index_name, index_data)
+                    snapshot = index_data.snapshot(with_structures=True)
+                    version = self._versions[index_name]
+                    wal = self._wals[index_name]
+                    wal_lsn, wal_offset = wal.last_lsn, wal.size
+
+                # NOTE: The snapshot is written without holding the index lock, the writes made meanwhile stay in the WAL
+                started = time.monotonic()
+                save_index(snapshot, index_directory(self.persist_dir, index_name), wal_lsn)
+                wal.truncate(wal_offset)
+                self._published[index_name] = version
+                self._saved[index_name] = (time.monotonic(), time.monotonic() - started)
+
+        logger.info(f"Saved {len(names)} index(es) to '{self.persist_dir}'")
+
+    def load(self) -> None:
+        """
+        Recover the persisted indexes: load the current snapshot of each one and replay the records
+        of its WAL written after the snapshot. The vectors of the snapshots are memory-mapped, so only
+        the replay depends on the amount of data.
+
+        NOTE: A read-only store only loads the published snapshots (see `refresh`), the WAL belongs to the writer.
+        """
+        if not self.persist_dir:
+            return
+        if self.read_only:
+            self.refresh()
+            return
+        os.makedirs(self.persist_dir, exist_ok=True)
+
+        with self._lock:
+            for index_name in list_index_directories(self.persist_dir):
+                self._recover(index_name)
+
+    def _recover(self, index_name: str) -> None:
+        directory = index_directory(self.persist_dir, index_name)
+        manifest = read_manifest(directory)
+        index_data = load_index(directory) if manifest is not None else None
+        snapshot_lsn = manifest.get("wal_lsn", 0) if manifest is not None else 0
+
+        wal = self._open_wal(directory, last_lsn=snapshot_lsn)
+        replayed = 0
+        for lsn, operation, args in wal.records():
+            if lsn <= snapshot_lsn:
+                continue    # Already in the snapshot (crash between the snapshot and the WAL truncation)
+            if operation == "create_index":
+                index_data = self._new_index(*args)
+            elif operation == "delete_index":
+                index_data = None
+            elif index_data is not None:
+                self._apply(index_data, operation, args)
+            replayed += 1
+
+        if index_data is None:
+            # Deleted index, or created but never logged
+            wal.close()
+            delete_snapshot(directory)
+            return
+
+        self.indexes[index_name] = index_data
+        self._index_locks[index_name] = ReadWriteLock()
+        self._bump_version(index_name)
+        if manifest is not None and replayed == 0:
+            self._published[index_name] = self._versions[index_name]   # Nothing new to publish
+        self._wals[index_name] = wal
+        self._maybe_link_hnsw(index_name, index_data)   # Rows replayed from the WAL
+        self._maybe_train_quantizer(index_name, index_data)
+        logger.info(f"Recovered index '{index_name}' ({len(index_data)} chunks, {replayed} WAL records replayed)")
+
+    def publish(self, max_io_fraction: float = genai_config.VECTORSTORE_PUBLISH_MAX_IO_FRACTION) -> List[str]:
+        """
+        Writer: snapshot the indexes modified since their last snapshot, which makes the changes visible
+        to the read-only stores (search workers) following the persistence directory.
+
+        A snapshot rewrites the whole index (vectors, texts and metadata), so an index is only republished
+        once the time since its last snapshot is at least that snapshot's duration / `max_io_fraction`:
+        under continuous writes, small indexes are published on every call while big ones are published
+        less often, and writing snapshots takes at most that fraction of the writer's time.
+
+        Args:
+            max_io_fraction (float, optional): Fraction of the time spent writing snapshots, in (0, 1].
+                Defaults to VECTORSTORE_PUBLISH_MAX_IO_FRACTION.
+
+        Returns:
+            List[str]: Names of the published indexes.
+
+        Raises:
+            ValueError: If `max_io_fraction` is not in (0, 1].
+        """
+        if not 0 < max_io_fraction <= 1:
+            raise ValueError(f"'max_io_fraction' must be in (0, 1], got {max_io_fraction}")
+
+        now = time.monotonic()
+        with self._lock:
+            names = [
+                name for name, version in self._versions.items()
+                if self._published.get(name) != version and self._publish_due(name, now, max_io_fraction)
+            ]
+        if names:
+            self.save(names)
+        return names
+
+    def _publish_due(self, index_name: str, now: float, max_io_fraction: float) -> bool:
+        if index_name not in self._saved:
+            return True
+        saved_at, duration = self._saved[index_name]
+        return now - saved_at >= duration / max_io_fraction
+
+    def refresh(self) -> List[str]:
+        """
+        Reader: swap in the snapshot generations published since the last refresh (and drop the deleted
+        indexes). The new generation is memory-mapped next to the previous one, which the searches in
+        flight keep reading until they finish.
+
+        Returns:
+            List[str]: Names of the indexes (re)loaded.
+        """
+        names = list_index_directories(self.persist_dir, cleanup=False)
+        loaded = []
+        for index_name in names:
+            directory = index_directory(self.persist_dir, index_name)
+            try:
+                generation = current_generation(directory)
+                if generation is None:
+                    continue    # Created but not published yet
+                manifest = read_manifest(directory, generation)
+                key = (generation, manifest.get("snapshot_id"))
+                if self._generations.get(index_name) == key:
+                    continue
+                index_data = load_index(directory, generation)
+            except (OSError, ValueError) as e:
+                # NOTE: The generation was replaced (or the index deleted) while loading it, retried on the next refresh
+                logger.warning(f"Could not load the snapshot of index '{index_name}': {e}")
+                continue
+
+            with self._lock:
+                self.indexes[index_name] = index_data
+                self._index_locks[index_name] = ReadWriteLock()
+                self._generations[index_name] = key
+                self._bump_version(index_name)
+            loaded.append(index_name)
+
+        with self._lock:
+            for index_name in set(self.indexes) - set(names):
+                del self.indexes[index_name]
+                del self._index_locks[index_name]
+                del self._versions[index_name]
+                self._generations.pop(index_name, None)
+
+        if loaded:
+            logger.info(f"Loaded the new snapshot generation of {len(loaded)} index(es): {loaded}")
+        return loaded
+
+    def start_publishing(self, interval: float) -> None:
+        """Writer: `publish` the modified indexes every `interval` seconds in background (until `close`)."""
+        self._start_periodic(self.publish, interval, "vectorstore-publish")
+
+    def start_refresh(self, interval: float) -> None:
+        """Reader: `refresh` the indexes every `interval` seconds in background (until `close`)."""
+        self._start_periodic(self.refresh, interval, "vectorstore-refresh")
+
+    def _start_periodic(self, task, interval: float, name: str) -> None:
+        if interval <= 0:
+            return
+
+        def run() -> None:
+            while not self._stopped.wait(interval):
+                try:
+                    task()
+                except (OSError, ValueError) as e:
+                    logger.warning(f"{name} failed: {e}")
+
+        threading.Thread(target=run, name=name, daemon=True).start()
+
+    def _open_wal(self, directory: str, last_lsn: int = 0) -> WriteAheadLog:
+        return WriteAheadLog(
+            os.path.join(directory, WAL_FILE),
+            fsync_policy=genai_config.VECTORSTORE_WAL_FSYNC,
+            fsync_interval=genai_config.VECTORSTORE_WAL_FSYNC_INTERVAL,
+            last_lsn=last_lsn,
+        )
 
     def close(self) -> None:
         """Close the connection"""
-        # For in-memory store, just clear data
+        # The data is already persisted by the WAL, just release the files and clear the memory
+        self._stopped.set()
         with self._lock:
+            for wal in self._wals.values():
+                wal.close()
+            self._wals.clear()
             self.indexes.clear()
+            self._index_locks.clear()
+            self._versions.clear()
+            self._published.clear()
+            self._saved.clear()
+            self._generations.clear()
+        if self._scan_pool is not None:
+            self._scan_pool.shutdown(wait=False)
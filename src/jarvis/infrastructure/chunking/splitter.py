@@ -0,0 +1,228 @@
+"""
+Token-based text splitting.
+
+Texts are split into chunks of at most `max_tokens` tokens (tiktoken encoding of `CHUNK_ENCODING_MODEL`):
+
+    - consecutive chunks share `overlap` tokens,
+    - with `sentence_aware`, a chunk ends after the last sentence (or line) boundary of its window, unless
+    that would keep less than half of the window, instead of cutting a sentence in two.
+
+The encoding is loaded once per process. A batch of texts is encoded with a single `encode_ordinary_batch`
+call and all its chunks decoded with a single `decode_batch` call. Sentence boundaries are found on the token
+ids (lookup tables built once per encoding), so the text itself is never scanned again. Large batches are
+split across a pool of processes.
+"""
+
+import os
+import sys
+import logging
+import multiprocessing
+from functools import lru_cache
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Tuple
+
+import numpy as np
+import tiktoken
+
+# src
+sys.path.append("./")
+from src.jarvis.infrastructure.core.config import genai_config
+
+# logger
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Bytes that can follow the punctuation ending a sentence within the same token (closing quotes and brackets)
+_CLOSING = b"\"')]}\xe2\x80\x9d\xe2\x80\x99"
+
+
+@lru_cache(maxsize=None)
+def get_encoding(model_name: str = genai_config.CHUNK_ENCODING_MODEL) -> tiktoken.Encoding:
+    """tiktoken encoding of a model, loaded once per process."""
+    return tiktoken.encoding_for_model(model_name=model_name)  # Please see README.md -> Design decisions, for more information.
+
+
+@lru_cache(maxsize=None)
+def _boundary_tables(model_name: str) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Lookup tables over the token ids of an encoding (built once per process).
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray, np.ndarray]: Whether each token ends a line, ends with sentence
+            punctuation (".", "!", "?", possibly followed by closing quotes) and starts with whitespace.
+    """
+    encoding = get_encoding(model_name)
+    line_end = np.zeros(encoding.n_vocab, dtype=bool)
+    sentence_end = np.zeros(encoding.n_vocab, dtype=bool)
+    space_start = np.zeros(encoding.n_vocab, dtype=bool)
+    for token in range(encoding.n_vocab):
+        try:
+            value = encoding.decode_single_token_bytes(token)
+        except KeyError:
+            # NOTE: Some encodings have gaps in their token ids
+            continue
+        line_end[token] = value.endswith(b"\n")
+        sentence_end[token] = value.rstrip(_CLOSING)[-1:] in (b".", b"!", b"?")
+        space_start[token] = value[:1].isspace()
+    return line_end, sentence_end, space_start
+
+
+def _spans(tokens: List[int], max_tokens: int, overlap: int, sentence_aware: bool, model_name: str) -> List[Tuple[int, int]]:
+    """(start, end) token positions of the chunks of a text."""
+    n = len(tokens)
+    if n <= max_tokens:
+        return [(0, n)] if n else []
+
+    last_boundary = None
+    if sentence_aware:
+        line_end, sentence_end, space_start = _boundary_tables(model_name)
+        ids = np.asarray(tokens, dtype=np.int64)
+        # A token closes a sentence if it ends a line, or ends with punctuation followed by whitespace ("3.14" and "e.g." don't)
+        is_boundary = line_end[ids]
+        is_boundary[:-1] |= sentence_end[ids[:-1]] & space_start[ids[1:]]
+        # Position of the last boundary at or before every token (-1 if there is none)
+        last_boundary = np.maximum.accumulate(np.where(is_boundary, np.arange(n), -1))
+
+    spans = []
+    start = 0
+    while True:
+        end = min(start + max_tokens, n)
+        if last_boundary is not None and end < n:
+            cut = int(last_boundary[end - 1]) + 1
+            if cut - start >= max_tokens // 2:
+                end = cut
+        spans.append((start, end))
+        if end == n:
+            return spans
+        start = max(end - overlap, start + 1)
+
+
+def split_texts(texts: List[str], max_tokens: int, overlap: int = 0, sentence_aware: bool = False,
+                model_name: str = genai_config.CHUNK_ENCODING_MODEL) -> List[List[str]]:
+    """
+    Split texts into chunks in the current process.
+
+    Args:
+        texts (List[str]): Texts to split.
+        max_tokens (int): Maximum tokens per chunk.
+        overlap (int, optional): Tokens shared by consecutive chunks. Defaults to 0.
+        sentence_aware (bool, optional): End the chunks at sentence boundaries when possible. Defaults to False.
+        model_name (str, optional): Model whose tiktoken encoding is used.
+
+    Returns:
+        List[List[str]]: The chunks of each text.
+    """
+    encoding = get_encoding(model_name)
+    # NOTE: Special tokens (e.g. "<|endoftext|>") in user texts are encoded as plain text
+    encoded = encoding.encode_ordinary_batch(texts)
+
+    slices, counts = [], []
+    for tokens in encoded:
+        spans = _spans(tokens, max_tokens, overlap, sentence_aware, model_name)
+        slices.extend(tokens[start:end] for start, end in spans)
+        counts.append(len(spans))
+
+    decoded = encoding.decode_batch(slices)
+    chunks, offset = [], 0
+    for count in counts:
+        chunks.append(decoded[offset:offset + count])
+        offset += count
+    return chunks
+
+
+def _warm_up(model_name: str, sentence_aware: bool) -> None:
+    """Initializer of the pool processes: load the encoding (and the boundary tables) before the first batch."""
+    get_encoding(model_name)
+    if sentence_aware:
+        _boundary_tables(model_name)
+
+
+class TextSplitter:
+    """
+    Split texts into token chunks, fanning large batches out to a pool of processes.
+
+    Attributes:
+        max_tokens (int): Maximum tokens per chunk.
+        overlap (int): Tokens shared by consecutive chunks.
+        sentence_aware (bool): Whether the chunks end at sentence boundaries when possible.
+        model_name (str): Model whose tiktoken encoding is used.
+        processes (int): Processes of the pool (1 = batches are always split in the calling process).
+        parallel_min_chars (int): Characters of a batch below which it is split in the calling process.
+
+    Notes:
+        - Thread-safe. The pool is shared by all the callers and its processes are spawned on the first
+        large batch (with the "spawn" start method, since the API process runs threads).
+        - tiktoken's batch functions run on threads, but building the token lists and the chunk strings
+        holds the GIL, so a single process doesn't scale with the cores.
+    """
+
+    def __init__(
+        self,
+        max_tokens: int = genai_config.VECTORSTORE_CHUNK_SIZE,
+        overlap: int = genai_config.CHUNK_OVERLAP_TOKENS,
+        sentence_aware: bool = genai_config.CHUNK_SENTENCE_AWARE,
+        model_name: str = genai_config.CHUNK_ENCODING_MODEL,
+        processes: int = genai_config.CHUNK_PROCESSES,
+        parallel_min_chars: int = genai_config.CHUNK_PARALLEL_MIN_CHARS
+    ):
+        self._validate(max_tokens, overlap)
+
+        self.max_tokens = max_tokens
+        self.overlap = overlap
+        self.sentence_aware = sentence_aware
+        self.model_name = model_name
+        self.processes = processes or os.cpu_count() or 1
+        self.parallel_min_chars = parallel_min_chars
+        # NOTE: The processes are only started once a batch is submitted
+        self._pool = ProcessPoolExecutor(
+            max_workers=self.processes,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_warm_up,
+            initargs=(model_name, sentence_aware)
+        ) if self.processes > 1 else None
+
+    @staticmethod
+    def _validate(max_tokens: int, overlap: int) -> None:
+        if max_tokens < 1:
+            raise ValueError(f"Chunk 'max_tokens' must be at least 1, got {max_tokens}")
+        if not 0 <= overlap < max_tokens:
+            raise ValueError(f"Chunk 'overlap' must be between 0 and max_tokens - 1 ({max_tokens - 1}), got {overlap}")
+
+    def split(self, text: str, max_tokens: Optional[int] = None, overlap: Optional[int] = None) -> List[str]:
+        """Split a text into chunks (see `split_many`)."""
+        return self.split_many([text], max_tokens, overlap)[0]
+
+    def split_many(self, texts: List[str], max_tokens: Optional[int] = None, overlap: Optional[int] = None) -> List[List[str]]:
+        """
+        Split texts into chunks. Batches of at least `parallel_min_chars` characters are split in parallel
+        by the pool, as contiguous groups of texts with about the same number of characters.
+
+        Args:
+            texts (List[str]): Texts to split.
+            max_tokens (Optional[int], optional): Maximum tokens per chunk. Defaults to the splitter's.
+            overlap (Optional[int], optional): Tokens shared by consecutive chunks. Defaults to the splitter's.
+
+        Returns:
+            List[List[str]]: The chunks of each text, in order.
+        """
+        max_tokens = self.max_tokens if max_tokens is None else max_tokens
+        overlap = self.overlap if overlap is None else overlap
+        self._validate(max_tokens, overlap)
+
+        sizes = np.fromiter((len(text) for text in texts), dtype=np.int64, count=len(texts))
+        total = int(sizes.sum())
+        if self._pool is None or len(texts) < 2 or total < self.parallel_min_chars:
+            return split_texts(texts, max_tokens, overlap, self.sentence_aware, self.model_name)
+
+        # Cut the batch where the cumulative size crosses each multiple of total / processes
+        bounds = np.searchsorted(np.cumsum(sizes), np.arange(1, self.processes) * total / self.processes)
+        bounds = [0, *sorted(set(int(bound) + 1 for bound in bounds if bound + 1 < len(texts))), len(texts)]
+        futures = [
+            self._pool.submit(split_texts, texts[start:end], max_tokens, overlap, self.sentence_aware, self.model_name)
+            for start, end in zip(bounds[:-1], bounds[1:])
+        ]
+        return [chunks for future in futures for chunks in future.result()]
+
+    def close(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(cancel_futures=True)
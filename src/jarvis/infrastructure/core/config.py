@@ -29,18 +29,78 @@ class Config(BaseSettings):
     COHERE_INPUT_TYPE_INGESTOR: str = "search_document"  # Docs: # https://docs.cohere.com/v2/docs/embeddings
     COHERE_INPUT_TYPE_QUERY: str = "search_query"
     COHERE_EMB_DIMENSION: int = 1024
+    COHERE_EMB_BATCH_SIZE: int = 96     # Texts per embed call (Cohere's per-request limit)
+
+    # Embedding Pipeline Configuration (document uploads)
+    EMBEDDING_PROVIDER: str = "cohere"  # cohere, fake (deterministic local vectors, for tests)
+    EMBEDDING_FAKE_LATENCY: float = 0.0     # Simulated seconds per request of the fake provider
+    EMBEDDING_CONCURRENCY: int = 8      # Embed requests in flight at once (per process)
+    EMBEDDING_RATE_LIMIT: float = 10.0  # Embed requests started per second (0 = unlimited)
+    EMBEDDING_RATE_BURST: int = 10      # Requests that can be started at once after an idle period
+    EMBEDDING_MAX_RETRIES: int = 5      # Retries of a request after a rate limit, server or network error
+    EMBEDDING_BACKOFF_BASE: float = 0.5     # Seconds before the first retry, doubled on every retry
+    EMBEDDING_BACKOFF_MAX: float = 30.0     # Maximum seconds between retries
+    EMBEDDING_BULK_BATCH_SIZE: int = 64     # Documents of a bulk upload chunked, embedded and indexed together
+    EMBEDDING_CACHE_PATH: str = "./data/embedding_cache.sqlite3"    # Persistent embedding cache ("" = disabled)
+    EMBEDDING_CACHE_MAX_BYTES: int = 1024 ** 3  # Least recently used embeddings are evicted above this size
+
+    # Chunking Configuration (the chunk size is VECTORSTORE_CHUNK_SIZE tokens)
+    CHUNK_ENCODING_MODEL: str = "gpt-4o"    # Model whose tiktoken encoding counts the tokens
+    CHUNK_OVERLAP_TOKENS: int = 0       # Tokens shared by consecutive chunks of a document
+    CHUNK_SENTENCE_AWARE: bool = False  # End the chunks at the last sentence/line boundary of their window (if it keeps at least half of it)
+    CHUNK_PROCESSES: int = 0    # Processes that split the large batches of documents in parallel (0 = one per CPU core, 1 disables it)
+    CHUNK_PARALLEL_MIN_CHARS: int = 1_000_000   # Batches with fewer characters are split in the calling process
 
     # Vector Store Configuration
     VECTORSTORE_CHUNK_SIZE: int = 100
     VECTORSTORE_INDEX_NAME: str = "jarvis01"
     VECTORSTORE_TOP_K: int = 5
-    VECTORSTORE_ALGORITHM: str = "linear"   # linear, hierarchical
+    VECTORSTORE_ALGORITHM: str = "linear"   # linear, hierarchical, matryoshka, hnsw, ivf
     VECTORSTORE_DISTANCE: str = "euclidean" # euclidean, cosine
     VECTORSTORE_INDEX_BODY: str = "vectorstore_index_body.json"
+    VECTORSTORE_COMPACTION_THRESHOLD: float = 0.2   # Fraction of deleted (tombstoned) rows that triggers a compaction
+    VECTORSTORE_SCAN_SHARDS: int = 0    # Linear/hierarchical scans are split in up to this many shards scored in parallel (0 = one per CPU core, 1 disables it)
+    VECTORSTORE_SCAN_MIN_SHARD_ROWS: int = 32768    # Minimum rows per shard, smaller scans run in a single thread
+    VECTORSTORE_BATCH_SEARCH_BLOCK: int = 1 << 24   # Scores (queries x rows) computed at once by a batch search, bounds its memory
+    VECTORSTORE_FILTER_POSTFILTER_SELECTIVITY: float = 0.5  # Linear scans score the whole index in place when a filter keeps more than this fraction of the rows
+    VECTORSTORE_FILTER_EXACT_SCAN_ROWS: int = 10000     # hnsw/ivf searches do an exact scan of the matching rows when a filter keeps at most this many
+    VECTORSTORE_PERSIST_DIR: str = "./data/vectorstore"  # Snapshots + write-ahead logs, recovered on startup (empty disables it)
+    VECTORSTORE_WAL_FSYNC: str = "always"   # always (fsync before acknowledging a write, grouped across writers), interval, never
+    VECTORSTORE_WAL_FSYNC_INTERVAL: float = 1.0     # Seconds between background fsyncs with the "interval" policy
+    VECTORSTORE_WAL_CHECKPOINT_BYTES: int = 256 * 1024 * 1024   # Snapshot the index (and truncate its WAL) once the WAL is this big
+    VECTORSTORE_QUERY_CACHE_SIZE: int = 1024    # Text searches whose results are kept in an LRU cache (0 disables it)
+
+    # Multi-process Configuration (see `run.py --workers`)
+    VECTORSTORE_ROLE: str = "standalone"    # standalone, writer (owns the mutations, publishes snapshots), reader (read-only search worker)
+    VECTORSTORE_PUBLISH_INTERVAL: float = 2.0   # Writer: seconds between snapshots of the modified indexes (0 disables them)
+    VECTORSTORE_PUBLISH_MAX_IO_FRACTION: float = 0.05   # Writer: an index is republished at most every (last snapshot duration / this) seconds
+    VECTORSTORE_REFRESH_INTERVAL: float = 1.0   # Reader: seconds between checks for new snapshot generations
+    VECTORSTORE_WRITER_URL: str = ""    # Reader: URL the writes are redirected to (307), "" rejects them (403)
     
     # Hierarchical KNN Configuration
     VECTORSTORE_DECAY_FACTOR: float = 0.9
 
+    # Matryoshka Search Configuration (defaults, can be overridden per search)
+    VECTORSTORE_MATRYOSHKA_PREFIX_DIMENSION: int = 128  # Leading dimensions scored by the coarse pass
+    VECTORSTORE_MATRYOSHKA_SHORTLIST_MULTIPLIER: int = 10   # Candidates re-ranked with all the dimensions per requested result
+
+    # HNSW Configuration (defaults, can be overridden per index in the "method" of the knn_vector mapping)
+    VECTORSTORE_HNSW_M: int = 16
+    VECTORSTORE_HNSW_EF_CONSTRUCTION: int = 200
+    VECTORSTORE_HNSW_EF_SEARCH: int = 50
+
+    # IVF Configuration
+    VECTORSTORE_IVF_NLIST: int = 256
+    VECTORSTORE_IVF_NPROBE: int = 8
+    VECTORSTORE_IVF_TRAINING_POINTS_PER_LIST: int = 256  # Points sampled per list to train the k-means
+    VECTORSTORE_IVF_KMEANS_BATCH_SIZE: int = 1024
+    VECTORSTORE_IVF_KMEANS_MAX_ITER: int = 100
+    VECTORSTORE_IVF_RETRAIN_GROWTH: float = 0.5         # Retrain in background once the index grew by this fraction (0 disables it)
+
+    # Quantization Configuration (defaults, can be overridden per index in the "quantization" of the knn_vector mapping)
+    VECTORSTORE_QUANTIZATION_TRAINING_SIZE: int = 10000     # Vectors collected in full precision before training the quantizer
+    VECTORSTORE_QUANTIZATION_RERANK_MULTIPLIER: int = 4     # Candidates re-ranked with full precision per requested result
+
     model_config = ConfigDict(extra="ignore")
 
 genai_config = Config(
@@ -0,0 +1,127 @@
+import os
+import sqlite3
+import hashlib
+import logging
+import threading
+from typing import List, Optional
+
+import numpy as np
+
+# logger
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class EmbeddingCache:
+    """
+    Persistent content-addressed cache of embeddings (SQLite).
+
+    Every embedding is stored as raw float32 bytes under the SHA-256 of (model, input_type,
+    output_dimension, text), so re-embedding a text that was already embedded with the same
+    settings (unchanged chunks of an updated document, repeated queries) is a local lookup.
+
+    Notes:
+        - Least recently used entries are evicted once the stored vectors exceed `max_bytes`
+        (down to 90% of it, so evictions are not triggered on every insert).
+        - Thread-safe: a single connection is shared behind a lock.
+        - `hits` and `misses` count the texts looked up since the cache was opened.
+    """
+
+    def __init__(self, path: str, max_bytes: int):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings (key BLOB PRIMARY KEY, vector BLOB NOT NULL, last_used INTEGER NOT NULL)"
+        )
+        self._connection.execute("CREATE INDEX IF NOT EXISTS embeddings_last_used ON embeddings (last_used)")
+
+        # NOTE: Recency is a logical clock (incremented per access) rather than a timestamp
+        clock, size = self._connection.execute("SELECT MAX(last_used), SUM(LENGTH(vector)) FROM embeddings").fetchone()
+        self._clock = clock or 0
+        self._size = size or 0
+
+    @staticmethod
+    def key(model: str, input_type: str, dimension: int, text: str) -> bytes:
+        return hashlib.sha256("\x00".join((model, input_type, str(dimension), text)).encode("utf-8")).digest()
+
+    def get_many(self, model: str, input_type: str, dimension: int, texts: List[str]) -> List[Optional[List[float]]]:
+        """
+        Look up the embeddings of some texts.
+
+        Returns:
+            List[Optional[List[float]]]: The embedding of each text, None for the texts that are not cached.
+        """
+        keys = [self.key(model, input_type, dimension, text) for text in texts]
+        with self._lock:
+            found = {}
+            # NOTE: SQLite limits the number of parameters of a statement
+            for start in range(0, len(keys), 500):
+                batch = keys[start:start + 500]
+                placeholders = ",".join("?" * len(batch))
+                found.update(self._connection.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", batch
+                ).fetchall())
+
+            if found:
+                self._clock += 1
+                self._connection.executemany(
+                    "UPDATE embeddings SET last_used = ? WHERE key = ?", [(self._clock, key) for key in found]
+                )
+            self.hits += sum(key in found for key in keys)
+            self.misses += sum(key not in found for key in keys)
+
+        return [np.frombuffer(found[key], dtype=np.float32).tolist() if key in found else None for key in keys]
+
+    def put_many(self, model: str, input_type: str, dimension: int, texts: List[str], embeddings: List[List[float]]) -> None:
+        """Store the embeddings of some texts, evicting the least recently used entries if the cache is full."""
+        rows = [
+            (self.key(model, input_type, dimension, text), np.asarray(embedding, dtype=np.float32).tobytes())
+            for text, embedding in zip(texts, embeddings)
+        ]
+        with self._lock:
+            self._clock += 1
+            self._connection.execute("BEGIN")
+            for key, vector in rows:
+                previous = self._connection.execute("SELECT LENGTH(vector) FROM embeddings WHERE key = ?", (key,)).fetchone()
+                self._connection.execute(
+                    "INSERT OR REPLACE INTO embeddings (key, vector, last_used) VALUES (?, ?, ?)", (key, vector, self._clock)
+                )
+                self._size += len(vector) - (previous[0] if previous else 0)
+            self._connection.execute("COMMIT")
+
+            if self._size > self.max_bytes:
+                self._evict(int(0.9 * self.max_bytes))
+
+    def _evict(self, target_bytes: int) -> None:
+        evicted = []
+        cursor = self._connection.execute("SELECT key, LENGTH(vector) FROM embeddings ORDER BY last_used")
+        for key, size in cursor:
+            if self._size <= target_bytes:
+                break
+            evicted.append((key,))
+            self._size -= size
+        cursor.close()
+
+        self._connection.execute("BEGIN")
+        self._connection.executemany("DELETE FROM embeddings WHERE key = ?", evicted)
+        self._connection.execute("COMMIT")
+        logger.info(f"Evicted {len(evicted)} embedding(s) from the cache '{self.path}'")
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries = self._connection.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+            return {"hits": self.hits, "misses": self.misses, "entries": entries, "bytes": self._size}
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
+
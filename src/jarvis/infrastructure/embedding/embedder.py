@@ -0,0 +1,107 @@
+import sys
+import asyncio
+import hashlib
+from typing import List
+
+import cohere
+import httpx
+from cohere.errors import GatewayTimeoutError, InternalServerError, ServiceUnavailableError, TooManyRequestsError
+import numpy as np
+
+# src
+sys.path.append("./")
+from src.jarvis.infrastructure.core.config import genai_config
+
+
+class Embedder:
+    """
+    Asynchronous embedding provider: turns a batch of texts into one vector per text.
+
+    Attributes:
+        model (str): Name of the embedding model (part of the embedding cache keys).
+        dimension (int): Dimension of the embeddings.
+    """
+    model: str = ""
+    dimension: int = 0
+
+    async def embed(self, texts: List[str], input_type: str) -> List[List[float]]:
+        raise NotImplementedError
+
+    def is_retryable(self, error: Exception) -> bool:
+        """Whether a failed call is worth retrying (rate limits, server errors, network errors)."""
+        return isinstance(error, (asyncio.TimeoutError, ConnectionError))
+
+
+class CohereEmbedder(Embedder):
+    """Embedder backed by the asynchronous Cohere client."""
+
+    RETRYABLE_ERRORS = (
+        TooManyRequestsError,
+        InternalServerError,
+        ServiceUnavailableError,
+        GatewayTimeoutError,
+        httpx.TransportError,
+    )
+
+    def __init__(self, api_key: str = genai_config.COHERE_KEY, model: str = genai_config.COHERE_EMB_MODEL, dimension: int = genai_config.COHERE_EMB_DIMENSION):
+        self.client = cohere.AsyncClientV2(api_key=api_key)
+        self.model = model
+        self.dimension = dimension
+
+    async def embed(self, texts: List[str], input_type: str) -> List[List[float]]:
+        # NOTE: Retries are handled by the EmbeddingPipeline, which knows about the rate limit
+        response = await self.client.embed(
+            texts=texts,
+            model=self.model,
+            input_type=input_type,
+            output_dimension=self.dimension,
+            embedding_types=["float"],
+            request_options={"max_retries": 0},
+        )
+        return response.embeddings.float
+
+    def is_retryable(self, error: Exception) -> bool:
+        return isinstance(error, self.RETRYABLE_ERRORS) or super().is_retryable(error)
+
+
+class FakeEmbedder(Embedder):
+    """
+    Local embedder for tests and offline development: every text is mapped to a deterministic
+    pseudo-random unit vector (seeded with a hash of the text), after an optional simulated latency.
+    """
+
+    model = "fake"
+
+    def __init__(self, dimension: int = genai_config.COHERE_EMB_DIMENSION, latency: float = 0.0):
+        self.dimension = dimension
+        self.latency = latency
+        self.calls = 0
+
+    async def embed(self, texts: List[str], input_type: str) -> List[List[float]]:
+        self.calls += 1
+        if self.latency > 0:
+            await asyncio.sleep(self.latency)
+        return [self._vector(text).tolist() for text in texts]
+
+    def _vector(self, text: str) -> np.ndarray:
+        seed = int.from_bytes(hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest(), "little")
+        vector = np.random.default_rng(seed).standard_normal(self.dimension).astype(np.float32)
+        return vector / np.linalg.norm(vector)
+
+
+def build_embedder(provider: str = genai_config.EMBEDDING_PROVIDER) -> Embedder:
+    """
+    Build the embedder of a provider.
+
+    Args:
+        provider (str): "cohere" or "fake".
+
+    Returns:
+        Embedder: The embedder.
+    """
+    if provider == "cohere":
+        return CohereEmbedder()
+    elif provider == "fake":
+        return FakeEmbedder(latency=genai_config.EMBEDDING_FAKE_LATENCY)
+    else:
+        raise ValueError(f"Unsupported embedding provider '{provider}'. Supported providers are: {{'cohere', 'fake'}}")
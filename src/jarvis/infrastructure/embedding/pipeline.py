@@ -0,0 +1,151 @@
+"""
+Asynchronous embedding pipeline.
+
+Texts are split into batches (up to the provider's per-request limit) that are embedded concurrently:
+
+    - at most `concurrency` requests are in flight at once (shared by all the callers of the pipeline),
+    - requests are started at most at `rate_limit` per second, with bursts of `burst` (token bucket),
+    - failed requests are retried with exponential backoff (and jitter) when the error is transient.
+
+Texts found in the embedding cache (if any) are not sent to the provider, and the new embeddings are
+added to it. Batches are yielded as soon as they are embedded (not in order), so the caller can index them while
+the next ones are still in flight.
+"""
+
+import sys
+import time
+import random
+import asyncio
+import logging
+from typing import AsyncIterator, List, Optional, Tuple
+
+# src
+sys.path.append("./")
+from src.jarvis.infrastructure.core.config import genai_config
+from src.jarvis.infrastructure.embedding.cache import EmbeddingCache
+from src.jarvis.infrastructure.embedding.embedder import Embedder
+
+# logger
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """
+    Asynchronous token bucket: `acquire` waits until a token is available. Tokens are refilled at
+    `rate` per second, up to `capacity`. A rate of 0 disables the limit.
+    """
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = max(capacity, 1)
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        if self.rate <= 0:
+            return
+
+        # NOTE: The lock is held while sleeping, so the waiters are served in order
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+class EmbeddingPipeline:
+    """
+    Embed texts in concurrent, rate-limited and retried batches.
+
+    Attributes:
+        embedder (Embedder): Embedding provider.
+        cache (Optional[EmbeddingCache]): Cache of the embeddings (None disables it).
+        batch_size (int): Texts per request.
+        max_retries (int): Retries of a batch after a transient error.
+        backoff_base (float): Delay before the first retry, doubled on every retry.
+        backoff_max (float): Maximum delay between retries.
+    """
+
+    def __init__(
+        self,
+        embedder: Embedder,
+        cache: Optional[EmbeddingCache] = None,
+        batch_size: int = genai_config.COHERE_EMB_BATCH_SIZE,
+        concurrency: int = genai_config.EMBEDDING_CONCURRENCY,
+        rate_limit: float = genai_config.EMBEDDING_RATE_LIMIT,
+        burst: int = genai_config.EMBEDDING_RATE_BURST,
+        max_retries: int = genai_config.EMBEDDING_MAX_RETRIES,
+        backoff_base: float = genai_config.EMBEDDING_BACKOFF_BASE,
+        backoff_max: float = genai_config.EMBEDDING_BACKOFF_MAX
+    ):
+        if batch_size < 1 or concurrency < 1:
+            raise ValueError(f"Embedding 'batch_size' and 'concurrency' must be at least 1, got {batch_size} and {concurrency}")
+
+        self.embedder = embedder
+        self.cache = cache
+        self.batch_size = batch_size
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._bucket = TokenBucket(rate_limit, burst)
+
+    async def embed(self, texts: List[str], input_type: str) -> AsyncIterator[Tuple[List[int], List[List[float]]]]:
+        """
+        Embed texts in concurrent batches.
+
+        Args:
+            texts (List[str]): Texts to embed.
+            input_type (str): Input type of the provider (e.g. "search_document").
+
+        Yields:
+            Tuple[List[int], List[List[float]]]: Positions of the texts of a batch and their embeddings, as soon as
+                the batch is embedded. The cached texts come first, as a single batch.
+
+        Raises:
+            Exception: The error of the first batch that failed (after its retries). The other batches are cancelled.
+        """
+        missing = list(range(len(texts)))
+        if self.cache is not None and texts:
+            cached = await asyncio.to_thread(self.cache.get_many, self.embedder.model, input_type, self.embedder.dimension, texts)
+            hits = [i for i, embedding in enumerate(cached) if embedding is not None]
+            if hits:
+                yield hits, [cached[i] for i in hits]
+            missing = [i for i, embedding in enumerate(cached) if embedding is None]
+
+        batches = [missing[start:start + self.batch_size] for start in range(0, len(missing), self.batch_size)]
+        tasks = [asyncio.ensure_future(self._embed_batch(positions, [texts[i] for i in positions], input_type)) for positions in batches]
+        try:
+            for finished in asyncio.as_completed(tasks):
+                yield await finished
+        finally:
+            # Cancel the batches still in flight if a batch failed (or the caller stopped iterating)
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _embed_batch(self, positions: List[int], texts: List[str], input_type: str) -> Tuple[List[int], List[List[float]]]:
+        async with self._semaphore:
+            for attempt in range(self.max_retries + 1):
+                await self._bucket.acquire()
+                try:
+                    embeddings = await self.embedder.embed(texts, input_type)
+                except Exception as e:
+                    if attempt == self.max_retries or not self.embedder.is_retryable(e):
+                        raise
+                    delay = min(self.backoff_max, self.backoff_base * 2 ** attempt) * random.uniform(0.5, 1.0)
+                    logger.warning(f"Embedding a batch of {len(texts)} text(s) failed ({e!r}), retrying in {delay:.2f}s")
+                    await asyncio.sleep(delay)
+                    continue
+
+                if len(embeddings) != len(texts):
+                    raise ValueError(f"The embedder returned {len(embeddings)} embedding(s) for {len(texts)} text(s)")
+                if self.cache is not None:
+                    await asyncio.to_thread(self.cache.put_many, self.embedder.model, input_type, self.embedder.dimension, texts, embeddings)
+                return positions, embeddings
@@ -0,0 +1,291 @@
+"""
+On-disk snapshot format of a ColumnarIndex.
+
+Every index is stored in its own directory, which holds one or more snapshot generations and a
+CURRENT file naming the latest complete one:
+
+    <persist_dir>/<index_name>/
+        CURRENT                     # "snapshot-000003"
+        wal.log                     # Mutations since the current snapshot (see `wal.py`)
+        snapshot-000003/
+            manifest.json           # Format version, snapshot id, dimension, mappings, number of rows, ...
+            vectors.f32             # Raw (size, dimension) float32 matrix, memory-mapped on load
+            codes.u8                # Raw (size, code_size) uint8 quantized codes (quantized indexes only)
+            columns.npz             # norms, chunk_ids, document_ids, alive and the text offsets
+            texts.bin               # UTF-8 texts of all the rows, concatenated
+            documents.json          # Metadata of each document (shared by all of its rows)
+            structures.pkl          # HNSW graph (and the number of rows it holds), IVF and quantizer (if any)
+
+A new generation is fully written (and fsynced) before CURRENT is atomically replaced, so a crash
+while saving never leaves a half-written snapshot behind. The previous generation is kept, since
+other processes may still be loading it (e.g. the search workers of a read-only VectorStore, which
+follow the generations published by the writer process).
+"""
+
+import os
+import sys
+import json
+import pickle
+import shutil
+import logging
+from typing import List, Optional
+from uuid import UUID, uuid4
+
+import numpy as np
+
+# src
+sys.path.append("./")
+from src.jarvis.domain.search.vector_store.columnar_index import ColumnarIndex, stored_document_key
+
+# logger
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_FORMAT_VERSION = 1
+CURRENT_FILE = "CURRENT"
+GENERATION_PREFIX = "snapshot-"
+KEEP_GENERATIONS = 2
+
+
+def index_directory(persist_dir: str, index_name: str) -> str:
+    """Directory of the snapshots of an index.
+
+    Raises:
+        ValueError: If the index name can't be used as a directory name.
+    """
+    if not index_name or index_name.startswith(".") or os.sep in index_name or (os.altsep and os.altsep in index_name):
+        raise ValueError(f"Index name '{index_name}' can't be persisted, it must be a plain directory name")
+    return os.path.join(persist_dir, index_name)
+
+
+def _fsync_directory(directory: str) -> None:
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _write_bytes(path: str, data) -> None:
+    with open(path, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def _write_array(path: str, array: np.ndarray) -> None:
+    with open(path, "wb") as f:
+        np.ascontiguousarray(array).tofile(f)
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def current_generation(directory: str) -> Optional[str]:
+    """Name of the latest complete snapshot generation of an index directory (None if there is none)."""
+    try:
+        with open(os.path.join(directory, CURRENT_FILE)) as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def read_manifest(directory: str, generation: Optional[str] = None) -> Optional[dict]:
+    """Manifest of a snapshot generation of an index directory, the current one by default (None if there is no snapshot)."""
+    generation = generation or current_generation(directory)
+    if generation is None:
+        return None
+    with open(os.path.join(directory, generation, "manifest.json")) as f:
+        return json.load(f)
+
+
+def save_index(index: ColumnarIndex, directory: str, wal_lsn: int = 0) -> str:
+    """
+    Write a new snapshot generation of an index and make it the current one.
+
+    Args:
+        index (ColumnarIndex): Index to save. It must not be modified while it is saved (save a `snapshot` of it).
+        directory (str): Directory of the snapshots of the index.
+        wal_lsn (int, optional): LSN of the last WAL record contained in the snapshot. Defaults to 0.
+
+    Returns:
+        str: Path of the new snapshot generation.
+    """
+    os.makedirs(directory, exist_ok=True)
+    current = current_generation(directory)
+    number = int(current[len(GENERATION_PREFIX):]) + 1 if current else 1
+    generation = f"{GENERATION_PREFIX}{number:06d}"
+    path = os.path.join(directory, generation)
+    shutil.rmtree(path, ignore_errors=True)     # Leftover of a save that crashed
+    os.makedirs(path)
+
+    size = index.size
+    if index.has_vectors:
+        _write_array(os.path.join(path, "vectors.f32"), index.vectors)
+    if index.is_quantized:
+        _write_array(os.path.join(path, "codes.u8"), index.codes)
+
+    # Texts are concatenated in a single blob, sliced back with their byte offsets
+    encoded_texts = [text.encode("utf-8") for text in index.texts[:size]]
+    text_offsets = np.zeros(size + 1, dtype=np.int64)
+    np.cumsum([len(text) for text in encoded_texts], out=text_offsets[1:])
+    _write_bytes(os.path.join(path, "texts.bin"), b"".join(encoded_texts))
+
+    with open(os.path.join(path, "columns.npz"), "wb") as f:
+        np.savez(
+            f,
+            norms=index.norms,
+            chunk_ids=index.chunk_ids,
+            document_ids=index.document_ids,
+            alive=index.alive,
+            text_offsets=text_offsets,
+        )
+        f.flush()
+        os.fsync(f.fileno())
+
+    # NOTE: All the live rows of a document share its metadata, only the chunk id changes. The tombstoned rows of an
+    # updated document keep its old metadata, so the live rows are read first (dead rows only for deleted documents)
+    documents = {}
+    document_ids, metadata = index.document_ids.tolist(), index.metadata[:size]
+    for row in [*index.live_rows().tolist(), *range(size)]:
+        key = stored_document_key(document_ids[row]).hex()
+        if key not in documents:
+            documents[key] = {k: v for k, v in metadata[row].items() if k not in {"document_id", "chunk_id"}}
+    _write_bytes(os.path.join(path, "documents.json"), json.dumps(documents).encode("utf-8"))
+
+    _write_bytes(
+        os.path.join(path, "structures.pkl"),
+        pickle.dumps(
+            {"hnsw": index.hnsw, "hnsw_size": index.hnsw_size, "ivf": index.ivf, "quantizer": index.quantizer},
+            protocol=pickle.HIGHEST_PROTOCOL,
+        ),
+    )
+
+    manifest = {
+        "format_version": SNAPSHOT_FORMAT_VERSION,
+        "snapshot_id": uuid4().hex,     # Tells apart the generations of an index deleted and re-created under the same name
+        "dimension": index.dimension,
+        "mappings": index.mappings,
+        "size": size,
+        "has_vectors": index.has_vectors,
+        "code_size": index.codes.shape[1] if index.is_quantized else None,
+        "compaction_threshold": index.compaction_threshold,
+        "wal_lsn": wal_lsn,
+    }
+    _write_bytes(os.path.join(path, "manifest.json"), json.dumps(manifest, indent=2).encode("utf-8"))
+    _fsync_directory(path)
+
+    # Atomically switch to the new generation
+    pointer = os.path.join(directory, CURRENT_FILE + ".tmp")
+    _write_bytes(pointer, generation.encode("utf-8"))
+    os.replace(pointer, os.path.join(directory, CURRENT_FILE))
+    _fsync_directory(directory)
+
+    _remove_old_generations(directory)
+    return path
+
+
+def _remove_old_generations(directory: str) -> None:
+    generations = sorted(name for name in os.listdir(directory) if name.startswith(GENERATION_PREFIX))
+    for name in generations[:-KEEP_GENERATIONS]:
+        shutil.rmtree(os.path.join(directory, name), ignore_errors=True)
+
+
+def load_index(directory: str, generation: Optional[str] = None) -> ColumnarIndex:
+    """
+    Load a snapshot of an index. The vectors (and codes) are memory-mapped copy-on-write,
+    so loading doesn't read them and processes loading the same snapshot share them through the OS page cache.
+
+    Args:
+        directory (str): Directory of the snapshots of the index.
+        generation (Optional[str], optional): Snapshot generation to load. Defaults to the current one.
+
+    Returns:
+        ColumnarIndex: The restored index.
+
+    Raises:
+        ValueError: If the directory has no snapshot or its format is not supported.
+    """
+    generation = generation or current_generation(directory)
+    manifest = read_manifest(directory, generation)
+    if manifest is None:
+        raise ValueError(f"No snapshot found in '{directory}'")
+    path = os.path.join(directory, generation)
+
+    if manifest.get("format_version") != SNAPSHOT_FORMAT_VERSION:
+        raise ValueError(f"Unsupported snapshot format version {manifest.get('format_version')} in '{path}'")
+
+    size, dimension = manifest["size"], manifest["dimension"]
+
+    vectors, codes = None, None
+    if size > 0 and manifest["has_vectors"]:
+        vectors = np.memmap(os.path.join(path, "vectors.f32"), dtype=np.float32, mode="c", shape=(size, dimension))
+    if size > 0 and manifest["code_size"] is not None:
+        codes = np.memmap(os.path.join(path, "codes.u8"), dtype=np.uint8, mode="c", shape=(size, manifest["code_size"]))
+
+    with np.load(os.path.join(path, "columns.npz")) as columns:
+        norms = columns["norms"]
+        chunk_ids = columns["chunk_ids"]
+        document_ids = columns["document_ids"]
+        alive = columns["alive"]
+        text_offsets = columns["text_offsets"].tolist()
+
+    with open(os.path.join(path, "texts.bin"), "rb") as f:
+        blob = f.read()
+    texts = [blob[start:end].decode("utf-8") for start, end in zip(text_offsets[:-1], text_offsets[1:])]
+
+    with open(os.path.join(path, "documents.json")) as f:
+        documents = json.load(f)
+    metadata = [
+        {"document_id": UUID(bytes=key), **documents[key.hex()], "chunk_id": chunk_id}
+        for key, chunk_id in zip(map(stored_document_key, document_ids.tolist()), chunk_ids.tolist())
+    ]
+
+    with open(os.path.join(path, "structures.pkl"), "rb") as f:
+        structures = pickle.load(f)
+
+    return ColumnarIndex.from_columns(
+        dimension=dimension,
+        mappings=manifest["mappings"],
+        vectors=vectors,
+        codes=codes,
+        norms=norms,
+        chunk_ids=chunk_ids,
+        document_ids=document_ids,
+        alive=alive,
+        texts=texts,
+        metadata=metadata,
+        compaction_threshold=manifest["compaction_threshold"],
+        hnsw=structures["hnsw"],
+        quantizer=structures["quantizer"],
+        ivf=structures["ivf"],
+        hnsw_size=structures.get("hnsw_size"),  # NOTE: Older snapshots hold every row in the graph
+    )
+
+
+def list_index_directories(persist_dir: str, cleanup: bool = True) -> List[str]:
+    """Names of the index directories of a persistence directory, removing the leftovers of interrupted deletions (with `cleanup`)."""
+    if not os.path.isdir(persist_dir):
+        return []
+
+    names = []
+    for name in sorted(os.listdir(persist_dir)):
+        path = os.path.join(persist_dir, name)
+        if not os.path.isdir(path):
+            continue
+        if name.startswith("."):
+            if cleanup:
+                shutil.rmtree(path, ignore_errors=True)
+        else:
+            names.append(name)
+    return names
+
+
+def delete_snapshot(directory: str) -> None:
+    """Remove all the snapshots (and the WAL) of an index."""
+    if not os.path.isdir(directory):
+        return
+    # Renaming is atomic, so a crash in the middle of the removal can't leave a partial index behind
+    parent, name = os.path.split(os.path.normpath(directory))
+    trash = os.path.join(parent, f".{name}.deleted-{uuid4().hex}")
+    os.replace(directory, trash)
+    shutil.rmtree(trash, ignore_errors=True)
@@ -0,0 +1,192 @@
+"""
+Write-ahead log of the mutations of an index.
+
+Every mutation is appended as a framed record before it is applied in memory:
+
+    | payload length (uint32) | crc32 of the payload (uint32) | lsn (uint64) | payload (pickle) |
+
+LSNs (log sequence numbers) increase by one per record and keep increasing across checkpoints:
+a snapshot records the last LSN it contains, so recovery loads the snapshot and replays only the
+records after it. A torn record at the end of the file (crash in the middle of an append) fails
+its length/CRC check and is truncated when the log is reopened.
+"""
+
+import os
+import pickle
+import struct
+import logging
+import threading
+import zlib
+from typing import Any, Iterator, Optional, Tuple
+
+# logger
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+WAL_FILE = "wal.log"
+FSYNC_POLICIES = {"always", "interval", "never"}
+
+_HEADER = struct.Struct("<IIQ")
+
+
+def _fsync_directory(directory: str) -> None:
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class WriteAheadLog:
+    """
+    Append-only log file of one index.
+
+    Fsync policies:
+        - "always": `sync` returns once the record is on disk. Concurrent writers are group
+        committed: the thread that gets to fsync flushes everything appended so far, so a single
+        fsync acknowledges all the records written while the previous fsync was running.
+        - "interval": records are flushed to the OS on append (they survive a process crash) and
+        fsynced in background every `fsync_interval` seconds.
+        - "never": records are flushed to the OS on append, the OS decides when they hit the disk.
+    """
+
+    def __init__(self, path: str, fsync_policy: str = "always", fsync_interval: float = 1.0, last_lsn: int = 0):
+        if fsync_policy not in FSYNC_POLICIES:
+            raise ValueError(f"Unsupported WAL fsync policy '{fsync_policy}'. Supported policies are: {FSYNC_POLICIES}")
+
+        self.path = path
+        self.fsync_policy = fsync_policy
+        self.fsync_interval = fsync_interval
+        self._file = open(path, "ab")
+        self._last_lsn = last_lsn
+        self._synced_lsn = last_lsn
+        self._closed = False
+        self._lock = threading.Lock()        # Protects the appends
+        self._sync_lock = threading.Lock()   # Serializes the fsyncs (group commit)
+
+        self._stop = threading.Event()
+        if fsync_policy == "interval":
+            threading.Thread(target=self._sync_periodically, daemon=True).start()
+
+    @property
+    def last_lsn(self) -> int:
+        return self._last_lsn
+
+    @property
+    def size(self) -> int:
+        """Bytes written to the log since it was created or last truncated."""
+        return self._file.tell()
+
+    def records(self) -> Iterator[Tuple[int, str, Any]]:
+        """
+        Read the records of the log (lsn, operation, arguments), truncating a torn tail.
+        Must be called before the first append.
+        """
+        offset = 0
+        with open(self.path, "rb") as f:
+            while True:
+                header = f.read(_HEADER.size)
+                if not header:
+                    break
+                if len(header) < _HEADER.size:
+                    self._truncate_tail(offset)
+                    break
+
+                length, crc, lsn = _HEADER.unpack(header)
+                payload = f.read(length)
+                if len(payload) < length or zlib.crc32(payload) != crc:
+                    self._truncate_tail(offset)
+                    break
+
+                offset += _HEADER.size + length
+                self._last_lsn = self._synced_lsn = max(self._last_lsn, lsn)
+                operation, args = pickle.loads(payload)
+                yield lsn, operation, args
+
+    def _truncate_tail(self, offset: int) -> None:
+        logger.warning(f"Truncating the torn end of the WAL '{self.path}' at byte {offset}")
+        self._file.truncate(offset)
+        self._file.seek(0, os.SEEK_END)
+
+    def append(self, operation: str, args: Tuple) -> int:
+        """
+        Append a record to the log (it is not durable until `sync` returns).
+
+        Args:
+            operation (str): Name of the mutation.
+            args (Tuple): Arguments needed to replay it.
+
+        Returns:
+            int: LSN of the record.
+        """
+        payload = pickle.dumps((operation, args), protocol=pickle.HIGHEST_PROTOCOL)
+        with self._lock:
+            if self._closed:
+                raise ValueError(f"The WAL '{self.path}' is closed")
+            lsn = self._last_lsn + 1
+            self._file.write(_HEADER.pack(len(payload), zlib.crc32(payload), lsn) + payload)
+            if self.fsync_policy != "always":
+                self._file.flush()
+            self._last_lsn = lsn
+        return lsn
+
+    def sync(self, lsn: int) -> None:
+        """Wait until the record `lsn` is on disk (only with the "always" fsync policy)."""
+        if self.fsync_policy == "always":
+            self._fsync(lsn)
+
+    def _fsync(self, lsn: int) -> None:
+        with self._sync_lock:
+            # A fsync that ran while we were waiting may already cover the record
+            if self._synced_lsn >= lsn or self._closed:
+                return
+            with self._lock:
+                self._file.flush()
+                target = self._last_lsn
+            os.fsync(self._file.fileno())
+            self._synced_lsn = target
+
+    def _sync_periodically(self) -> None:
+        while not self._stop.wait(self.fsync_interval):
+            self._fsync(self._last_lsn)
+
+    def truncate(self, offset: Optional[int] = None) -> None:
+        """
+        Drop the records written before `offset` (all of them by default), once a snapshot that
+        contains them has been written.
+
+        The records after `offset` (appended while the snapshot was written) are copied to a new
+        file, which atomically replaces the log.
+
+        Args:
+            offset (Optional[int], optional): Value of `size` right after the last record of the snapshot. Defaults to None.
+        """
+        with self._sync_lock, self._lock:
+            self._file.flush()
+            if offset is None or offset >= self._file.tell():
+                self._file.truncate(0)
+                self._file.seek(0)
+                os.fsync(self._file.fileno())
+            else:
+                with open(self.path, "rb") as f:
+                    f.seek(offset)
+                    tail = f.read()
+                with open(self.path + ".tmp", "wb") as f:
+                    f.write(tail)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(self.path + ".tmp", self.path)
+                self._file.close()
+                self._file = open(self.path, "ab")
+                _fsync_directory(os.path.dirname(self.path) or ".")
+            self._synced_lsn = self._last_lsn
+
+    def close(self) -> None:
+        self._stop.set()
+        with self._sync_lock, self._lock:
+            if self._closed:
+                return
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._file.close()
+            self._closed = True
@@ -2,14 +2,15 @@ import sys
 import json
 import cohere
 import logging
-import tiktoken
-from typing import Optional
+from typing import Iterator, List, Optional, Tuple
 
 # src
 sys.path.append("./")
 from src.jarvis.domain.genai.document import Document, DocumentMetadata
 from src.jarvis.domain.genai.chunk import Chunk, ChunkMetadata
+from src.jarvis.infrastructure.chunking.splitter import TextSplitter
 from src.jarvis.infrastructure.core.config import genai_config
+from src.jarvis.infrastructure.embedding.cache import EmbeddingCache
 
 # logger
 logging.basicConfig(level=logging.INFO)
@@ -18,10 +19,12 @@ logger = logging.getLogger(__name__)
 
 class Ingestor:
     """Ingestor class for handling data ingestion from JSON files."""
-    def __init__(self, auto_ingest: Optional[bool] = False):
+    def __init__(self, auto_ingest: Optional[bool] = False, cache: Optional[EmbeddingCache] = None, splitter: Optional[TextSplitter] = None):
         self.data = []
         self.client = cohere.ClientV2(api_key=genai_config.COHERE_KEY)
         self.model = genai_config.COHERE_EMB_MODEL
+        self.cache = cache
+        self.splitter = splitter or TextSplitter()
 
         if auto_ingest:
             self.extract_data_from_json()
@@ -48,41 +51,102 @@ class Ingestor:
 
                 self.data.append(document)
 
-    def chunk_generator(self, max_tokens: int = 100):
-        enc = tiktoken.encoding_for_model(model_name="gpt-4o")  # Please see README.md -> Design decisions, for more information.
-
-        for document in self.data:
-            full_text = document.full_text
-            tokens = enc.encode(full_text)
-
-            for i in range(0, len(tokens), max_tokens):
-                chunk_tokens = tokens[i:i + max_tokens]
-                chunk_text = enc.decode(chunk_tokens)
-                chunk_index = i // max_tokens
-
-                # Get embedding for this chunk
-                logger.info(f"Getting embeddings with Cohere API for the chunk {chunk_index} of the document {document.metadata.title}")
-                embedding_response = self.client.embed(
-                    texts=[chunk_text],
-                    model=self.model,
-                    input_type=genai_config.COHERE_INPUT_TYPE_INGESTOR,
-                    output_dimension=genai_config.COHERE_EMB_DIMENSION,
-                    embedding_types=["float"]
-                )
-                embedding = embedding_response.embeddings.float[0]
-
-                chunk = Chunk(
-                    text=chunk_text,
-                    embedding=embedding,
-                    metadata=ChunkMetadata(
-                        document_id=document.metadata.document_id,
-                        chunk_id=chunk_index,
-                    )
+    def split_text(self, full_text: str, max_tokens: Optional[int] = None) -> List[str]:
+        """Split a text into chunks of at most `max_tokens` tokens (defaults to VECTORSTORE_CHUNK_SIZE)."""
+        return self.splitter.split(full_text, max_tokens)
+
+    def split_texts(self, texts: List[str], max_tokens: Optional[int] = None) -> List[List[str]]:
+        """Split texts into chunks of at most `max_tokens` tokens, in parallel processes if the batch is large (see `TextSplitter`)."""
+        return self.splitter.split_many(texts, max_tokens)
+
+    def chunk_generator(self, max_tokens: Optional[int] = None, batch_size: Optional[int] = None) -> Iterator[Chunk]:
+        """
+        Split the documents into chunks of `max_tokens` tokens, embed them and yield them in order.
+
+        All the documents are split together by the text splitter (in parallel processes if they are large).
+
+        Chunks are embedded in batches (across documents) with a single Cohere API call per batch,
+        instead of one round trip per chunk. They are still yielded lazily, one batch at a time.
+
+        Args:
+            max_tokens (Optional[int], optional): Tokens per chunk. Defaults to VECTORSTORE_CHUNK_SIZE.
+            batch_size (Optional[int], optional): Chunks embedded per API call. Defaults to COHERE_EMB_BATCH_SIZE.
+
+        Yields:
+            Chunk: The embedded chunks, also added to their document.
+        """
+        batch_size = batch_size or genai_config.COHERE_EMB_BATCH_SIZE
+
+        pending: List[Tuple[Document, int, str]] = []  # (document, chunk index, chunk text) waiting for their embedding
+        chunked = self.split_texts([document.full_text for document in self.data], max_tokens)
+        for document, chunk_texts in zip(self.data, chunked):
+            for chunk_index, chunk_text in enumerate(chunk_texts):
+                pending.append((document, chunk_index, chunk_text))
+
+                if len(pending) >= batch_size:
+                    yield from self._embed_chunks(pending)
+                    pending = []
+
+        if pending:
+            yield from self._embed_chunks(pending)
+
+    def embed_texts(self, texts: List[str], input_type: str) -> List[List[float]]:
+        """
+        Embed texts with one Cohere API call per COHERE_EMB_BATCH_SIZE texts, skipping the ones found in the embedding cache.
+
+        Args:
+            texts (List[str]): Texts to embed.
+            input_type (str): Cohere input type (e.g. "search_document" or "search_query").
+
+        Returns:
+            List[List[float]]: The embedding of each text.
+        """
+        dimension = genai_config.COHERE_EMB_DIMENSION
+        embeddings = [None] * len(texts) if self.cache is None else self.cache.get_many(self.model, input_type, dimension, texts)
+        missing = [i for i, embedding in enumerate(embeddings) if embedding is None]
+        if not missing:
+            return embeddings
+
+        logger.info(f"Getting embeddings with Cohere API for {len(missing)} text(s) ({len(texts) - len(missing)} cached)")
+        batch_size = genai_config.COHERE_EMB_BATCH_SIZE
+        for start in range(0, len(missing), batch_size):
+            batch = missing[start:start + batch_size]
+            batch_texts = [texts[i] for i in batch]
+            embedding_response = self.client.embed(
+                texts=batch_texts,
+                model=self.model,
+                input_type=input_type,
+                output_dimension=dimension,
+                embedding_types=["float"]
+            )
+            for i, embedding in zip(batch, embedding_response.embeddings.float):
+                embeddings[i] = embedding
+
+            if self.cache is not None:
+                self.cache.put_many(self.model, input_type, dimension, batch_texts, embedding_response.embeddings.float)
+        return embeddings
+
+    def _embed_chunks(self, pending: List[Tuple[Document, int, str]]) -> Iterator[Chunk]:
+        """Embed a batch of chunks in a single Cohere API call, add them to their documents and yield them in order."""
+        embeddings = self.embed_texts([chunk_text for _, _, chunk_text in pending], genai_config.COHERE_INPUT_TYPE_INGESTOR)
+
+        for (document, chunk_index, chunk_text), embedding in zip(pending, embeddings):
+            chunk = Chunk(
+                text=chunk_text,
+                embedding=embedding,
+                metadata=ChunkMetadata(
+                    document_id=document.metadata.document_id,
+                    chunk_id=chunk_index,
                 )
+            )
+
+            document.add_chunk(chunk)
 
-                document.add_chunk(chunk)
+            yield chunk
 
-                yield chunk
+    def close(self) -> None:
+        """Stop the processes of the text splitter."""
+        self.splitter.close()
 
 if __name__ == "__main__":
     # === Ingestor ===
@@ -1,6 +1,7 @@
 import logging
 from typing import List, Dict, Any, Optional
 
+from src.jarvis.domain.search.result_cache import QueryResultCache
 from src.jarvis.infrastructure.core.config import genai_config
 
 # logger
@@ -9,9 +10,10 @@ logger = logging.getLogger(__name__)
 
 class Retrieval:
     """Retrieval class for handling search operations using a vector store."""
-    def __init__(self, vector_store, ingestor):
+    def __init__(self, vector_store, ingestor, result_cache: Optional[QueryResultCache] = None):
         self.vector_store = vector_store
         self.ingestor = ingestor
+        self.result_cache = result_cache
 
     def search_by_text(
         self,
@@ -21,21 +23,33 @@ class Retrieval:
         algorithm: str = genai_config.VECTORSTORE_ALGORITHM,
         distance: str = genai_config.VECTORSTORE_DISTANCE,
         decay_factor: float = genai_config.VECTORSTORE_DECAY_FACTOR,
-        filter: Optional[dict] = None
+        filter: Optional[dict] = None,
+        ef_search: Optional[int] = None,
+        nprobe: Optional[int] = None,
+        prefix_dimension: Optional[int] = None,
+        shortlist_multiplier: Optional[int] = None
     ) -> List[Dict[str, Any]]:
-        """Search by converting text to vector first."""
-        
+        """Search by converting text to vector first.
+
+        Results are cached (if there is a result cache) until the index is modified.
+        """
+        query_text = " ".join(query_text.split())
+
+        cache_key = None
+        if self.result_cache is not None:
+            cache_key = self.result_cache.key(
+                index_name, self.vector_store.index_version(index_name), query_text, filter,
+                top_k=top_k, algorithm=algorithm, distance=distance, decay_factor=decay_factor, ef_search=ef_search, nprobe=nprobe,
+                prefix_dimension=prefix_dimension, shortlist_multiplier=shortlist_multiplier
+            )
+            results = self.result_cache.get(cache_key)
+            if results is not None:
+                return results
+
         # Convert text to vector using the ingestor's embedding model
+        # (repeated queries are served by the embedding cache)
         logger.info(f"Converting query text to vector using {self.ingestor.model}")
-
-        embedding_response = self.ingestor.client.embed(
-            texts=[query_text],
-            model=self.ingestor.model,
-            input_type=genai_config.COHERE_INPUT_TYPE_QUERY,
-            output_dimension=genai_config.COHERE_EMB_DIMENSION,
-            embedding_types=["float"]
-        )
-        query_vector = embedding_response.embeddings.float[0]
+        query_vector = self.ingestor.embed_texts([query_text], genai_config.COHERE_INPUT_TYPE_QUERY)[0]
 
         results = self.vector_store.query_index(
             index_name=index_name,
@@ -44,7 +58,73 @@ class Retrieval:
             algorithm=algorithm,
             distance=distance,
             decay_factor=decay_factor,
-            filter=filter
+            filter=filter,
+            ef_search=ef_search,
+            nprobe=nprobe,
+            prefix_dimension=prefix_dimension,
+            shortlist_multiplier=shortlist_multiplier
+        )
+
+        if cache_key is not None:
+            self.result_cache.put(cache_key, results)
+        return results
+
+    def search_batch_by_text(
+        self,
+        index_name: str,
+        query_texts: List[str],
+        top_k: int = genai_config.VECTORSTORE_TOP_K,
+        algorithm: str = genai_config.VECTORSTORE_ALGORITHM,
+        distance: str = genai_config.VECTORSTORE_DISTANCE,
+        decay_factor: float = genai_config.VECTORSTORE_DECAY_FACTOR,
+        filter: Optional[dict] = None,
+        ef_search: Optional[int] = None,
+        nprobe: Optional[int] = None,
+        prefix_dimension: Optional[int] = None,
+        shortlist_multiplier: Optional[int] = None
+    ) -> List[List[Dict[str, Any]]]:
+        """Search several queries at once: the queries missing from the result cache are embedded in batches
+        and scored together (see `VectorStore.query_index_batch`). Returns the results of every query, in order.
+        """
+        query_texts = [" ".join(query_text.split()) for query_text in query_texts]
+
+        results: List[Optional[List[Dict[str, Any]]]] = [None] * len(query_texts)
+        cache_keys = [None] * len(query_texts)
+        if self.result_cache is not None:
+            version = self.vector_store.index_version(index_name)
+            cache_keys = [
+                self.result_cache.key(
+                    index_name, version, query_text, filter,
+                    top_k=top_k, algorithm=algorithm, distance=distance, decay_factor=decay_factor, ef_search=ef_search, nprobe=nprobe,
+                prefix_dimension=prefix_dimension, shortlist_multiplier=shortlist_multiplier
+                )
+                for query_text in query_texts
+            ]
+            results = [self.result_cache.get(cache_key) for cache_key in cache_keys]
+
+        missing = [i for i, query_results in enumerate(results) if query_results is None]
+        if not missing:
+            return results
+
+        logger.info(f"Converting {len(missing)} query text(s) to vectors using {self.ingestor.model}")
+        query_vectors = self.ingestor.embed_texts([query_texts[i] for i in missing], genai_config.COHERE_INPUT_TYPE_QUERY)
+
+        batch_results = self.vector_store.query_index_batch(
+            index_name=index_name,
+            query_vectors=query_vectors,
+            top_k=top_k,
+            algorithm=algorithm,
+            distance=distance,
+            decay_factor=decay_factor,
+            filter=filter,
+            ef_search=ef_search,
+            nprobe=nprobe,
+            prefix_dimension=prefix_dimension,
+            shortlist_multiplier=shortlist_multiplier
         )
 
+        for i, query_results in zip(missing, batch_results):
+            results[i] = query_results
+            if cache_keys[i] is not None:
+                self.result_cache.put(cache_keys[i], query_results)
         return results
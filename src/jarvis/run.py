@@ -1,10 +1,20 @@
 #!/usr/bin/env python3
 """
 Startup script for the JARVIS API
+
+With --workers N > 1 the API runs in multi-process mode: a writer process (on --writer-port) owns
+the mutations of the vector store and publishes snapshots of the modified indexes, while N search
+workers (on --port) serve the searches from the memory-mapped snapshots, which they share through
+the OS page cache. The workers redirect the writes to --writer-url (or reject them if it is not set).
 """
+import os
+import sys
 import uvicorn
 import argparse
 import logging
+import subprocess
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
 
 def main():
     parser = argparse.ArgumentParser(description="JARVIS API Server")
@@ -12,6 +22,9 @@ def main():
     parser.add_argument("--port", type=int, default=8000, help="Port to bind to")
     parser.add_argument("--reload", action="store_true", help="Enable auto-reload for development")
     parser.add_argument("--log-level", default="info", choices=["debug", "info", "warning", "error"])
+    parser.add_argument("--workers", type=int, default=int(os.environ.get("WEB_CONCURRENCY", 1)), help="Search worker processes (> 1 starts a writer process too)")
+    parser.add_argument("--writer-port", type=int, default=8001, help="Port of the writer process (multi-process mode)")
+    parser.add_argument("--writer-url", default=os.environ.get("VECTORSTORE_WRITER_URL", ""), help="URL the search workers redirect the writes to (multi-process mode)")
     
     args = parser.parse_args()
     
@@ -20,14 +33,43 @@ def main():
         level=getattr(logging, args.log_level.upper()),
         format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
     )
-    
-    uvicorn.run(
-        "app.main:app",
-        host=args.host,
-        port=args.port,
-        reload=args.reload,
-        log_level=args.log_level
+
+    if args.workers <= 1:
+        uvicorn.run(
+            "app.main:app",
+            host=args.host,
+            port=args.port,
+            reload=args.reload,
+            log_level=args.log_level,
+            app_dir=APP_DIR
+        )
+        return
+
+    if args.reload:
+        parser.error("--reload is not supported with several workers")
+
+    # Single writer process, which owns the WAL and publishes the snapshots
+    writer = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--app-dir", APP_DIR,
+         "--host", args.host, "--port", str(args.writer_port), "--log-level", args.log_level],
+        env={**os.environ, "VECTORSTORE_ROLE": "writer", "WEB_CONCURRENCY": "1"},
     )
 
+    # Read-only search workers (the setting is inherited by the worker processes spawned by uvicorn)
+    os.environ["VECTORSTORE_ROLE"] = "reader"
+    os.environ["VECTORSTORE_WRITER_URL"] = args.writer_url
+    try:
+        uvicorn.run(
+            "app.main:app",
+            host=args.host,
+            port=args.port,
+            workers=args.workers,
+            log_level=args.log_level,
+            app_dir=APP_DIR
+        )
+    finally:
+        writer.terminate()
+        writer.wait()
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,82 @@
+import sys
+from typing import List, Optional
+
+import numpy as np
+import pytest
+import tiktoken
+
+# src
+sys.path.append("./")
+from src.jarvis.domain.genai.chunk import Chunk, ChunkMetadata
+from src.jarvis.domain.genai.document import Document, DocumentMetadata
+from src.jarvis.domain.search.vector_store.vector_store import VectorStore
+from src.jarvis.infrastructure.embedding.embedder import FakeEmbedder
+
+DIMENSION = 8
+
+
+def make_index_body(dimension: int = DIMENSION, method: Optional[dict] = None) -> dict:
+    vectors = {"type": "List[knn_vector]", "dimension": dimension}
+    if method is not None:
+        vectors["method"] = method
+    return {"mappings": {"properties": {"vectors": vectors}}}
+
+
+def random_vectors(n: int, dimension: int = DIMENSION, seed: int = 0) -> np.ndarray:
+    return np.random.default_rng(seed).standard_normal((n, dimension)).astype(np.float32)
+
+
+def make_document(title: str, n_chunks: int = 3, seed: int = 0, document: Optional[Document] = None,
+                  dimension: int = DIMENSION, author: str = "author", created_date: Optional[str] = None) -> Document:
+    """Document with random chunk vectors (a new version of `document` if given, same document id)."""
+    metadata = DocumentMetadata(title=title, author=author, created_date=created_date)
+    if document is not None:
+        metadata.document_id = document.metadata.document_id
+    new_document = Document(full_text=f"{title} " * n_chunks, chunks=[], metadata=metadata)
+    for chunk_id, vector in enumerate(random_vectors(n_chunks, dimension, seed)):
+        new_document.add_chunk(Chunk(
+            text=f"{title} chunk {chunk_id}",
+            embedding=vector.tolist(),
+            metadata=ChunkMetadata(document_id=metadata.document_id, chunk_id=chunk_id),
+        ))
+    return new_document
+
+
+class FakeIngestor:
+    """Ingestor stand-in that embeds texts with a FakeEmbedder and counts the calls."""
+    model = "fake"
+
+    def __init__(self, dimension: int = DIMENSION):
+        self.embedder = FakeEmbedder(dimension=dimension)
+        self.calls = 0
+
+    def embed_texts(self, texts: List[str], input_type: str) -> List[List[float]]:
+        self.calls += 1
+        return [self.embedder._vector(text).tolist() for text in texts]
+
+
+@pytest.fixture
+def byte_encoding(monkeypatch) -> tiktoken.Encoding:
+    """Byte-level tokenizer used instead of the gpt-4o one, whose ranks are downloaded on first use."""
+    encoding = tiktoken.Encoding(
+        "bytes",
+        pat_str=r"""'s|'t| ?\p{L}+| ?\p{N}+| ?[^\s\p{L}\p{N}]+|\s+""",
+        mergeable_ranks={bytes([i]): i for i in range(256)},
+        special_tokens={"<|endoftext|>": 256},
+    )
+    monkeypatch.setattr(tiktoken, "encoding_for_model", lambda model_name: encoding)
+    monkeypatch.setattr(tiktoken, "get_encoding", lambda encoding_name: encoding)
+    return encoding
+
+
+@pytest.fixture
+def persist_dir(tmp_path) -> str:
+    return str(tmp_path / "vectorstore")
+
+
+@pytest.fixture
+def store(persist_dir):
+    vector_store = VectorStore(persist_dir=persist_dir)
+    vector_store.load()
+    yield vector_store
+    vector_store.close()
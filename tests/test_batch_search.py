@@ -0,0 +1,102 @@
+import sys
+
+import numpy as np
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+# src
+sys.path.append("./")
+from src.jarvis.app.api.routes import search
+from src.jarvis.app.dependencies import get_retrieval_dependency, get_vector_store_dependency
+from src.jarvis.domain.search.algorithm.hierarchical_knn import HierarchicalKNN
+from src.jarvis.domain.search.algorithm.linear_knn import LinearKNN
+from src.jarvis.domain.search.result_cache import QueryResultCache
+from src.jarvis.domain.search.utils import top_k_indices, top_k_indices_batch
+from src.jarvis.domain.search.vector_store.vector_store import VectorStore
+from src.jarvis.retrieval import Retrieval
+from tests.conftest import FakeIngestor, make_document, make_index_body, random_vectors
+
+QUERIES = random_vectors(12, seed=100)
+
+
+def test_top_k_indices_batch_matches_top_k_indices():
+    scores = np.random.default_rng(0).integers(0, 5, size=(20, 300)).astype(np.float32)    # Many ties
+    for largest in (True, False):
+        for k in (1, 7, 300, 400):
+            batch = top_k_indices_batch(scores, k, largest=largest)
+            for row, positions in zip(scores, batch):
+                np.testing.assert_array_equal(positions, top_k_indices(row, k, largest=largest))
+
+
+@pytest.mark.parametrize("distance", ["euclidean", "cosine"])
+def test_knn_score_matrix_matches_single_queries(distance):
+    vectors = random_vectors(50, seed=1)
+    for knn in (LinearKNN(distance), HierarchicalKNN(distance, decay_factor=0.9)):
+        matrix = knn.score_batch(QUERIES, vectors)
+        assert matrix.shape == (len(QUERIES), 50)
+        for query, row in zip(QUERIES, matrix):
+            np.testing.assert_allclose(row, knn.score_batch(query, vectors), rtol=1e-5, atol=1e-6)
+
+
+@pytest.fixture(scope="module")
+def vector_store():
+    vector_store = VectorStore()
+    vector_store.create_index("docs", make_index_body(method={"name": "hnsw", "space_type": "euclidean"}))
+    documents = [make_document(f"doc {i}", n_chunks=30, seed=i, author="alice" if i % 2 else "bob") for i in range(10)]
+    for document in documents:
+        vector_store.index_document("docs", document)
+    vector_store.delete_document("docs", str(documents[0].metadata.document_id))
+    vector_store.link_hnsw("docs")     # The graph no longer changes in background
+    vector_store.train_index("docs", nlist=4, nprobe=2)
+    yield vector_store
+    vector_store.close()
+
+
+@pytest.mark.parametrize("algorithm, distance", [
+    ("linear", "euclidean"), ("linear", "cosine"), ("hierarchical", "euclidean"), ("hierarchical", "cosine"),
+    ("hnsw", "euclidean"), ("ivf", "euclidean"), ("ivf", "cosine"),
+])
+@pytest.mark.parametrize("filter", [None, {"author": "alice"}])
+def test_batch_matches_single_queries(vector_store, algorithm, distance, filter):
+    batch = vector_store.query_index_batch("docs", QUERIES.tolist(), top_k=7, algorithm=algorithm, distance=distance, filter=filter)
+    assert len(batch) == len(QUERIES)
+    for query, results in zip(QUERIES.tolist(), batch):
+        expected = vector_store.query_index("docs", query, top_k=7, algorithm=algorithm, distance=distance, filter=filter)
+        assert [r["id"] for r in results] == [r["id"] for r in expected]
+        # NOTE: A matrix product may round differently from the per-query kernel
+        assert [r["score"] for r in results] == pytest.approx([r["score"] for r in expected], rel=1e-5)
+        assert all(r["metadata"]["title"] != "doc 0" for r in results)
+
+
+def test_batch_rejects_a_dimension_mismatch(vector_store):
+    with pytest.raises(ValueError):
+        vector_store.query_index_batch("docs", [[1.0] * 3], top_k=5)
+
+
+def test_search_batch_by_text_uses_the_result_cache(vector_store):
+    retrieval = Retrieval(vector_store, FakeIngestor(), QueryResultCache(max_entries=10))
+    first = retrieval.search_batch_by_text("docs", ["a", "b"], top_k=3)
+    assert retrieval.ingestor.calls == 1
+    assert first[0] == retrieval.search_by_text("docs", "a", top_k=3)
+
+    results = retrieval.search_batch_by_text("docs", ["b", "c", "a"], top_k=3)
+    assert retrieval.ingestor.calls == 2    # Only "c" was embedded
+    assert results[0] == first[1] and results[2] == first[0]
+    assert results[1] == retrieval.search_by_text("docs", "c", top_k=3)
+
+
+def test_batch_route(vector_store):
+    app = FastAPI()
+    app.include_router(search.router, prefix="/search")
+    app.dependency_overrides[get_vector_store_dependency] = lambda: vector_store
+    app.dependency_overrides[get_retrieval_dependency] = lambda: Retrieval(vector_store, FakeIngestor())
+    client = TestClient(app)
+
+    response = client.post("/search/batch", json={"index_name": "docs", "query_texts": ["a", "b"], "top_k": 3})
+    assert response.status_code == 200 and response.json()["total_queries"] == 2
+    # Invalid search parameters (the HNSW graph is built for euclidean) are client errors
+    response = client.post("/search/batch", json={"index_name": "docs", "query_texts": ["a"], "algorithm": "hnsw", "distance": "cosine"})
+    assert response.status_code == 400
+    response = client.post("/search/batch", json={"index_name": "unknown", "query_texts": ["a"]})
+    assert response.status_code == 404
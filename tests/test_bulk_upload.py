@@ -0,0 +1,115 @@
+import sys
+import json
+import asyncio
+from typing import List
+
+import pytest
+
+# src
+sys.path.append("./")
+from src.jarvis.app.api.services.document_service import DocumentService
+from src.jarvis.domain.search.vector_store.vector_store import VectorStore
+from src.jarvis.infrastructure.embedding.embedder import FakeEmbedder
+from src.jarvis.infrastructure.embedding.pipeline import EmbeddingPipeline
+from src.jarvis.ingestor import Ingestor
+from tests.conftest import DIMENSION, make_index_body
+
+
+class FailingEmbedder(FakeEmbedder):
+    async def embed(self, texts, input_type):
+        raise ValueError("bad request")
+
+
+def document_line(index_name: str, title: str, n_words: int = 50) -> bytes:
+    full_text = " ".join(f"{title}{i}" for i in range(n_words))
+    return json.dumps({"index_name": index_name, "title": title, "author": "author", "full_text": full_text}).encode("utf-8")
+
+
+async def stream(lines: List[bytes]):
+    for line in lines:
+        await asyncio.sleep(0)
+        yield line
+
+
+def bulk_upload(service: DocumentService, lines: List[bytes], batch_size: int = 2) -> dict:
+    async def run():
+        return {status.line: status async for status in service.bulk_upload(stream(lines), batch_size=batch_size)}
+    return asyncio.run(run())
+
+
+@pytest.fixture
+def vector_store():
+    vector_store = VectorStore()
+    vector_store.create_index("first", make_index_body())
+    vector_store.create_index("second", make_index_body())
+    yield vector_store
+    vector_store.close()
+
+
+@pytest.fixture
+def service(vector_store, byte_encoding):
+    pipeline = EmbeddingPipeline(FakeEmbedder(dimension=DIMENSION), batch_size=4, rate_limit=0)
+    return DocumentService(vector_store, Ingestor(), pipeline)
+
+
+def test_every_line_gets_a_status(service, vector_store):
+    lines = [
+        document_line("first", "a"),
+        b"",                                # Blank lines are skipped
+        b"{not json",
+        document_line("missing", "b"),
+        json.dumps({"index_name": "first", "title": "c"}).encode("utf-8"),     # Missing fields
+        document_line("second", "d", n_words=500),
+        document_line("first", "e"),
+    ]
+    statuses = bulk_upload(service, lines)
+
+    assert sorted(statuses) == [1, 3, 4, 5, 6, 7]
+    assert {line: status.status for line, status in statuses.items()} == {
+        1: "indexed", 3: "error", 4: "error", 5: "error", 6: "indexed", 7: "indexed"
+    }
+    assert "does not exist" in statuses[4].error
+
+    for line, index_name in ((1, "first"), (6, "second"), (7, "first")):
+        rows = vector_store.indexes[index_name].find_document(statuses[line].document_id)
+        assert rows.size == statuses[line].chunks > 0
+    assert statuses[6].chunks > statuses[1].chunks
+    assert len(vector_store.indexes["first"]) == statuses[1].chunks + statuses[7].chunks
+
+
+def test_batches_are_grouped_by_index(service, vector_store, monkeypatch):
+    calls = []
+    index_documents = vector_store.index_documents
+
+    def spy(index_name, documents):
+        calls.append((index_name, len(documents)))
+        index_documents(index_name, documents)
+    monkeypatch.setattr(vector_store, "index_documents", spy)
+
+    lines = [document_line(index_name, f"doc{i}") for i, index_name in enumerate(["first", "second", "first", "first", "second"])]
+    statuses = bulk_upload(service, lines, batch_size=3)
+
+    assert all(status.status == "indexed" for status in statuses.values())
+    # One call per index and batch: [first, second, first] then [first, second]
+    assert calls == [("first", 2), ("second", 1), ("first", 1), ("second", 1)]
+
+
+def test_embedding_failure_rejects_the_batch(vector_store, byte_encoding):
+    pipeline = EmbeddingPipeline(FailingEmbedder(dimension=DIMENSION), batch_size=4, rate_limit=0)
+    service = DocumentService(vector_store, Ingestor(), pipeline)
+
+    statuses = bulk_upload(service, [document_line("first", "a"), document_line("first", "b")])
+    assert [status.status for status in statuses.values()] == ["error", "error"]
+    assert all("Embedding failed" in status.error for status in statuses.values())
+    assert len(vector_store.indexes["first"]) == 0
+
+
+def test_stream_errors_are_raised(service):
+    async def broken():
+        yield document_line("first", "a")
+        raise ConnectionError("client disconnected")
+
+    async def run():
+        return [status async for status in service.bulk_upload(broken(), batch_size=1)]
+    with pytest.raises(ConnectionError):
+        asyncio.run(run())
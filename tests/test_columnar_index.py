@@ -0,0 +1,67 @@
+import sys
+from uuid import UUID
+
+import numpy as np
+
+# src
+sys.path.append("./")
+from src.jarvis.domain.search.vector_store.columnar_index import ColumnarIndex
+from src.jarvis.domain.search.vector_store.vector_store import VectorStore
+from tests.conftest import DIMENSION, make_document, make_index_body, random_vectors
+
+DOCUMENTS = [UUID(int=i) for i in range(1, 4)] + [UUID(int=1 << 8)]     # The last one ends in a NUL byte
+
+
+def build_index(compaction_threshold: float = 0.9) -> ColumnarIndex:
+    index = ColumnarIndex(dimension=DIMENSION, mappings={}, compaction_threshold=compaction_threshold)
+    # Interleaved documents in a single append, then one more document
+    document_ids = [DOCUMENTS[i % 3] for i in range(9)]
+    index.append(random_vectors(9), [i // 3 for i in range(9)], document_ids, [str(i) for i in range(9)], [{} for _ in range(9)])
+    index.append(random_vectors(2, seed=1), [0, 1], [DOCUMENTS[3]] * 2, ["9", "10"], [{}, {}])
+    return index
+
+
+def test_find_document_after_append():
+    index = build_index()
+    np.testing.assert_array_equal(index.find_document(DOCUMENTS[0]), [0, 3, 6])
+    np.testing.assert_array_equal(index.find_document(str(DOCUMENTS[1])), [1, 4, 7])
+    np.testing.assert_array_equal(index.find_document(DOCUMENTS[3]), [9, 10])
+    assert index.find_document(UUID(int=42)).size == 0
+    assert index.find_document("not a uuid").size == 0
+    assert index.document_count() == 4
+
+
+def test_find_document_after_delete_and_compaction():
+    index = build_index()
+    index.delete_rows(index.find_document(DOCUMENTS[1]))
+    assert index.find_document(DOCUMENTS[1]).size == 0
+    assert index.document_count() == 3
+
+    index = build_index(compaction_threshold=0.2)
+    index.delete_rows(index.find_document(DOCUMENTS[1]))
+    assert index.size == 8
+    for document_id in (DOCUMENTS[0], DOCUMENTS[2], DOCUMENTS[3]):
+        rows = index.find_document(document_id)
+        assert all(index.document_ids[row] == document_id.bytes.rstrip(b"\x00") for row in rows.tolist())
+    assert [index.texts[row] for row in index.find_document(DOCUMENTS[3]).tolist()] == ["9", "10"]
+
+
+def test_document_map_is_rebuilt_on_load(persist_dir):
+    vector_store = VectorStore(persist_dir=persist_dir)
+    vector_store.create_index("docs", make_index_body())
+    document = make_document("nul", seed=1)
+    for field in (document.metadata, *(chunk.metadata for chunk in document.chunks)):
+        field.document_id = DOCUMENTS[3]
+    vector_store.index_document("docs", document)
+    vector_store.save()
+    vector_store.close()
+
+    restored = VectorStore(persist_dir=persist_dir)
+    restored.load()
+    try:
+        index = restored.indexes["docs"]
+        np.testing.assert_array_equal(index.find_document(DOCUMENTS[3]), [0, 1, 2])
+        results = restored.query_index("docs", [1.0] * DIMENSION, top_k=3)
+        assert all(result["metadata"]["title"] == "nul" for result in results)
+    finally:
+        restored.close()
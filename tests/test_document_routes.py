@@ -0,0 +1,55 @@
+import sys
+import asyncio
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+# src
+sys.path.append("./")
+from src.jarvis.app.api.routes import documents, search
+from src.jarvis.app.dependencies import get_vector_store_dependency
+from src.jarvis.domain.search.vector_store.vector_store import VectorStore
+from tests.conftest import make_document, make_index_body
+
+
+@pytest.fixture
+def vector_store():
+    vector_store = VectorStore()
+    vector_store.create_index("docs", make_index_body())
+    yield vector_store
+    vector_store.close()
+
+
+@pytest.fixture
+def client(vector_store):
+    app = FastAPI()
+    app.include_router(documents.router, prefix="/documents")
+    app.dependency_overrides[get_vector_store_dependency] = lambda: vector_store
+    return TestClient(app)
+
+
+def test_blocking_routes_run_in_the_threadpool():
+    # Routes calling the (synchronous) vector store must not be coroutines, or they would block the event loop
+    routes = (
+        search.search_by_text, search.search_batch, search.search_by_vector, search.search_batch_by_vector,
+        search.measure_recall, documents.list_documents, documents.delete_document,
+    )
+    for route in routes:
+        assert not asyncio.iscoroutinefunction(route)
+
+
+def test_list_and_delete_documents(client, vector_store):
+    kept, deleted = make_document("kept", n_chunks=2, seed=1), make_document("deleted", n_chunks=3, seed=2)
+    for document in (kept, deleted):
+        vector_store.index_document("docs", document)
+
+    response = client.delete(f"/documents/docs/{deleted.metadata.document_id}")
+    assert response.status_code == 200
+
+    response = client.get("/documents/docs")
+    assert response.status_code == 200
+    assert [(document["title"], len(document["chunks"])) for document in response.json()] == [("kept", 2)]
+
+    assert client.get("/documents/unknown").status_code == 404
+    assert client.delete(f"/documents/unknown/{kept.metadata.document_id}").status_code == 404
@@ -0,0 +1,114 @@
+import sys
+import asyncio
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+# src
+sys.path.append("./")
+from src.jarvis.infrastructure.embedding.cache import EmbeddingCache
+from src.jarvis.infrastructure.embedding.embedder import FakeEmbedder
+from src.jarvis.infrastructure.embedding.pipeline import EmbeddingPipeline
+from src.jarvis.ingestor import Ingestor
+
+DIMENSION = 4
+VECTOR_BYTES = DIMENSION * 4
+
+
+@pytest.fixture
+def cache_path(tmp_path) -> str:
+    return str(tmp_path / "cache" / "embeddings.sqlite3")
+
+
+def vector(value: float) -> list:
+    return [value] * DIMENSION
+
+
+def test_round_trip_and_key_fields(cache_path):
+    cache = EmbeddingCache(cache_path, max_bytes=1 << 20)
+    cache.put_many("model", "search_document", DIMENSION, ["a", "b"], [vector(1), vector(2)])
+    assert cache.get_many("model", "search_document", DIMENSION, ["b", "c", "a"]) == [vector(2), None, vector(1)]
+    # Every field of the key matters
+    assert cache.get_many("other", "search_document", DIMENSION, ["a"]) == [None]
+    assert cache.get_many("model", "search_query", DIMENSION, ["a"]) == [None]
+    assert cache.get_many("model", "search_document", 8, ["a"]) == [None]
+    assert cache.stats() == {"hits": 2, "misses": 4, "entries": 2, "bytes": 2 * VECTOR_BYTES}
+    cache.close()
+
+    # Persisted, with its size
+    reopened = EmbeddingCache(cache_path, max_bytes=1 << 20)
+    assert reopened.get_many("model", "search_document", DIMENSION, ["a"]) == [vector(1)]
+    assert reopened.stats()["bytes"] == 2 * VECTOR_BYTES
+    reopened.close()
+
+
+def test_size_accounting_on_replace(cache_path):
+    cache = EmbeddingCache(cache_path, max_bytes=1 << 20)
+    cache.put_many("model", "search_document", DIMENSION, ["a"], [vector(1)])
+    cache.put_many("model", "search_document", DIMENSION, ["a"], [vector(2)])
+    assert cache.stats()["entries"] == 1
+    assert cache.stats()["bytes"] == VECTOR_BYTES
+    assert cache.get_many("model", "search_document", DIMENSION, ["a"]) == [vector(2)]
+    cache.close()
+
+
+def test_least_recently_used_entries_are_evicted(cache_path):
+    cache = EmbeddingCache(cache_path, max_bytes=4 * VECTOR_BYTES)
+    for i, text in enumerate("abcd"):
+        cache.put_many("model", "search_document", DIMENSION, [text], [vector(i)])
+    cache.get_many("model", "search_document", DIMENSION, ["a"])     # "b" is now the least recently used
+
+    cache.put_many("model", "search_document", DIMENSION, ["e"], [vector(4)])
+    # Evicted down to 90% of max_bytes: 3 entries
+    found = cache.get_many("model", "search_document", DIMENSION, list("abcde"))
+    assert [embedding is not None for embedding in found] == [True, False, False, True, True]
+    assert cache.stats()["bytes"] == 3 * VECTOR_BYTES
+    cache.close()
+
+
+def test_pipeline_skips_cached_texts(cache_path):
+    cache = EmbeddingCache(cache_path, max_bytes=1 << 20)
+    embedder = FakeEmbedder(dimension=DIMENSION)
+    pipeline = EmbeddingPipeline(embedder, cache, batch_size=2, rate_limit=0)
+
+    async def embed(texts):
+        batches = []
+        async for positions, embeddings in pipeline.embed(texts, "search_document"):
+            batches.append((positions, embeddings))
+        return batches
+
+    asyncio.run(embed(["a", "b", "c"]))
+    assert embedder.calls == 2
+
+    # Cached texts come first, as a single batch, and only the new ones reach the embedder
+    batches = asyncio.run(embed(["c", "new", "a", "b"]))
+    assert embedder.calls == 3
+    assert batches[0][0] == [0, 2, 3]
+    assert batches[1][0] == [1]
+    for positions, embeddings in batches:
+        for position, embedding in zip(positions, embeddings):
+            np.testing.assert_allclose(embedding, embedder._vector(["c", "new", "a", "b"][position]), rtol=1e-6)
+
+    asyncio.run(embed(["a", "b", "c", "new"]))
+    assert embedder.calls == 3
+    cache.close()
+
+
+def test_ingestor_embed_texts_uses_the_cache(cache_path):
+    calls = []
+
+    def embed(texts, **kwargs):
+        calls.append(list(texts))
+        return SimpleNamespace(embeddings=SimpleNamespace(float=[vector(len(text)) for text in texts]))
+
+    cache = EmbeddingCache(cache_path, max_bytes=1 << 20)
+    ingestor = Ingestor(cache=cache)
+    ingestor.client = SimpleNamespace(embed=embed)
+
+    assert ingestor.embed_texts(["a", "bb"], "search_query") == [vector(1), vector(2)]
+    assert ingestor.embed_texts(["bb", "ccc", "a"], "search_query") == [vector(2), vector(3), vector(1)]
+    assert calls == [["a", "bb"], ["ccc"]]
+    ingestor.embed_texts(["ccc"], "search_query")
+    assert len(calls) == 2
+    cache.close()
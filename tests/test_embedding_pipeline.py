@@ -0,0 +1,156 @@
+import sys
+import asyncio
+from typing import List
+
+import numpy as np
+import pytest
+
+# src
+sys.path.append("./")
+from src.jarvis.app.api.services.document_service import DocumentService
+from src.jarvis.domain.search.vector_store.vector_store import VectorStore
+from src.jarvis.infrastructure.embedding.embedder import FakeEmbedder
+from src.jarvis.infrastructure.embedding.pipeline import EmbeddingPipeline, TokenBucket
+from src.jarvis.ingestor import Ingestor
+from tests.conftest import make_index_body
+
+DIMENSION = 8
+TEXTS = [f"text {i}" for i in range(10)]
+
+
+class FlakyEmbedder(FakeEmbedder):
+    """FakeEmbedder whose calls fail with `error` while `failures` says so (one entry per call)."""
+
+    def __init__(self, failures: List[bool], error: Exception = ConnectionError("reset"), latency: float = 0.0):
+        super().__init__(dimension=DIMENSION, latency=latency)
+        self.failures = list(failures)
+        self.error = error
+        self.in_flight = self.max_in_flight = 0
+        self.cancelled = 0
+
+    async def embed(self, texts: List[str], input_type: str) -> List[List[float]]:
+        fail = self.failures.pop(0) if self.failures else False
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            embeddings = await super().embed(texts, input_type)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        finally:
+            self.in_flight -= 1
+        if fail:
+            raise self.error
+        return embeddings
+
+
+def pipeline(embedder: FakeEmbedder, **kwargs) -> EmbeddingPipeline:
+    options = dict(batch_size=3, concurrency=2, rate_limit=0, burst=1, max_retries=3, backoff_base=0.001, backoff_max=0.01)
+    options.update(kwargs)
+    return EmbeddingPipeline(embedder, **options)
+
+
+def collect(embedding_pipeline: EmbeddingPipeline, texts: List[str]) -> List[List[float]]:
+    async def run():
+        embeddings = [None] * len(texts)
+        async for positions, batch in embedding_pipeline.embed(texts, "search_document"):
+            for position, embedding in zip(positions, batch):
+                embeddings[position] = embedding
+        return embeddings
+    return asyncio.run(run())
+
+
+def test_batches_cover_every_text_in_position():
+    embedder = FlakyEmbedder([], latency=0.01)
+    embeddings = collect(pipeline(embedder), TEXTS)
+    assert embedder.calls == 4      # ceil(10 / 3) batches
+    assert embedder.max_in_flight <= 2
+    for text, embedding in zip(TEXTS, embeddings):
+        np.testing.assert_allclose(embedding, embedder._vector(text))
+
+
+def test_transient_errors_are_retried():
+    embedder = FlakyEmbedder([True, True])
+    embeddings = collect(pipeline(embedder, batch_size=len(TEXTS)), TEXTS)
+    assert embedder.calls == 3
+    assert len(embeddings) == len(TEXTS)
+
+
+def test_retries_give_up_after_max_retries():
+    embedder = FlakyEmbedder([True] * 3)
+    with pytest.raises(ConnectionError):
+        collect(pipeline(embedder, batch_size=len(TEXTS), max_retries=2), TEXTS)
+    assert embedder.calls == 3
+
+
+def test_permanent_errors_are_not_retried():
+    embedder = FlakyEmbedder([True], error=ValueError("bad request"))
+    with pytest.raises(ValueError):
+        collect(pipeline(embedder, batch_size=len(TEXTS)), TEXTS)
+    assert embedder.calls == 1
+
+
+def test_a_failed_batch_cancels_the_others():
+    class FirstBatchFails(FlakyEmbedder):
+        async def embed(self, texts, input_type):
+            if texts[0] == TEXTS[0]:
+                raise ValueError("bad request")
+            self.latency = 10.0     # The other batches would take long, they have to be cancelled
+            return await super().embed(texts, input_type)
+
+    embedder = FirstBatchFails([])
+
+    async def run():
+        with pytest.raises(ValueError):
+            async for _ in pipeline(embedder, batch_size=4, concurrency=3).embed(TEXTS, "search_document"):
+                pass
+
+    asyncio.run(asyncio.wait_for(run(), timeout=2))
+    assert embedder.cancelled == 2
+    assert embedder.in_flight == 0
+
+
+def test_token_bucket_limits_the_rate():
+    async def run():
+        bucket = TokenBucket(rate=100, capacity=2)
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        for _ in range(6):
+            await bucket.acquire()
+        return loop.time() - started
+    # 2 tokens at once, then 4 more at 100 per second
+    assert asyncio.run(run()) >= 0.035
+
+
+def test_upload_document_indexes_every_chunk(byte_encoding):
+    vector_store = VectorStore()
+    vector_store.create_index("docs", make_index_body(dimension=DIMENSION))
+    embedder = FlakyEmbedder([])
+    service = DocumentService(vector_store, Ingestor(), pipeline(embedder, batch_size=2))
+
+    calls = []
+    index_documents = vector_store.index_documents
+    vector_store.index_documents = lambda index_name, documents: calls.append(len(documents[0].chunks)) or index_documents(index_name, documents)
+
+    full_text = " ".join(f"word{i}" for i in range(200))
+    document_id = asyncio.run(service.upload_document("docs", "title", "author", full_text))
+    # The whole document is indexed at once, never batch by batch
+    assert calls == [len(vector_store.indexes["docs"])]
+
+    index = vector_store.indexes["docs"]
+    rows = index.find_document(document_id)
+    assert "".join(index.texts[row] for row in sorted(rows.tolist(), key=lambda row: index.metadata[row]["chunk_id"])) == full_text
+    assert sorted(index.metadata[row]["chunk_id"] for row in rows.tolist()) == list(range(rows.size))
+
+
+def test_upload_document_failure_leaves_nothing_indexed(byte_encoding):
+    vector_store = VectorStore()
+    vector_store.create_index("docs", make_index_body(dimension=DIMENSION))
+    # The third batch fails after the first ones were embedded
+    embedder = FlakyEmbedder([False, False, True], error=ValueError("bad request"))
+    service = DocumentService(vector_store, Ingestor(), pipeline(embedder, batch_size=2, concurrency=1))
+
+    full_text = " ".join(f"word{i}" for i in range(200))
+    with pytest.raises(ValueError):
+        asyncio.run(service.upload_document("docs", "title", "author", full_text))
+    assert len(vector_store.indexes["docs"]) == 0
@@ -0,0 +1,112 @@
+import sys
+
+import pytest
+
+# src
+sys.path.append("./")
+from src.jarvis.domain.search.vector_store.vector_store import VectorStore
+from tests.conftest import make_document, make_index_body
+
+
+@pytest.fixture
+def documents():
+    vector_store = VectorStore()
+    vector_store.create_index("docs", make_index_body())
+    first = make_document("first", seed=1, author="alice", created_date="2024-01-01")
+    second = make_document("second", seed=2, author="bob", created_date="2024-01-01")
+    third = make_document("third", seed=3, author="alice", created_date="2024-02-01")
+    for document in (first, second, third):
+        vector_store.index_document("docs", document)
+    yield vector_store, first, second, third
+    vector_store.close()
+
+
+def search(vector_store: VectorStore, filter: dict) -> list:
+    results = vector_store.query_index("docs", [1.0] * 8, top_k=100, algorithm="linear", filter=filter)
+    return sorted(result["metadata"]["title"] for result in results)
+
+
+def test_filter_on_document_id_accepts_str(documents):
+    vector_store, first, _, _ = documents
+    assert search(vector_store, {"document_id": str(first.metadata.document_id)}) == ["first"] * 3
+    assert search(vector_store, {"document_id": "not a uuid"}) == []
+
+
+def test_filters_are_intersected(documents):
+    vector_store, _, _, _ = documents
+    assert search(vector_store, {"author": "alice"}) == ["first"] * 3 + ["third"] * 3
+    assert search(vector_store, {"author": "alice", "created_date": "2024-01-01"}) == ["first"] * 3
+    assert search(vector_store, {"author": "bob", "title": "third"}) == []
+    assert search(vector_store, {"author": "carol"}) == []
+
+
+def test_postings_follow_updates_and_deletes(documents):
+    vector_store, first, second, _ = documents
+    vector_store.update_document("docs", make_document("renamed", seed=4, document=first, author="bob"))
+    vector_store.delete_document("docs", str(second.metadata.document_id))
+    assert search(vector_store, {"author": "bob"}) == ["renamed"] * 3
+    assert search(vector_store, {"title": "first"}) == []
+    assert search(vector_store, {"document_id": str(first.metadata.document_id)}) == ["renamed"] * 3
+
+
+def test_postings_are_renumbered_on_compaction(documents):
+    vector_store, first, second, third = documents
+    vector_store.delete_document("docs", str(first.metadata.document_id))
+    vector_store.delete_document("docs", str(second.metadata.document_id))
+    assert vector_store.indexes["docs"].size == 3    # Compacted
+    assert search(vector_store, {"author": "alice"}) == ["third"] * 3
+    assert search(vector_store, {"document_id": str(third.metadata.document_id)}) == ["third"] * 3
+
+
+def test_filter_rejects_unknown_keys(documents):
+    vector_store, _, _, _ = documents
+    with pytest.raises(ValueError):
+        search(vector_store, {"publisher": "someone"})
+
+
+def test_filter_on_document_id_accepts_uuid(documents):
+    vector_store, first, second, _ = documents
+    document_id = first.metadata.document_id
+    assert search(vector_store, {"document_id": document_id}) == ["first"] * 3
+    assert search(vector_store, {"document_id": {"$in": [document_id, second.metadata.document_id]}}) == ["first"] * 3 + ["second"] * 3
+    assert search(vector_store, {"document_id": {"$ne": document_id}}) == ["second"] * 3 + ["third"] * 3
+
+
+def test_filter_operators(documents):
+    vector_store, _, _, _ = documents
+    assert search(vector_store, {"title": {"$in": ["first", "third"]}}) == ["first"] * 3 + ["third"] * 3
+    assert search(vector_store, {"author": {"$nin": ["alice"]}}) == ["second"] * 3
+    assert search(vector_store, {"$or": [{"title": "first"}, {"author": "bob"}]}) == ["first"] * 3 + ["second"] * 3
+    assert search(vector_store, {"$and": [{"author": "alice"}, {"title": {"$ne": "first"}}]}) == ["third"] * 3
+
+
+def test_range_filters_on_created_date(documents):
+    vector_store, _, _, _ = documents
+    assert search(vector_store, {"created_date": {"$gte": "2024-01-15"}}) == ["third"] * 3
+    assert search(vector_store, {"created_date": {"$gt": "2024-01-01"}}) == ["third"] * 3
+    assert search(vector_store, {"created_date": {"$lte": "2024-01-01"}}) == ["first"] * 3 + ["second"] * 3
+    assert search(vector_store, {"created_date": {"$gte": "2024-01-01", "$lt": "2024-02-01"}, "author": "alice"}) == ["first"] * 3
+    with pytest.raises(ValueError):
+        search(vector_store, {"title": {"$gt": "a"}})     # Ranges are only supported on created_date
+
+
+def test_filter_rejects_non_scalar_values(documents):
+    vector_store, _, _, _ = documents
+    with pytest.raises(ValueError):
+        search(vector_store, {"title": ["first"]})
+    with pytest.raises(ValueError):
+        search(vector_store, {"title": {"$regex": "fir"}})
+
+
+@pytest.mark.parametrize("algorithm", ["hnsw", "ivf"])
+def test_selective_filters_fall_back_to_an_exact_scan(algorithm):
+    vector_store = VectorStore()
+    vector_store.create_index("docs", make_index_body(method={"name": "hnsw", "space_type": "cosine"}))
+    for i in range(10):
+        vector_store.index_document("docs", make_document(f"doc {i}", n_chunks=20, seed=i))
+    vector_store.train_index("docs", nlist=4, nprobe=1)
+
+    filter = {"title": {"$in": ["doc 3", "doc 7"]}}
+    results = vector_store.query_index("docs", [1.0] * 8, top_k=10, algorithm=algorithm, distance="cosine", filter=filter)
+    exact = vector_store.query_index("docs", [1.0] * 8, top_k=10, algorithm="linear", distance="cosine", filter=filter)
+    assert [r["id"] for r in results] == [r["id"] for r in exact]
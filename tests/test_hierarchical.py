@@ -0,0 +1,106 @@
+import sys
+
+import numpy as np
+import pytest
+
+# src
+sys.path.append("./")
+from src.jarvis.domain.search.algorithm.hierarchical_knn import HierarchicalKNN, hierarchical_weights, weighted_row_norms
+from src.jarvis.domain.search.utils import cosine_similarities, euclidean_distances, top_k_indices
+from src.jarvis.domain.search.vector_store.columnar_index import ColumnarIndex
+from src.jarvis.domain.search.vector_store.vector_store import VectorStore
+from tests.conftest import make_document, make_index_body, random_vectors
+
+DIMENSION = 32
+
+
+def reference_scores(distance: str, decay_factor: float, query: np.ndarray, matrix: np.ndarray) -> np.ndarray:
+    """Scores of the weighted query against the weighted rows, as the original implementation computed them."""
+    weights = np.power(np.float64(decay_factor), np.arange(matrix.shape[1]))
+    weighted_query, weighted_matrix = query * weights, matrix * weights
+    if distance == "euclidean":
+        return euclidean_distances(weighted_query, weighted_matrix)
+    return cosine_similarities(weighted_query, weighted_matrix)
+
+
+@pytest.mark.parametrize("distance", ["euclidean", "cosine"])
+@pytest.mark.parametrize("decay_factor", [0.5, 0.9, 1.0])
+def test_query_weighting_matches_row_weighting(distance, decay_factor):
+    matrix = random_vectors(200, DIMENSION, seed=1)
+    queries = random_vectors(5, DIMENSION, seed=2)
+    knn = HierarchicalKNN(distance, decay_factor=decay_factor)
+    norms = weighted_row_norms(matrix, hierarchical_weights(DIMENSION, decay_factor, power=2))
+
+    for query in queries:
+        expected = reference_scores(distance, decay_factor, query, matrix)
+        np.testing.assert_allclose(knn.score_batch(query, matrix), expected, rtol=1e-4, atol=1e-5)
+        np.testing.assert_allclose(knn.score_batch(query, matrix, norms), expected, rtol=1e-4, atol=1e-5)
+        # Same ranking as the reference
+        largest = distance == "cosine"
+        np.testing.assert_array_equal(
+            top_k_indices(knn.score_batch(query, matrix, norms), 10, largest=largest),
+            top_k_indices(expected, 10, largest=largest),
+        )
+
+
+def test_subnormal_weights_are_flushed_to_zero():
+    weights = hierarchical_weights(100, 0.1, power=2)
+    assert not weights.flags.writeable
+    assert np.all((weights == 0) | (weights >= np.finfo(np.float32).tiny))
+    assert weights[0] == 1.0 and weights[-1] == 0.0
+
+    matrix = random_vectors(50, 100, seed=1)
+    query = random_vectors(1, 100, seed=2)[0]
+    np.testing.assert_allclose(
+        HierarchicalKNN("euclidean", decay_factor=0.1).score_batch(query, matrix),
+        reference_scores("euclidean", 0.1, query, matrix),
+        rtol=1e-4,
+    )
+
+
+def test_weighted_norms_follow_appends_and_compactions():
+    index = ColumnarIndex(dimension=DIMENSION, mappings={}, compaction_threshold=0.2)
+    vectors = random_vectors(100, DIMENSION, seed=1)
+    document_ids = [f"00000000-0000-0000-0000-{i // 10:012d}" for i in range(100)]
+    index.append(vectors[:50], list(range(50)), document_ids[:50], [""] * 50, [{} for _ in range(50)])
+
+    def expected(decay_factor: float) -> np.ndarray:
+        return weighted_row_norms(index.vectors, hierarchical_weights(DIMENSION, decay_factor, power=2))
+
+    np.testing.assert_allclose(index.weighted_norms(0.9), expected(0.9), rtol=1e-6)
+    # Appends past the initial capacity, then a compaction
+    index.append(vectors[50:], list(range(50, 100)), document_ids[50:], [""] * 50, [{} for _ in range(50)])
+    np.testing.assert_allclose(index.weighted_norms(0.9), expected(0.9), rtol=1e-6)
+    index.delete_rows(np.arange(0, 100, 3))
+    assert index.size < 100
+    np.testing.assert_allclose(index.weighted_norms(0.9), expected(0.9), rtol=1e-6)
+
+    # Only the last MAX_DERIVED_NORMS decay factors are maintained
+    for decay_factor in (0.5, 0.6, 0.7, 0.8):
+        index.weighted_norms(decay_factor)
+    assert ("hierarchical", 0.9) not in index._derived_norms
+    assert len(index._derived_norms) == ColumnarIndex.MAX_DERIVED_NORMS
+
+
+@pytest.mark.parametrize("distance", ["euclidean", "cosine"])
+def test_vector_store_hierarchical_search(distance):
+    vector_store = VectorStore()
+    vector_store.create_index("docs", make_index_body(dimension=DIMENSION))
+    documents = [make_document(f"doc {i}", n_chunks=10, seed=i, dimension=DIMENSION) for i in range(10)]
+    for document in documents[:5]:
+        vector_store.index_document("docs", document)
+    query = random_vectors(1, DIMENSION, seed=99)[0]
+    vector_store.query_index("docs", query.tolist(), algorithm="hierarchical", distance=distance, decay_factor=0.8)
+
+    # The weighted norms computed by the first search are maintained by the later writes
+    for document in documents[5:]:
+        vector_store.index_document("docs", document)
+    for document in documents[:3]:
+        vector_store.delete_document("docs", str(document.metadata.document_id))
+
+    index = vector_store.indexes["docs"]
+    results = vector_store.query_index("docs", query.tolist(), top_k=10, algorithm="hierarchical", distance=distance, decay_factor=0.8)
+    live = index.live_rows()
+    scores = reference_scores(distance, 0.8, query, index.vectors[live])
+    best = live[top_k_indices(scores, 10, largest=distance == "cosine")]
+    assert [r["text"] for r in results] == [index.texts[row] for row in best.tolist()]
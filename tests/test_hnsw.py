@@ -0,0 +1,256 @@
+import sys
+import pickle
+import threading
+
+import numpy as np
+import pytest
+
+# src
+sys.path.append("./")
+from src.jarvis.domain.search.algorithm.hnsw import HNSW
+from src.jarvis.domain.search.algorithm.linear_knn import LinearKNN
+from src.jarvis.domain.search.utils import top_k_indices
+from src.jarvis.domain.search.vector_store.columnar_index import ColumnarIndex
+from src.jarvis.domain.search.vector_store.vector_store import VectorStore
+from tests.conftest import make_document, make_index_body, random_vectors
+
+N_ROWS, DIMENSION, K = 400, 16, 10
+
+
+def build(distance: str, vectors: np.ndarray) -> HNSW:
+    hnsw = HNSW(distance_metric=distance, M=8, ef_construction=64, ef_search=64)
+    norms = np.linalg.norm(vectors, axis=1)
+    for node in range(vectors.shape[0]):
+        hnsw.add(node, vectors, norms)
+    return hnsw
+
+
+def exact(distance: str, query: np.ndarray, vectors: np.ndarray, k: int, allowed: np.ndarray = None) -> np.ndarray:
+    scores = LinearKNN(distance).score_batch(query, vectors)
+    rows = np.arange(vectors.shape[0]) if allowed is None else np.flatnonzero(allowed)
+    return rows[top_k_indices(scores[rows], k, largest=distance == "cosine")]
+
+
+def recall(hnsw: HNSW, distance: str, vectors: np.ndarray, queries: np.ndarray, allowed: np.ndarray = None) -> float:
+    norms = np.linalg.norm(vectors, axis=1)
+    hits = 0
+    for query in queries:
+        nodes, _ = hnsw.search(query, vectors, norms, K)
+        hits += len(set(nodes.tolist()) & set(exact(distance, query, vectors, K, allowed).tolist()))
+    return hits / (K * len(queries))
+
+
+@pytest.fixture(scope="module")
+def vectors():
+    return random_vectors(N_ROWS, DIMENSION, seed=1)
+
+
+@pytest.fixture(scope="module")
+def queries():
+    return random_vectors(20, DIMENSION, seed=2)
+
+
+@pytest.fixture(scope="module", params=["euclidean", "cosine"])
+def graph(request, vectors):
+    return request.param, build(request.param, vectors)
+
+
+def test_recall_against_linear_scan(graph, vectors, queries):
+    distance, hnsw = graph
+    assert recall(hnsw, distance, vectors, queries) >= 0.95
+
+
+def test_scores_follow_the_vector_store_convention(graph, vectors, queries):
+    distance, hnsw = graph
+    norms = np.linalg.norm(vectors, axis=1)
+    nodes, scores = hnsw.search(queries[0], vectors, norms, K)
+    expected = LinearKNN(distance).score_batch(queries[0], vectors)[nodes]
+    np.testing.assert_allclose(scores, expected, rtol=1e-4, atol=1e-5)
+    assert list(scores) == sorted(scores, reverse=distance == "cosine")
+
+
+def test_tombstones_are_never_returned(vectors, queries):
+    hnsw = build("euclidean", vectors)
+    norms = np.linalg.norm(vectors, axis=1)
+    deleted = set(range(0, N_ROWS, 3))
+    hnsw.mark_deleted(deleted)
+    alive = np.ones(N_ROWS, dtype=bool)
+    alive[list(deleted)] = False
+
+    for query in queries:
+        nodes, _ = hnsw.search(query, vectors, norms, K)
+        assert len(nodes) == K
+        assert not deleted & set(nodes.tolist())
+    assert recall(hnsw, "euclidean", vectors, queries, allowed=alive) >= 0.9
+
+
+def test_repair_and_remap_on_compaction(vectors, queries):
+    hnsw = HNSW(distance_metric="euclidean", M=8, ef_construction=64, ef_search=64)
+    index = ColumnarIndex(dimension=DIMENSION, mappings={}, compaction_threshold=0.2, hnsw=hnsw)
+    document_ids = [f"00000000-0000-0000-0000-{i // 10:012d}" for i in range(N_ROWS)]
+    index.append(vectors, list(range(N_ROWS)), document_ids, [str(i) for i in range(N_ROWS)], [{} for _ in range(N_ROWS)])
+    assert index.hnsw_size == 0 and len(hnsw) == 0
+    # The first 350 rows are linked, the rest stay out of the graph
+    linked = hnsw.copy()
+    for row in range(350):
+        linked.add(row, index.vectors, index.norms)
+    index.swap_hnsw(linked, 350)
+    hnsw = index.hnsw
+
+    # Above the compaction threshold: the graph is repaired and renumbered with the rows
+    deleted = np.arange(0, N_ROWS, 4)
+    index.delete_rows(deleted)
+    assert index.size == N_ROWS - deleted.size
+    assert hnsw.deleted_count == 0
+    assert index.hnsw_size == len(hnsw) == 350 - np.count_nonzero(deleted < 350)
+    for row in range(index.hnsw_size, index.size):
+        hnsw.add(row, index.vectors, index.norms)
+    assert len(hnsw) == index.size
+
+    kept = np.setdiff1d(np.arange(N_ROWS), deleted)
+    np.testing.assert_array_equal(index.vectors, vectors[kept])
+    assert recall(hnsw, "euclidean", index.vectors, queries) >= 0.9
+    for query in queries[:5]:
+        nodes, _ = hnsw.search(query, index.vectors, index.norms, K)
+        assert all(index.texts[node] == str(kept[node]) for node in nodes.tolist())
+
+
+def test_copies_are_independent(vectors, queries):
+    hnsw = build("euclidean", vectors[:300])
+    norms = np.linalg.norm(vectors, axis=1)
+    before = [hnsw.search(query, vectors, norms, K)[0].tolist() for query in queries]
+
+    copy = hnsw.copy()
+    for node in range(300, N_ROWS):
+        copy.add(node, vectors, norms)
+    copy.mark_deleted([0, 1])
+    assert len(hnsw) == 300 and len(copy) == N_ROWS
+    assert hnsw.deleted_count == 0
+    assert [hnsw.search(query, vectors, norms, K)[0].tolist() for query in queries] == before
+    assert recall(copy, "euclidean", vectors, queries) >= 0.95
+
+    # Repairing the original leaves the copy untouched
+    hnsw.mark_deleted(range(0, 300, 3))
+    hnsw.repair(vectors, norms)
+    assert len(hnsw) == 200 and len(copy) == N_ROWS
+    assert recall(copy, "euclidean", vectors, queries) >= 0.95
+
+
+def test_pickle_round_trip(vectors, queries):
+    hnsw = build("cosine", vectors)
+    hnsw.mark_deleted([1, 2, 3])
+    restored = pickle.loads(pickle.dumps(hnsw))
+    norms = np.linalg.norm(vectors, axis=1)
+    for query in queries:
+        nodes, scores = hnsw.search(query, vectors, norms, K)
+        restored_nodes, restored_scores = restored.search(query, vectors, norms, K)
+        np.testing.assert_array_equal(nodes, restored_nodes)
+        np.testing.assert_array_equal(scores, restored_scores)
+
+
+def test_vector_store_hnsw_search():
+    vector_store = VectorStore()
+    method = {"name": "hnsw", "space_type": "euclidean", "parameters": {"m": 8, "ef_construction": 64, "ef_search": 64}}
+    vector_store.create_index("docs", make_index_body(method=method))
+    vector_store.create_index("flat", make_index_body())
+    documents = [make_document(f"doc {i}", n_chunks=20, seed=i) for i in range(10)]
+    for document in documents:
+        vector_store.index_document("docs", document)
+    vector_store.delete_document("docs", str(documents[0].metadata.document_id))
+
+    query = random_vectors(1, seed=99)[0].tolist()
+    results = vector_store.query_index("docs", query, top_k=5, algorithm="hnsw", distance="euclidean")
+    exact_results = vector_store.query_index("docs", query, top_k=5, algorithm="linear", distance="euclidean")
+    assert len(results) == 5
+    assert all(result["metadata"]["title"] != "doc 0" for result in results)
+    assert len({r["text"] for r in results} & {r["text"] for r in exact_results}) >= 4
+
+    vector_store.index_document("flat", documents[1])
+    with pytest.raises(ValueError):
+        vector_store.query_index("flat", query, algorithm="hnsw")
+    with pytest.raises(ValueError):
+        vector_store.link_hnsw("flat")
+
+
+def hnsw_store(monkeypatch, n_documents: int = 10) -> VectorStore:
+    """Index with an HNSW graph whose rows are only linked by explicit `link_hnsw` calls."""
+    vector_store = VectorStore()
+    monkeypatch.setattr(vector_store, "_maybe_link_hnsw", lambda index_name, index_data: None)
+    method = {"name": "hnsw", "space_type": "euclidean", "parameters": {"m": 8, "ef_construction": 64, "ef_search": 64}}
+    vector_store.create_index("docs", make_index_body(method=method))
+    for i in range(n_documents):
+        vector_store.index_document("docs", make_document(f"doc {i}", n_chunks=20, seed=i))
+    return vector_store
+
+
+def test_unlinked_rows_are_searched_exactly(monkeypatch):
+    vector_store = hnsw_store(monkeypatch)
+    index = vector_store.indexes["docs"]
+    assert index.hnsw_size == 0
+
+    queries = random_vectors(5, seed=99).tolist()
+    for query in queries:
+        results = vector_store.query_index("docs", query, top_k=5, algorithm="hnsw", distance="euclidean")
+        exact_results = vector_store.query_index("docs", query, top_k=5, algorithm="linear", distance="euclidean")
+        assert [r["text"] for r in results] == [r["text"] for r in exact_results]
+
+    # Half of the rows in the graph, half scanned
+    assert vector_store.link_hnsw("docs") == 200
+    for i in range(10, 20):
+        vector_store.index_document("docs", make_document(f"doc {i}", n_chunks=20, seed=i))
+    assert index.hnsw_size == 200 and index.size == 400
+    hits = 0
+    for query in queries:
+        results = vector_store.query_index("docs", query, top_k=5, algorithm="hnsw", distance="euclidean")
+        exact_results = vector_store.query_index("docs", query, top_k=5, algorithm="linear", distance="euclidean")
+        hits += len({r["text"] for r in results} & {r["text"] for r in exact_results})
+    assert hits >= 0.9 * 5 * len(queries)
+
+
+def test_writes_are_not_blocked_while_linking(monkeypatch):
+    vector_store = hnsw_store(monkeypatch, n_documents=5)
+    index = vector_store.indexes["docs"]
+    add = HNSW.add
+    written = []
+
+    def add_and_write(self, node, vectors, norms):
+        # Index and delete documents from another thread in the middle of the insertions
+        if node == 50 and not written:
+            writer = threading.Thread(target=lambda: written.extend([
+                vector_store.index_document("docs", make_document("late", n_chunks=20, seed=50)),
+                vector_store.delete_document("docs", str(index.metadata[0]["document_id"])),
+            ]))
+            writer.start()
+            writer.join(timeout=10)
+            assert not writer.is_alive()
+        add(self, node, vectors, norms)
+
+    monkeypatch.setattr(HNSW, "add", add_and_write)
+    # The rows indexed during the first pass are linked by a second one
+    assert vector_store.link_hnsw("docs") == 120
+    assert len(written) == 2
+    assert index.hnsw_size == index.size == len(index.hnsw) == 120
+    assert index.hnsw.deleted_count == 20
+
+    results = vector_store.query_index("docs", random_vectors(1, seed=99)[0].tolist(), top_k=50, algorithm="hnsw", distance="euclidean")
+    assert all(result["metadata"]["title"] != "doc 0" for result in results)
+
+
+def test_linking_restarts_after_a_compaction(monkeypatch):
+    vector_store = hnsw_store(monkeypatch, n_documents=5)
+    index = vector_store.indexes["docs"]
+    add = HNSW.add
+    compacted = []
+
+    def add_and_compact(self, node, vectors, norms):
+        if node == 50 and not compacted:
+            # Deleting 2 of the 5 documents compacts the index
+            compacted.append(index.layout_version)
+            for document_id in {str(metadata["document_id"]) for metadata in index.metadata[:40]}:
+                vector_store.delete_document("docs", document_id)
+            assert index.layout_version != compacted[0]
+        add(self, node, vectors, norms)
+
+    monkeypatch.setattr(HNSW, "add", add_and_compact)
+    assert vector_store.link_hnsw("docs") == 60
+    assert index.hnsw_size == index.size == len(index.hnsw) == 60
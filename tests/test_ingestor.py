@@ -0,0 +1,56 @@
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+# src
+sys.path.append("./")
+from src.jarvis.domain.genai.document import Document, DocumentMetadata
+from src.jarvis.ingestor import Ingestor
+
+
+class FakeClient:
+    """Cohere client that embeds a text as [number of the call, position in the call, length]."""
+
+    def __init__(self):
+        self.calls = []
+
+    def embed(self, texts, **kwargs):
+        self.calls.append(list(texts))
+        call = len(self.calls)
+        return SimpleNamespace(embeddings=SimpleNamespace(float=[[call, i, len(text)] for i, text in enumerate(texts)]))
+
+
+@pytest.fixture
+def ingestor(byte_encoding):
+    ingestor = Ingestor()
+    ingestor.client = FakeClient()
+    for i, n_bytes in enumerate((25, 7, 40)):
+        ingestor.data.append(Document(full_text="x" * n_bytes, chunks=[], metadata=DocumentMetadata(title=f"doc {i}", author="author")))
+    return ingestor
+
+
+def test_chunks_are_embedded_in_batches_across_documents(ingestor):
+    chunks = list(ingestor.chunk_generator(max_tokens=10, batch_size=4))
+
+    # 3 + 1 + 4 chunks of at most 10 tokens, embedded 4 at a time
+    assert [len(texts) for texts in ingestor.client.calls] == [4, 4]
+    assert [chunk.text for chunk in chunks] == [text for texts in ingestor.client.calls for text in texts]
+    assert [chunk.embedding[:2] for chunk in chunks] == [[call, i] for call in (1, 2) for i in range(4)]
+    assert all(chunk.embedding[2] == len(chunk.text) for chunk in chunks)
+
+    for document in ingestor.data:
+        assert [chunk.metadata.chunk_id for chunk in document.chunks] == list(range(len(document.chunks)))
+        assert all(chunk.metadata.document_id == document.metadata.document_id for chunk in document.chunks)
+        assert "".join(chunk.text for chunk in document.chunks) == document.full_text
+    assert [len(document.chunks) for document in ingestor.data] == [3, 1, 4]
+
+
+def test_chunks_are_yielded_lazily(ingestor):
+    generator = ingestor.chunk_generator(max_tokens=10, batch_size=3)
+    next(generator)
+    assert len(ingestor.client.calls) == 1
+
+    rest = list(generator)
+    assert len(rest) == 7
+    assert [len(texts) for texts in ingestor.client.calls] == [3, 3, 2]
@@ -0,0 +1,147 @@
+import sys
+
+import numpy as np
+import pytest
+
+# src
+sys.path.append("./")
+from src.jarvis.domain.search.algorithm.ivf import IVF, MiniBatchKMeans, nearest_centroids
+from src.jarvis.domain.search.algorithm.linear_knn import LinearKNN
+from src.jarvis.domain.search.utils import top_k_indices
+from src.jarvis.domain.search.vector_store.vector_store import VectorStore
+from tests.conftest import make_document, make_index_body, random_vectors
+
+N_ROWS, DIMENSION, NLIST, K = 2000, 16, 16, 10
+
+
+def clustered_vectors(n: int, n_clusters: int = NLIST, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((n_clusters, DIMENSION)).astype(np.float32) * 4
+    noise = rng.standard_normal((n, DIMENSION)).astype(np.float32)
+    return centers[rng.integers(n_clusters, size=n)] + noise
+
+
+def exact(distance: str, query: np.ndarray, vectors: np.ndarray, k: int) -> np.ndarray:
+    scores = LinearKNN(distance).score_batch(query, vectors)
+    return top_k_indices(scores, k, largest=distance == "cosine")
+
+
+def ivf_search(ivf: IVF, distance: str, query: np.ndarray, vectors: np.ndarray, k: int, nprobe: int) -> np.ndarray:
+    rows = ivf.candidates(query, distance, nprobe)
+    scores = LinearKNN(distance).score_batch(query, vectors[rows])
+    return rows[top_k_indices(scores, k, largest=distance == "cosine")]
+
+
+def recall(ivf: IVF, distance: str, vectors: np.ndarray, queries: np.ndarray, nprobe: int) -> float:
+    hits = 0
+    for query in queries:
+        found = ivf_search(ivf, distance, query, vectors, K, nprobe)
+        hits += len(set(found.tolist()) & set(exact(distance, query, vectors, K).tolist()))
+    return hits / (K * len(queries))
+
+
+@pytest.fixture(scope="module")
+def vectors():
+    return clustered_vectors(N_ROWS, seed=1)
+
+
+@pytest.fixture(scope="module")
+def queries(vectors):
+    return vectors[:20] + random_vectors(20, DIMENSION, seed=2) * 0.5
+
+
+@pytest.fixture(scope="module")
+def ivf(vectors):
+    ivf = IVF.train(vectors, nlist=NLIST, nprobe=2)
+    ivf.add(vectors[:N_ROWS // 2])
+    ivf.add(vectors[N_ROWS // 2:])
+    return ivf
+
+
+def test_kmeans_assigns_points_to_their_nearest_centroid(vectors):
+    centroids = MiniBatchKMeans(n_clusters=NLIST, batch_size=256, max_iter=50, random_seed=0).fit(vectors)
+    assert centroids.shape == (NLIST, DIMENSION)
+
+    labels = nearest_centroids(vectors, centroids)
+    distances = ((vectors[:, None, :] - centroids[None, :, :]) ** 2).sum(axis=2)
+    np.testing.assert_array_equal(labels, distances.argmin(axis=1))
+
+
+def test_lists_partition_the_rows(ivf):
+    assert len(ivf) == N_ROWS
+    rows = ivf.candidates(np.zeros(DIMENSION), "euclidean", nprobe=NLIST)
+    np.testing.assert_array_equal(rows, np.arange(N_ROWS))
+
+
+@pytest.mark.parametrize("distance", ["euclidean", "cosine"])
+def test_probing_every_list_is_exact(ivf, vectors, queries, distance):
+    assert recall(ivf, distance, vectors, queries, nprobe=NLIST) == 1.0
+
+
+@pytest.mark.parametrize("distance", ["euclidean", "cosine"])
+def test_recall_grows_with_nprobe(ivf, vectors, queries, distance):
+    recalls = [recall(ivf, distance, vectors, queries, nprobe) for nprobe in (1, 4, 8)]
+    assert recalls == sorted(recalls)
+    assert recalls[-1] >= 0.9
+
+
+def test_remap_after_compaction(ivf, vectors):
+    remapped = IVF(ivf.centroids, nprobe=2)
+    remapped.add(vectors)
+    kept = np.arange(0, N_ROWS, 3)
+    remapped.remap(kept)
+
+    assert len(remapped) == kept.size
+    rows = remapped.candidates(np.zeros(DIMENSION), "euclidean", nprobe=NLIST)
+    np.testing.assert_array_equal(rows, np.arange(kept.size))
+    # Each surviving row stays in the list of its centroid
+    labels = nearest_centroids(vectors[kept], remapped.centroids)
+    for list_id in range(NLIST):
+        np.testing.assert_array_equal(remapped._list_rows(list_id), np.flatnonzero(labels == list_id))
+
+
+def test_copies_are_independent(ivf, vectors):
+    original = IVF(ivf.centroids, nprobe=2)
+    original.add(vectors[:N_ROWS // 2])
+    copy = original.copy()
+    copy.add(vectors[N_ROWS // 2:])
+    assert len(original) == N_ROWS // 2 and len(copy) == N_ROWS
+
+    # Renumbering the original leaves the copy untouched
+    original.remap(np.arange(0, N_ROWS // 2, 2))
+    rows = copy.candidates(np.zeros(DIMENSION), "euclidean", nprobe=NLIST)
+    np.testing.assert_array_equal(rows, np.arange(N_ROWS))
+
+
+def test_invalid_nprobe(vectors):
+    with pytest.raises(ValueError):
+        IVF(vectors[:NLIST], nprobe=0)
+
+
+def test_vector_store_ivf_search():
+    vector_store = VectorStore()
+    vector_store.create_index("docs", make_index_body())
+    documents = [make_document(f"doc {i}", n_chunks=20, seed=i) for i in range(10)]
+    for document in documents:
+        vector_store.index_document("docs", document)
+
+    query = random_vectors(1, seed=99)[0].tolist()
+    with pytest.raises(ValueError):
+        vector_store.query_index("docs", query, algorithm="ivf")
+
+    ivf = vector_store.train_index("docs", nlist=8, nprobe=2)
+    assert ivf.nlist == 8 and len(ivf) == 200
+
+    # Probing every list gives the exact results; deleted rows are never returned
+    vector_store.delete_document("docs", str(documents[0].metadata.document_id))
+    results = vector_store.query_index("docs", query, top_k=5, algorithm="ivf", distance="euclidean", nprobe=8)
+    exact_results = vector_store.query_index("docs", query, top_k=5, algorithm="linear", distance="euclidean")
+    assert [r["text"] for r in results] == [r["text"] for r in exact_results]
+    results = vector_store.query_index("docs", query, top_k=50, algorithm="ivf", distance="euclidean")
+    assert all(result["metadata"]["title"] != "doc 0" for result in results)
+
+    # Retraining replaces the IVF and assigns every live row
+    retrained = vector_store.train_index("docs", nlist=4)
+    assert retrained is not ivf
+    assert retrained.nlist == 4
+    assert len(retrained) == len(vector_store.indexes["docs"].vectors)
@@ -0,0 +1,46 @@
+import sys
+
+import numpy as np
+import pytest
+
+# src
+sys.path.append("./")
+from src.jarvis.domain.search.algorithm.hierarchical_knn import HierarchicalKNN
+from src.jarvis.domain.search.algorithm.linear_knn import LinearKNN
+
+
+@pytest.fixture
+def data():
+    rng = np.random.default_rng(0)
+    matrix = rng.standard_normal((50, 16)).astype(np.float32)
+    matrix[3] = 0.0     # Zero vector: cosine similarity 0
+    query = rng.standard_normal(16).astype(np.float32)
+    return query, matrix
+
+
+@pytest.mark.parametrize("distance", ["euclidean", "cosine"])
+def test_linear_score_batch_matches_score(data, distance):
+    query, matrix = data
+    knn = LinearKNN(distance_metric=distance)
+    expected = [knn.score(query.tolist(), row.tolist()) for row in matrix]
+
+    np.testing.assert_allclose(knn.score_batch(query.tolist(), matrix), expected, rtol=1e-4, atol=1e-5)
+    norms = np.linalg.norm(matrix, axis=1)
+    np.testing.assert_allclose(knn.score_batch(query, matrix, norms), expected, rtol=1e-4, atol=1e-5)
+
+
+@pytest.mark.parametrize("distance", ["euclidean", "cosine"])
+def test_hierarchical_score_batch_matches_score(data, distance):
+    query, matrix = data
+    knn = HierarchicalKNN(distance_metric=distance, decay_factor=0.9)
+    expected = [knn.score(query.tolist(), row.tolist()) for row in matrix]
+
+    np.testing.assert_allclose(knn.score_batch(query.tolist(), matrix), expected, rtol=1e-4, atol=1e-5)
+
+
+def test_score_batch_rejects_dimension_mismatch(data):
+    query, matrix = data
+    with pytest.raises(ValueError):
+        LinearKNN().score_batch(query[:8], matrix)
+    with pytest.raises(ValueError):
+        LinearKNN(distance_metric="manhattan").score_batch(query, matrix)
@@ -0,0 +1,104 @@
+import sys
+
+import numpy as np
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+# src
+sys.path.append("./")
+from src.jarvis.app.api.routes import search
+from src.jarvis.app.dependencies import get_vector_store_dependency
+from src.jarvis.domain.search.vector_store.vector_store import VectorStore
+from tests.conftest import make_document, make_index_body, random_vectors
+
+DIMENSION, PREFIX, K = 64, 16, 10
+# Matryoshka-like embeddings: most of the variance is in the leading dimensions
+SCALES = np.power(0.93, np.arange(DIMENSION)).astype(np.float32)
+
+
+def matryoshka_document(title: str, seed: int):
+    document = make_document(title, n_chunks=50, seed=seed, dimension=DIMENSION)
+    for chunk in document.chunks:
+        chunk.embedding = (np.asarray(chunk.embedding, dtype=np.float32) * SCALES).tolist()
+    return document
+
+
+@pytest.fixture(scope="module")
+def vector_store():
+    vector_store = VectorStore()
+    vector_store.create_index("docs", make_index_body(dimension=DIMENSION))
+    documents = [matryoshka_document(f"doc {i}", seed=i) for i in range(20)]
+    for document in documents:
+        vector_store.index_document("docs", document)
+    vector_store.delete_document("docs", str(documents[0].metadata.document_id))
+    yield vector_store
+    vector_store.close()
+
+
+@pytest.fixture(scope="module")
+def queries():
+    return random_vectors(10, DIMENSION, seed=100) * SCALES
+
+
+def texts(results: list) -> list:
+    return [result["text"] for result in results]
+
+
+@pytest.mark.parametrize("distance", ["euclidean", "cosine"])
+def test_recall_against_exact_scan(vector_store, queries, distance):
+    results, exact_results = [], []
+    for query in queries.tolist():
+        results.append(vector_store.query_index("docs", query, top_k=K, algorithm="matryoshka", distance=distance, prefix_dimension=PREFIX, shortlist_multiplier=10))
+        exact_results.append(vector_store.query_index("docs", query, top_k=K, algorithm="linear", distance=distance))
+    assert VectorStore.recall(results, exact_results) >= 0.9
+    assert all(result["metadata"]["title"] != "doc 0" for result in sum(results, []))
+
+    # The shortlist is re-ranked with the full-dimension scores
+    exact_scores = {r["text"]: r["score"] for r in vector_store.query_index("docs", queries[0].tolist(), top_k=1000, algorithm="linear", distance=distance)}
+    for result in results[0]:
+        assert result["score"] == pytest.approx(exact_scores[result["text"]], rel=1e-4, abs=1e-5)
+
+
+def test_full_prefix_is_exact(vector_store, queries):
+    for query in queries.tolist():
+        results = vector_store.query_index("docs", query, top_k=K, algorithm="matryoshka", distance="euclidean", prefix_dimension=DIMENSION, shortlist_multiplier=1)
+        assert texts(results) == texts(vector_store.query_index("docs", query, top_k=K, algorithm="linear", distance="euclidean"))
+
+
+@pytest.mark.parametrize("distance", ["euclidean", "cosine"])
+def test_batch_matches_single(vector_store, queries, distance):
+    parameters = {"top_k": K, "algorithm": "matryoshka", "distance": distance, "prefix_dimension": PREFIX, "shortlist_multiplier": 3}
+    batch = vector_store.query_index_batch("docs", queries, **parameters)
+    assert [texts(results) for results in batch] == [texts(vector_store.query_index("docs", query, **parameters)) for query in queries.tolist()]
+
+
+def test_prefix_norms_are_maintained(vector_store):
+    index = vector_store.indexes["docs"]
+    index.prefix_norms(PREFIX)
+    vector_store.index_document("docs", matryoshka_document("late", seed=50))
+    np.testing.assert_allclose(index.prefix_norms(PREFIX), np.linalg.norm(index.vectors[:, :PREFIX], axis=1), rtol=1e-6)
+
+
+def test_invalid_parameters(vector_store, queries):
+    query = queries[0].tolist()
+    for parameters in ({"prefix_dimension": 0}, {"prefix_dimension": DIMENSION + 1}, {"shortlist_multiplier": 0}):
+        with pytest.raises(ValueError):
+            vector_store.query_index("docs", query, algorithm="matryoshka", **parameters)
+
+
+def test_recall_route(vector_store, queries):
+    app = FastAPI()
+    app.include_router(search.router, prefix="/search")
+    app.dependency_overrides[get_vector_store_dependency] = lambda: vector_store
+    client = TestClient(app)
+
+    body = {"index_name": "docs", "query_vectors": queries.tolist(), "top_k": K, "distance": "euclidean"}
+    response = client.post("/search/vector/recall", json={**body, "algorithm": "linear"})
+    assert response.status_code == 200
+    assert response.json()["recall"] == 1.0 and response.json()["total_queries"] == len(queries)
+
+    response = client.post("/search/vector/recall", json={**body, "algorithm": "matryoshka", "prefix_dimension": PREFIX})
+    assert response.status_code == 200 and response.json()["recall"] >= 0.9
+    response = client.post("/search/vector/recall", json={**body, "algorithm": "matryoshka", "prefix_dimension": DIMENSION + 1})
+    assert response.status_code == 400
@@ -0,0 +1,96 @@
+import sys
+import time
+
+import pytest
+
+# src
+sys.path.append("./")
+from src.jarvis.domain.search.vector_store.vector_store import VectorStore
+from tests.conftest import make_document, make_index_body
+
+
+@pytest.fixture
+def reader(persist_dir):
+    vector_store = VectorStore(persist_dir=persist_dir, read_only=True)
+    vector_store.load()
+    yield vector_store
+    vector_store.close()
+
+
+def search(vector_store: VectorStore, index_name: str, filter: dict = None) -> list:
+    results = vector_store.query_index(index_name, [1.0] * 8, top_k=100, algorithm="linear", filter=filter)
+    return [(result["id"], result["metadata"]["title"]) for result in results]
+
+
+def test_refresh_loads_new_generation(store, reader):
+    store.create_index("docs", make_index_body())
+    store.index_document("docs", make_document("first", seed=1))
+    assert reader.refresh() == []   # Not published yet
+    assert store.publish() == ["docs"]
+
+    assert reader.refresh() == ["docs"]
+    assert search(reader, "docs") == search(store, "docs")
+    version = reader.index_version("docs")
+
+    store.index_document("docs", make_document("second", seed=2))
+    assert reader.refresh() == []   # Same generation until the next publish
+    store.save(["docs"])    # NOTE: publish() would wait, the previous snapshot was just written
+    assert reader.refresh() == ["docs"]
+    assert reader.index_version("docs") != version
+    assert search(reader, "docs") == search(store, "docs")
+    assert len(search(reader, "docs")) == 6
+
+
+def test_refresh_serves_updated_metadata(store, reader):
+    store.create_index("docs", make_index_body())
+    document = make_document("old title", seed=1)
+    store.index_document("docs", document)
+    store.index_document("docs", make_document("other", n_chunks=20, seed=2))
+    store.publish()
+    store.update_document("docs", make_document("new title", seed=3, document=document))
+    store.save(["docs"])
+
+    reader.refresh()
+    assert len(search(reader, "docs", filter={"title": "new title"})) == 3
+    assert search(reader, "docs", filter={"title": "old title"}) == []
+
+
+def test_refresh_drops_deleted_index(store, reader):
+    store.create_index("docs", make_index_body())
+    store.index_document("docs", make_document("first", seed=1))
+    store.publish()
+    reader.refresh()
+    assert reader.index_exists("docs")
+
+    store.delete_index("docs")
+    reader.refresh()
+    assert not reader.index_exists("docs")
+
+
+def test_reader_rejects_writes(store, reader):
+    store.create_index("docs", make_index_body())
+    store.publish()
+    reader.refresh()
+    with pytest.raises(ValueError):
+        reader.index_document("docs", make_document("first"))
+    with pytest.raises(ValueError):
+        reader.create_index("other", make_index_body())
+    with pytest.raises(ValueError):
+        reader.save()
+
+
+def test_publish_is_throttled_by_snapshot_duration(store):
+    store.create_index("docs", make_index_body())
+    store.index_document("docs", make_document("first", seed=1))
+    assert store.publish() == ["docs"]
+    assert store.publish() == []    # Nothing modified
+
+    # Pretend the last snapshot took 10 s: at 5% of the time, the next one is due in 200 s
+    store._saved["docs"] = (time.monotonic(), 10.0)
+    store.index_document("docs", make_document("second", seed=2))
+    assert store.publish(max_io_fraction=0.05) == []
+    store._saved["docs"] = (time.monotonic() - 200.0, 10.0)
+    assert store.publish(max_io_fraction=0.05) == ["docs"]
+
+    with pytest.raises(ValueError):
+        store.publish(max_io_fraction=0)
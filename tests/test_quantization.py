@@ -0,0 +1,253 @@
+import sys
+import threading
+
+import numpy as np
+import pytest
+
+# src
+sys.path.append("./")
+from src.jarvis.domain.search.algorithm.linear_knn import LinearKNN
+from src.jarvis.domain.search.quantization import BinaryQuantizer, ProductQuantizer, ScalarQuantizer, build_quantizer
+from src.jarvis.domain.search.utils import top_k_indices
+from src.jarvis.domain.search.vector_store.vector_store import VectorStore
+from tests.conftest import make_document, make_index_body, random_vectors
+
+N_ROWS, DIMENSION, K = 1000, 16, 10
+
+
+@pytest.fixture(scope="module")
+def vectors():
+    return random_vectors(N_ROWS, DIMENSION, seed=1)
+
+
+@pytest.fixture(scope="module")
+def queries():
+    return random_vectors(20, DIMENSION, seed=2)
+
+
+@pytest.fixture(scope="module")
+def scalar(vectors):
+    quantizer = ScalarQuantizer(DIMENSION, training_size=N_ROWS)
+    quantizer.train(vectors)
+    return quantizer
+
+
+@pytest.fixture(scope="module")
+def pq(vectors):
+    quantizer = ProductQuantizer(DIMENSION, m=4, training_size=N_ROWS)
+    quantizer.train(vectors)
+    return quantizer
+
+
+def test_scalar_round_trip_error_is_bounded(scalar, vectors):
+    codes = scalar.encode(vectors)
+    assert codes.dtype == np.uint8 and codes.shape == (N_ROWS, scalar.code_size)
+    assert np.all(np.abs(scalar.decode(codes) - vectors) <= scalar.step / 2 + 1e-5)
+
+
+@pytest.mark.parametrize("name", ["scalar", "pq"])
+@pytest.mark.parametrize("distance", ["euclidean", "cosine"])
+def test_asymmetric_scores_match_the_decoded_vectors(request, name, distance, vectors, queries):
+    quantizer = request.getfixturevalue(name)
+    codes = quantizer.encode(vectors)
+    decoded = quantizer.decode(codes)
+    norms = np.linalg.norm(vectors, axis=1)
+
+    for query in queries[:5]:
+        scores = quantizer.score(query, codes, norms, distance)
+        if distance == "cosine":
+            # Dot products with the decoded vectors, over the exact row norms
+            expected = decoded @ query / np.maximum(norms * np.linalg.norm(query), 1e-10)
+        elif name == "pq":
+            expected = np.linalg.norm(decoded - query, axis=1)
+        else:
+            # The scalar quantizer expands the distance with the exact norms
+            expected = np.sqrt(np.maximum(norms ** 2 - 2 * decoded @ query + query @ query, 0))
+        np.testing.assert_allclose(scores, expected, rtol=1e-3, atol=1e-3)
+
+
+@pytest.mark.parametrize("name, min_recall", [("scalar", 0.9), ("pq", 0.3)])
+def test_recall_against_exact_scan(request, name, min_recall, vectors, queries):
+    quantizer = request.getfixturevalue(name)
+    codes = quantizer.encode(vectors)
+    norms = np.linalg.norm(vectors, axis=1)
+    hits = 0
+    for query in queries:
+        approximate = top_k_indices(quantizer.score(query, codes, norms, "euclidean"), K, largest=False)
+        exact = top_k_indices(LinearKNN("euclidean").score_batch(query, vectors), K, largest=False)
+        hits += len(set(approximate.tolist()) & set(exact.tolist()))
+    assert hits / (K * len(queries)) >= min_recall
+
+
+def test_invalid_configurations():
+    with pytest.raises(ValueError):
+        build_quantizer({"type": "int4"}, DIMENSION, training_size=1000, rerank_multiplier=4)
+    with pytest.raises(ValueError):
+        ProductQuantizer(DIMENSION, m=5, training_size=1000)
+    with pytest.raises(ValueError):
+        ProductQuantizer(DIMENSION, m=4, training_size=100)
+    with pytest.raises(ValueError):
+        ScalarQuantizer(DIMENSION, training_size=0)
+
+    vector_store = VectorStore()
+    body = make_index_body(method={"name": "hnsw"})
+    body["mappings"]["properties"]["vectors"]["quantization"] = {"type": "int8"}
+    with pytest.raises(ValueError):
+        vector_store.create_index("docs", body)
+
+
+def quantized_store(quantization: dict, monkeypatch=None, n_documents: int = 6) -> tuple:
+    """Quantized index, trained by an explicit `train_quantizer` call (only by it with `monkeypatch`)."""
+    vector_store = VectorStore()
+    if monkeypatch is not None:
+        monkeypatch.setattr(vector_store, "_maybe_train_quantizer", lambda index_name, index_data: None)
+    body = make_index_body(dimension=DIMENSION)
+    body["mappings"]["properties"]["vectors"]["quantization"] = quantization
+    vector_store.create_index("docs", body)
+    documents = [make_document(f"doc {i}", n_chunks=50, seed=i, dimension=DIMENSION) for i in range(n_documents)]
+    for document in documents:
+        vector_store.index_document("docs", document)
+    if monkeypatch is None:
+        vector_store.train_quantizer("docs")
+    return vector_store, documents
+
+
+def test_training_is_deferred_until_training_size():
+    vector_store, _ = quantized_store({"type": "int8", "training_size": 200})
+    index = vector_store.indexes["docs"]
+    assert index.is_quantized and not index.has_vectors
+    assert index.codes.shape == (300, DIMENSION)
+
+    vector_store, _ = quantized_store({"type": "int8", "training_size": 1000})
+    index = vector_store.indexes["docs"]
+    assert not index.is_quantized and index.has_vectors
+    assert not vector_store.train_quantizer("docs").is_trained
+
+    with pytest.raises(ValueError):
+        vector_store.train_quantizer("missing")
+    vector_store.create_index("plain", make_index_body(dimension=DIMENSION))
+    with pytest.raises(ValueError):
+        vector_store.train_quantizer("plain")
+
+
+def test_quantizer_is_trained_on_a_copy_outside_the_lock(monkeypatch):
+    vector_store, documents = quantized_store({"type": "int8", "training_size": 200}, monkeypatch, n_documents=4)
+    index = vector_store.indexes["docs"]
+    published = index.quantizer
+    snapshot = vector_store.index_snapshot("docs")
+    train = ScalarQuantizer.train
+    written = []
+
+    def train_and_write(self, vectors):
+        # Index and delete documents from another thread in the middle of the training (the deletions compact the index)
+        writer = threading.Thread(target=lambda: written.extend([
+            vector_store.index_document("docs", make_document("late", n_chunks=50, seed=50, dimension=DIMENSION)),
+            vector_store.delete_document("docs", str(documents[0].metadata.document_id)),
+            vector_store.delete_document("docs", str(documents[1].metadata.document_id)),
+        ]))
+        writer.start()
+        writer.join(timeout=10)
+        assert not writer.is_alive()
+        written.append(vector_store.index_snapshot("docs"))
+        train(self, vectors)
+
+    monkeypatch.setattr(ScalarQuantizer, "train", train_and_write)
+    quantizer = vector_store.train_quantizer("docs")
+    assert len(written) == 4
+    assert index.quantizer is quantizer and quantizer is not published and not published.is_trained
+    # The compacted rows, and the ones indexed during the training, are encoded too; the older snapshot is left untouched
+    assert index.is_quantized and not index.has_vectors and index.size == 150
+    np.testing.assert_array_equal(index.codes, quantizer.encode(written[-1].vectors))
+    assert snapshot.quantizer is published and not snapshot.is_quantized and snapshot.size == 200
+
+    query = random_vectors(1, DIMENSION, seed=99)[0].tolist()
+    results = vector_store.query_index("docs", query, top_k=50)
+    assert len(results) == 50
+    assert all(result["metadata"]["title"] != "doc 0" for result in results)
+
+
+def test_rerank_restores_the_exact_ranking():
+    vector_store, documents = quantized_store({"type": "pq", "m": 4, "training_size": 256, "rerank": True, "rerank_multiplier": 10})
+    index = vector_store.indexes["docs"]
+    assert index.is_quantized and index.has_vectors
+    vector_store.delete_document("docs", str(documents[0].metadata.document_id))
+
+    query = random_vectors(1, DIMENSION, seed=99)[0].tolist()
+    for distance in ("euclidean", "cosine"):
+        results = vector_store.query_index("docs", query, top_k=5, distance=distance)
+        # Exact scores of the re-ranked rows
+        expected = LinearKNN(distance).score_batch(np.asarray(query), index.vectors)
+        live = index.live_rows()
+        best = live[top_k_indices(expected[live], 5, largest=distance == "cosine")]
+        assert [r["text"] for r in results] == [index.texts[row] for row in best.tolist()]
+        assert all(result["metadata"]["title"] != "doc 0" for result in results)
+
+
+def test_quantized_search_without_rerank():
+    vector_store, documents = quantized_store({"type": "int8", "training_size": 200})
+    vector_store.delete_document("docs", str(documents[0].metadata.document_id))
+
+    query = random_vectors(1, DIMENSION, seed=99)[0].tolist()
+    results = vector_store.query_index("docs", query, top_k=50)
+    assert len(results) == 50
+    assert all(result["metadata"]["title"] != "doc 0" for result in results)
+    # Hierarchical search decodes the codes
+    assert len(vector_store.query_index("docs", query, top_k=5, algorithm="hierarchical")) == 5
+
+
+@pytest.mark.parametrize("dimension", [16, 20])
+def test_binary_hamming_distances(dimension):
+    quantizer = build_quantizer({"type": "binary"}, dimension, training_size=1000, rerank_multiplier=4)
+    assert isinstance(quantizer, BinaryQuantizer)
+    assert quantizer.training_size == 1 and quantizer.rerank and quantizer.rerank_multiplier == BinaryQuantizer.DEFAULT_RERANK_MULTIPLIER
+
+    vectors = random_vectors(100, dimension, seed=1)
+    codes = quantizer.encode(vectors)
+    assert codes.shape == (100, (dimension + 7) // 8)
+    # Decoding keeps the signs
+    np.testing.assert_array_equal(quantizer.decode(codes) > 0, vectors > 0)
+
+    query = random_vectors(1, dimension, seed=2)[0]
+    expected = ((vectors > 0) != (query > 0)).sum(axis=1)
+    np.testing.assert_array_equal(quantizer.hamming_distances(quantizer.encode(query[None, :])[0], codes), expected)
+    cosines = quantizer.score(query, codes, np.linalg.norm(vectors, axis=1), "cosine")
+    np.testing.assert_allclose(cosines, np.cos(expected * np.pi / dimension), rtol=1e-5, atol=1e-6)
+
+
+def test_binary_shortlist_recall():
+    # Clustered 64-d data: the sign bits of neighbors mostly agree
+    dimension, rng = 64, np.random.default_rng(1)
+    centers = rng.standard_normal((50, dimension)).astype(np.float32) * 2
+    vectors = centers[rng.integers(50, size=2000)] + rng.standard_normal((2000, dimension)).astype(np.float32)
+    queries = vectors[:20] + random_vectors(20, dimension, seed=2) * 0.5
+
+    quantizer = BinaryQuantizer(dimension)
+    codes = quantizer.encode(vectors)
+    norms = np.linalg.norm(vectors, axis=1)
+    hits = 0
+    for query in queries:
+        # Exact re-ranking of the Hamming shortlist
+        shortlist = top_k_indices(quantizer.score(query, codes, norms, "cosine"), K * quantizer.rerank_multiplier, largest=True)
+        reranked = shortlist[top_k_indices(LinearKNN("cosine").score_batch(query, vectors[shortlist]), K, largest=True)]
+        exact = top_k_indices(LinearKNN("cosine").score_batch(query, vectors), K, largest=True)
+        hits += len(set(reranked.tolist()) & set(exact.tolist()))
+    assert hits / (K * len(queries)) >= 0.95
+
+
+def test_binary_index_search():
+    vector_store, documents = quantized_store({"type": "binary"})
+    index = vector_store.indexes["docs"]
+    assert index.is_quantized and index.has_vectors
+    assert index.codes.shape == (300, DIMENSION // 8)
+    vector_store.delete_document("docs", str(documents[0].metadata.document_id))
+
+    query = random_vectors(1, DIMENSION, seed=99)[0].tolist()
+    results = vector_store.query_index("docs", query, top_k=10, distance="cosine")
+    assert len(results) == 10
+    assert all(result["metadata"]["title"] != "doc 0" for result in results)
+    # The results carry their exact scores, in order
+    exact = LinearKNN("cosine").score_batch(np.asarray(query), index.vectors)
+    rows = {text: row for row, text in enumerate(index.texts)}
+    for result in results:
+        assert result["score"] == pytest.approx(float(exact[rows[result["text"]]]), rel=1e-4)
+    assert [r["score"] for r in results] == sorted((r["score"] for r in results), reverse=True)
@@ -0,0 +1,80 @@
+import sys
+
+import pytest
+
+# src
+sys.path.append("./")
+from src.jarvis.domain.search.result_cache import QueryResultCache
+from src.jarvis.domain.search.vector_store.vector_store import VectorStore
+from src.jarvis.retrieval import Retrieval
+from tests.conftest import FakeIngestor, make_document, make_index_body
+
+
+@pytest.fixture
+def retrieval():
+    vector_store = VectorStore()
+    vector_store.create_index("docs", make_index_body())
+    vector_store.index_document("docs", make_document("first", seed=1))
+    yield Retrieval(vector_store, FakeIngestor(), QueryResultCache(max_entries=4))
+    vector_store.close()
+
+
+def test_key_is_canonical():
+    key = QueryResultCache.key("docs", 1, "query", {"title": "a", "author": "b"}, top_k=5, algorithm="linear")
+    assert key == QueryResultCache.key("docs", 1, "query", {"author": "b", "title": "a"}, algorithm="linear", top_k=5)
+    assert key != QueryResultCache.key("docs", 2, "query", {"title": "a", "author": "b"}, top_k=5, algorithm="linear")
+    assert key != QueryResultCache.key("docs", 1, "query", {"title": "a", "author": "b"}, top_k=6, algorithm="linear")
+
+
+def test_least_recently_used_entries_are_evicted():
+    cache = QueryResultCache(max_entries=2)
+    cache.put("a", [{"id": 1}])
+    cache.put("b", [{"id": 2}])
+    assert cache.get("a") == [{"id": 1}]
+    cache.put("c", [{"id": 3}])
+    assert cache.get("b") is None
+    assert cache.get("a") == [{"id": 1}] and cache.get("c") == [{"id": 3}]
+    assert cache.stats() == {"hits": 3, "misses": 1, "entries": 2}
+
+
+def test_repeated_searches_are_cached(retrieval):
+    results = retrieval.search_by_text("docs", "some  query", top_k=2)
+    assert retrieval.search_by_text("docs", " some query ", top_k=2) == results     # Whitespace-normalized
+    assert retrieval.ingestor.calls == 1
+
+    retrieval.search_by_text("docs", "some query", top_k=3)
+    retrieval.search_by_text("docs", "some query", top_k=2, filter={"title": "first"})
+    assert retrieval.ingestor.calls == 3
+
+
+@pytest.mark.parametrize("mutation", ["index", "update", "delete", "train"])
+def test_mutations_invalidate_the_cached_results(retrieval, mutation):
+    vector_store = retrieval.vector_store
+    version = vector_store.index_version("docs")
+    before = retrieval.search_by_text("docs", "query", top_k=10)
+    document = make_document("second", seed=2)
+    vector_store.index_document("docs", document)
+
+    if mutation == "update":
+        vector_store.update_document("docs", make_document("renamed", seed=3, document=document))
+    elif mutation == "delete":
+        vector_store.delete_document("docs", str(document.metadata.document_id))
+    elif mutation == "train":
+        vector_store.train_index("docs", nlist=2)
+    assert vector_store.index_version("docs") > version
+
+    after = retrieval.search_by_text("docs", "query", top_k=10)
+    assert retrieval.ingestor.calls == 2
+    expected = {"index": 6, "update": 6, "delete": 3, "train": 6}[mutation]
+    assert len(after) == expected and len(before) == 3
+
+
+def test_recreated_index_never_reuses_a_version(retrieval):
+    vector_store = retrieval.vector_store
+    retrieval.search_by_text("docs", "query")
+    version = vector_store.index_version("docs")
+
+    vector_store.delete_index("docs")
+    vector_store.create_index("docs", make_index_body())
+    assert vector_store.index_version("docs") > version
+    assert retrieval.search_by_text("docs", "query") == []
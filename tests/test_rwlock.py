@@ -0,0 +1,113 @@
+import sys
+import threading
+import time
+
+import numpy as np
+
+# src
+sys.path.append("./")
+from src.jarvis.domain.search.vector_store.rwlock import ReadWriteLock
+from src.jarvis.domain.search.vector_store.vector_store import VectorStore
+from tests.conftest import make_document, make_index_body, random_vectors
+
+
+def test_readers_share_the_lock():
+    lock = ReadWriteLock()
+    inside = threading.Barrier(3, timeout=5)
+
+    def reader():
+        with lock.read():
+            inside.wait()   # Only passes if the three readers hold the lock together
+
+    threads = [threading.Thread(target=reader) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=5)
+    assert not inside.broken
+
+
+def test_writer_excludes_readers_and_has_priority():
+    lock = ReadWriteLock()
+    events = []
+    writer_waiting = threading.Event()
+
+    def writer():
+        writer_waiting.set()
+        with lock.write():
+            events.append("writer")
+
+    def late_reader():
+        with lock.read():
+            events.append("late reader")
+
+    with lock.read():
+        writer_thread = threading.Thread(target=writer)
+        writer_thread.start()
+        writer_waiting.wait(timeout=5)
+        time.sleep(0.05)    # Let the writer queue up behind the first reader
+        reader_thread = threading.Thread(target=late_reader)
+        reader_thread.start()
+        time.sleep(0.05)
+        assert events == []
+
+    writer_thread.join(timeout=5)
+    reader_thread.join(timeout=5)
+    assert events == ["writer", "late reader"]
+
+
+def test_snapshot_is_unaffected_by_later_writes():
+    vector_store = VectorStore()
+    vector_store.create_index("docs", make_index_body())
+    documents = [make_document(f"doc {i}", seed=i) for i in range(4)]
+    for document in documents:
+        vector_store.index_document("docs", document)
+
+    index = vector_store.indexes["docs"]
+    view = index.snapshot()
+    vectors, live_rows = view.vectors.copy(), view.live_rows()
+
+    # Deletes above the compaction threshold and appends move the rows of the index, not of the view
+    for document in documents[:3]:
+        vector_store.delete_document("docs", str(document.metadata.document_id))
+    vector_store.index_document("docs", make_document("new", seed=10))
+    assert vector_store.indexes["docs"].size == 6
+
+    np.testing.assert_array_equal(view.vectors, vectors)
+    np.testing.assert_array_equal(view.live_rows(), live_rows)
+    assert view.size == 12 and len(view) == 12
+
+
+def test_snapshot_structures_are_copied_on_write():
+    vector_store = VectorStore()
+    body = make_index_body(method={"name": "hnsw", "space_type": "euclidean", "parameters": {"m": 8, "ef_construction": 64}})
+    body["mappings"]["properties"]["vectors"]["quantization"] = {"type": "int8", "training_size": 50, "rerank": True}
+    vector_store.create_index("docs", body)
+    documents = [make_document(f"doc {i}", n_chunks=20, seed=i) for i in range(5)]
+    for document in documents:
+        vector_store.index_document("docs", document)
+    vector_store.train_index("docs", nlist=4)
+    vector_store.train_quantizer("docs")
+    vector_store.link_hnsw("docs")
+
+    index = vector_store.indexes["docs"]
+    view = index.snapshot(with_structures=True)
+    # Nothing is copied until the index changes
+    assert view.quantizer is index.quantizer
+    assert view.hnsw is not index.hnsw and view.hnsw._layers[0] is index.hnsw._layers[0]
+    assert view.ivf is not index.ivf and view.ivf._lists[0][0] is index.ivf._lists[0][0]
+
+    query = random_vectors(1, seed=99)[0]
+    hnsw_results = view.hnsw.search(query, view.vectors, view.norms, 10)[0].tolist()
+    ivf_rows = view.ivf.candidates(query, "euclidean", nprobe=4)
+
+    # Appends, deletions and the compaction (graph repair, renumbering) change the structures of the index, not of the view
+    for document in documents[:2]:
+        vector_store.delete_document("docs", str(document.metadata.document_id))
+    vector_store.index_document("docs", make_document("new", n_chunks=20, seed=10))
+    vector_store.link_hnsw("docs")
+    assert index.size == 80 and len(index.hnsw) == 80 and len(index.ivf) == 80
+
+    assert len(view.hnsw) == 100 and view.hnsw.deleted_count == 0 and len(view.ivf) == 100
+    assert view.hnsw.search(query, view.vectors, view.norms, 10)[0].tolist() == hnsw_results
+    np.testing.assert_array_equal(view.ivf.candidates(query, "euclidean", nprobe=4), ivf_rows)
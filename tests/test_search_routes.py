@@ -0,0 +1,108 @@
+import sys
+import base64
+
+import numpy as np
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+# src
+sys.path.append("./")
+from src.jarvis.app.api.routes import search
+from src.jarvis.app.dependencies import get_vector_store_dependency
+from src.jarvis.domain.search.vector_store.vector_store import VectorStore
+from tests.conftest import DIMENSION, make_document, make_index_body, random_vectors
+
+QUERIES = random_vectors(3, seed=100)
+
+
+@pytest.fixture(scope="module")
+def vector_store():
+    vector_store = VectorStore()
+    vector_store.create_index("docs", make_index_body())
+    for i in range(5):
+        vector_store.index_document("docs", make_document(f"doc {i}", n_chunks=10, seed=i))
+    yield vector_store
+    vector_store.close()
+
+
+@pytest.fixture(scope="module")
+def client(vector_store):
+    app = FastAPI()
+    app.include_router(search.router, prefix="/search")
+    app.dependency_overrides[get_vector_store_dependency] = lambda: vector_store
+    return TestClient(app)
+
+
+def encode(vectors: np.ndarray) -> str:
+    return base64.b64encode(np.asarray(vectors, dtype="<f4").tobytes()).decode("ascii")
+
+
+def ids(results: list) -> list:
+    return [result["id"] for result in results]
+
+
+@pytest.mark.parametrize("encoding", ["json", "base64"])
+def test_search_by_vector(client, vector_store, encoding):
+    body = {"index_name": "docs", "top_k": 5, "distance": "euclidean"}
+    if encoding == "json":
+        body["query_vector"] = QUERIES[0].tolist()
+    else:
+        body["query_vector_base64"] = encode(QUERIES[0])
+
+    response = client.post("/search/vector", json=body)
+    assert response.status_code == 200
+    expected = vector_store.query_index("docs", QUERIES[0].tolist(), top_k=5, distance="euclidean")
+    assert ids(response.json()["results"]) == [str(result["id"]) for result in expected]
+
+
+@pytest.mark.parametrize("encoding", ["json", "base64"])
+def test_search_batch_by_vector(client, vector_store, encoding):
+    body = {"index_name": "docs", "top_k": 3, "distance": "cosine"}
+    if encoding == "json":
+        body["query_vectors"] = QUERIES.tolist()
+    else:
+        body["query_vectors_base64"] = encode(QUERIES)
+
+    response = client.post("/search/vector/batch", json=body)
+    assert response.status_code == 200
+    assert response.json()["total_queries"] == len(QUERIES)
+    for query, results in zip(QUERIES.tolist(), response.json()["results"]):
+        expected = vector_store.query_index("docs", query, top_k=3, distance="cosine")
+        assert ids(results) == [str(result["id"]) for result in expected]
+
+
+@pytest.mark.parametrize("body", [
+    {"query_vector": [1.0] * (DIMENSION + 1)},                      # Wrong dimension
+    {"query_vector_base64": encode(np.ones(DIMENSION - 1))},        # Wrong number of bytes
+    {"query_vector_base64": "not base64!"},
+    {"query_vector_base64": encode(np.ones((2, DIMENSION)))},       # Several vectors
+    {"query_vector_base64": encode(np.full(DIMENSION, np.nan))},
+    {"query_vector": [1.0] * DIMENSION, "filter": {"publisher": "x"}},
+])
+def test_invalid_requests_are_rejected(client, body):
+    response = client.post("/search/vector", json={"index_name": "docs", **body})
+    assert response.status_code == 400
+
+
+def test_both_or_no_vectors_are_rejected(client):
+    assert client.post("/search/vector", json={"index_name": "docs"}).status_code == 422
+    body = {"index_name": "docs", "query_vector": [1.0] * DIMENSION, "query_vector_base64": encode(np.ones(DIMENSION))}
+    assert client.post("/search/vector", json=body).status_code == 422
+
+
+def test_unknown_index(client):
+    response = client.post("/search/vector", json={"index_name": "missing", "query_vector": [1.0] * DIMENSION})
+    assert response.status_code == 404
+
+
+@pytest.mark.parametrize("path, body", [
+    ("/search/vector", {"query_vector": [1.0] * DIMENSION}),
+    ("/search/vector/batch", {"query_vectors": [[1.0] * DIMENSION]}),
+    ("/search/vector/recall", {"query_vectors": [[1.0] * DIMENSION]}),
+])
+def test_index_deleted_after_the_check(client, vector_store, monkeypatch, path, body):
+    # The index disappears between the existence check and the dimension lookup
+    monkeypatch.setattr(vector_store, "index_exists", lambda index_name: True)
+    response = client.post(path, json={"index_name": "missing", **body})
+    assert response.status_code == 404
@@ -0,0 +1,57 @@
+import sys
+
+import pytest
+
+# src
+sys.path.append("./")
+from src.jarvis.domain.search.vector_store.vector_store import VectorStore
+from src.jarvis.infrastructure.core.config import genai_config
+from tests.conftest import make_document, make_index_body, random_vectors
+
+N_DOCUMENTS, N_CHUNKS = 20, 25
+
+
+def build_store(monkeypatch, quantization: dict = None) -> VectorStore:
+    monkeypatch.setattr(genai_config, "VECTORSTORE_SCAN_SHARDS", 4)
+    monkeypatch.setattr(genai_config, "VECTORSTORE_SCAN_MIN_SHARD_ROWS", 16)
+    vector_store = VectorStore()
+    body = make_index_body()
+    if quantization:
+        body["mappings"]["properties"]["vectors"]["quantization"] = quantization
+    vector_store.create_index("docs", body)
+    documents = [
+        make_document(f"doc {i}", n_chunks=N_CHUNKS, seed=i, author="alice" if i % 2 else "bob")
+        for i in range(N_DOCUMENTS)
+    ]
+    for document in documents:
+        vector_store.index_document("docs", document)
+    if quantization:
+        vector_store.train_quantizer("docs")
+    # A few tombstones, below the compaction threshold
+    vector_store.delete_document("docs", str(documents[3].metadata.document_id))
+    return vector_store
+
+
+@pytest.fixture(params=[None, {"type": "int8", "training_size": 100, "rerank": True}, {"type": "int8", "training_size": 100}])
+def store(request, monkeypatch):
+    vector_store = build_store(monkeypatch, quantization=request.param)
+    assert len(vector_store._shards(vector_store.indexes["docs"].live_rows())) == 4
+    yield vector_store
+    vector_store.close()
+
+
+@pytest.mark.parametrize("algorithm", ["linear", "hierarchical"])
+@pytest.mark.parametrize("distance", ["euclidean", "cosine"])
+@pytest.mark.parametrize("filter", [None, {"author": "alice"}, {"title": {"$in": ["doc 1", "doc 18"]}}])
+def test_sharded_scan_matches_single_scan(store, monkeypatch, algorithm, distance, filter):
+    queries = [random_vectors(1, seed=100 + seed)[0].tolist() for seed in range(3)]
+    search = lambda query, top_k: store.query_index("docs", query, top_k=top_k, algorithm=algorithm, distance=distance, filter=filter)
+    sharded = {(i, top_k): search(query, top_k) for i, query in enumerate(queries) for top_k in (1, 10, 60)}
+
+    monkeypatch.setattr(store, "_scan_shards", 1)
+    for (i, top_k), results in sharded.items():
+        expected = search(queries[i], top_k)
+        assert [r["text"] for r in results] == [r["text"] for r in expected]
+        # NOTE: BLAS may sum in a different order on a shard than on the whole index
+        assert [r["score"] for r in results] == pytest.approx([r["score"] for r in expected], rel=1e-5)
+        assert all(r["metadata"]["title"] != "doc 3" for r in results)
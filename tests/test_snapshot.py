@@ -0,0 +1,124 @@
+import sys
+
+import numpy as np
+
+# src
+sys.path.append("./")
+from src.jarvis.domain.search.vector_store.vector_store import VectorStore
+from src.jarvis.infrastructure.persistence.snapshot import index_directory, load_index
+from tests.conftest import make_document, make_index_body, random_vectors
+
+
+def reload(persist_dir: str) -> VectorStore:
+    vector_store = VectorStore(persist_dir=persist_dir)
+    vector_store.load()
+    return vector_store
+
+
+def titles(vector_store: VectorStore, index_name: str, filter: dict = None) -> list:
+    results = vector_store.query_index(index_name, [1.0] * 8, top_k=100, algorithm="linear", filter=filter)
+    return sorted(result["metadata"]["title"] for result in results)
+
+
+def test_save_load_round_trip(store, persist_dir):
+    store.create_index("docs", make_index_body())
+    store.index_document("docs", make_document("first", seed=1))
+    store.index_document("docs", make_document("second", seed=2))
+    store.save()
+    expected = store.query_index("docs", [1.0] * 8, top_k=10, algorithm="linear")
+    store.close()
+
+    restored = reload(persist_dir)
+    try:
+        results = restored.query_index("docs", [1.0] * 8, top_k=10, algorithm="linear")
+        assert [(r["id"], r["text"]) for r in results] == [(r["id"], r["text"]) for r in expected]
+        assert [r["score"] for r in results] == [r["score"] for r in expected]
+    finally:
+        restored.close()
+
+
+def test_save_load_after_update_keeps_new_metadata(store, persist_dir):
+    store.create_index("docs", make_index_body())
+    document = make_document("old title", seed=1)
+    store.index_document("docs", document)
+    store.index_document("docs", make_document("other", n_chunks=20, seed=2))  # Keeps the tombstones under the compaction threshold
+    store.update_document("docs", make_document("new title", seed=3, document=document))
+    store.save()
+    store.close()
+
+    restored = reload(persist_dir)
+    try:
+        assert titles(restored, "docs") == ["new title"] * 3 + ["other"] * 20
+        assert len(titles(restored, "docs", filter={"title": "new title"})) == 3
+        assert titles(restored, "docs", filter={"title": "old title"}) == []
+    finally:
+        restored.close()
+
+
+def test_save_load_after_delete(store, persist_dir):
+    store.create_index("docs", make_index_body())
+    deleted = make_document("deleted", seed=1)
+    store.index_document("docs", deleted)
+    store.index_document("docs", make_document("kept", n_chunks=20, seed=2))
+    store.delete_document("docs", str(deleted.metadata.document_id))
+    store.save()
+    store.close()
+
+    restored = reload(persist_dir)
+    try:
+        assert titles(restored, "docs") == ["kept"] * 20
+        assert titles(restored, "docs", filter={"title": "deleted"}) == []
+    finally:
+        restored.close()
+
+
+def test_save_load_keeps_search_structures(store, persist_dir):
+    body = make_index_body(method={"name": "hnsw", "space_type": "euclidean", "parameters": {"m": 8, "ef_construction": 64}})
+    body["mappings"]["properties"]["vectors"]["quantization"] = {"type": "int8", "training_size": 100, "rerank": True}
+    store.create_index("docs", body)
+    for i in range(10):
+        store.index_document("docs", make_document(f"doc {i}", n_chunks=20, seed=i))
+    store.train_index("docs", nlist=4, nprobe=4)
+    store.train_quantizer("docs")
+    store.link_hnsw("docs")
+    store.save()
+
+    query = random_vectors(1, seed=99)[0].tolist()
+    expected = {
+        algorithm: store.query_index("docs", query, top_k=5, algorithm=algorithm, distance="euclidean")
+        for algorithm in ("linear", "hnsw", "ivf")
+    }
+    store.close()
+
+    restored = reload(persist_dir)
+    try:
+        index = restored.indexes["docs"]
+        assert index.is_quantized and index.hnsw is not None and index.ivf is not None
+        np.testing.assert_array_equal(index.codes, index.quantizer.encode(index.vectors))
+        for algorithm, results in expected.items():
+            restored_results = restored.query_index("docs", query, top_k=5, algorithm=algorithm, distance="euclidean")
+            assert [r["id"] for r in restored_results] == [r["id"] for r in results]
+    finally:
+        restored.close()
+
+
+def test_unlinked_hnsw_rows_survive_a_reload(store, persist_dir, monkeypatch):
+    monkeypatch.setattr(store, "_maybe_link_hnsw", lambda index_name, index_data: None)
+    store.create_index("docs", make_index_body(method={"name": "hnsw", "space_type": "euclidean", "parameters": {"m": 8}}))
+    store.index_document("docs", make_document("linked", n_chunks=20, seed=1))
+    store.link_hnsw("docs")
+    store.index_document("docs", make_document("unlinked", n_chunks=20, seed=2))
+    store.save()
+    store.close()
+    assert load_index(index_directory(str(persist_dir), "docs")).hnsw_size == 20
+
+    restored = reload(persist_dir)
+    try:
+        # The restored store links the missing rows
+        restored.link_hnsw("docs")
+        index = restored.indexes["docs"]
+        assert index.hnsw_size == index.size == len(index.hnsw) == 40
+        results = restored.query_index("docs", [1.0] * 8, top_k=40, algorithm="hnsw", distance="euclidean")
+        assert {r["metadata"]["title"] for r in results} == {"linked", "unlinked"}
+    finally:
+        restored.close()
@@ -0,0 +1,81 @@
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+# src
+sys.path.append("./")
+from src.jarvis.infrastructure.chunking import splitter
+from src.jarvis.infrastructure.chunking.splitter import TextSplitter, split_texts
+
+TEXT = " ".join(f"Sentence number {i} has pi = 3.14 in it." for i in range(20))
+
+
+@pytest.fixture(autouse=True)
+def encoding(byte_encoding):
+    # NOTE: The encoding and its boundary tables are cached per process
+    splitter.get_encoding.cache_clear()
+    splitter._boundary_tables.cache_clear()
+    yield byte_encoding
+    splitter.get_encoding.cache_clear()
+    splitter._boundary_tables.cache_clear()
+
+
+def test_default_chunks_are_consecutive_token_windows(encoding):
+    tokens = encoding.encode_ordinary(TEXT)
+    expected = [encoding.decode(tokens[i:i + 50]) for i in range(0, len(tokens), 50)]
+    assert split_texts([TEXT], max_tokens=50) == [expected]
+    assert split_texts(["", "short"], max_tokens=50) == [[], ["short"]]
+
+
+def test_overlap(encoding):
+    chunks = TextSplitter(max_tokens=50, overlap=10, processes=1).split(TEXT)
+    assert all(len(encoding.encode_ordinary(chunk)) <= 50 for chunk in chunks)
+    for previous, chunk in zip(chunks, chunks[1:]):
+        assert previous[-10:] == chunk[:10]
+    # Dropping the overlaps gives back the text
+    assert chunks[0] + "".join(chunk[10:] for chunk in chunks[1:]) == TEXT
+
+
+def test_sentence_aware_chunks_end_at_sentence_boundaries(encoding):
+    chunks = TextSplitter(max_tokens=100, sentence_aware=True, processes=1).split(TEXT)
+    assert "".join(chunks) == TEXT
+    for chunk in chunks[:-1]:
+        # Never cut after the "." of "3.14"
+        assert chunk.endswith("in it.")
+        assert 50 <= len(encoding.encode_ordinary(chunk)) <= 100
+
+    # Without a boundary in the second half of the window, the window is kept whole
+    text = "a" * 30 + ". " + "b" * 200
+    chunks = TextSplitter(max_tokens=100, sentence_aware=True, processes=1).split(text)
+    assert [len(chunk) for chunk in chunks] == [100, 100, 32]
+
+
+def test_special_tokens_are_plain_text(encoding):
+    text = "before <|endoftext|> after"
+    assert "".join(TextSplitter(max_tokens=5, processes=1).split(text)) == text
+
+
+def test_invalid_parameters():
+    with pytest.raises(ValueError):
+        TextSplitter(max_tokens=0, processes=1)
+    with pytest.raises(ValueError):
+        TextSplitter(max_tokens=10, overlap=10, processes=1)
+    with pytest.raises(ValueError):
+        TextSplitter(max_tokens=10, processes=1).split(TEXT, overlap=-1)
+
+
+def test_parallel_split_matches_in_process_split():
+    texts = [TEXT[:size] for size in (10, 500, 0, 820, 35, 300, 1, 650)]
+    text_splitter = TextSplitter(max_tokens=40, overlap=5, sentence_aware=True, processes=3, parallel_min_chars=0)
+    text_splitter.close()
+    # NOTE: The spawned processes would not see the test encoding, threads exercise the same grouping
+    text_splitter._pool = ThreadPoolExecutor(max_workers=3)
+    submitted = []
+    submit = text_splitter._pool.submit
+    text_splitter._pool.submit = lambda fn, batch, *args: submitted.append(batch) or submit(fn, batch, *args)
+
+    assert text_splitter.split_many(texts) == split_texts(texts, 40, 5, True)
+    # Contiguous groups, in order, one per process
+    assert len(submitted) == 3 and sum(submitted, []) == texts
+    text_splitter._pool.shutdown()
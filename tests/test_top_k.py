@@ -0,0 +1,34 @@
+import sys
+
+import numpy as np
+import pytest
+
+# src
+sys.path.append("./")
+from src.jarvis.domain.search.utils import top_k_indices
+
+
+def stable_top_k(scores: np.ndarray, k: int, largest: bool) -> np.ndarray:
+    """Reference: full stable sort (ties by position)."""
+    return np.argsort(-scores if largest else scores, kind="stable")[:k]
+
+
+@pytest.mark.parametrize("largest", [True, False])
+@pytest.mark.parametrize("k", [1, 5, 37, 200, 500])
+def test_top_k_matches_stable_sort_with_ties(largest, k):
+    rng = np.random.default_rng(k)
+    scores = rng.integers(0, 20, size=200).astype(np.float32)     # Lots of ties
+    np.testing.assert_array_equal(top_k_indices(scores, k, largest), stable_top_k(scores, k, largest))
+
+
+def test_top_k_ties_at_the_threshold_keep_the_lowest_positions():
+    scores = np.array([0.5, 0.9, 0.5, 0.5, 0.1], dtype=np.float32)
+    np.testing.assert_array_equal(top_k_indices(scores, 3, largest=True), [1, 0, 2])
+    np.testing.assert_array_equal(top_k_indices(scores, 2, largest=False), [4, 0])
+
+
+def test_top_k_edge_cases():
+    scores = np.array([3.0, 1.0, 2.0], dtype=np.float32)
+    assert top_k_indices(scores, 0, largest=True).size == 0
+    np.testing.assert_array_equal(top_k_indices(scores, 10, largest=True), [0, 2, 1])
+    assert top_k_indices(np.empty(0, dtype=np.float32), 3, largest=False).size == 0
@@ -0,0 +1,150 @@
+import os
+import sys
+
+import pytest
+
+# src
+sys.path.append("./")
+from src.jarvis.domain.search.vector_store.vector_store import VectorStore
+from src.jarvis.infrastructure.persistence.snapshot import index_directory
+from src.jarvis.infrastructure.persistence.wal import WAL_FILE, WriteAheadLog
+from tests.conftest import make_document, make_index_body
+
+
+@pytest.fixture
+def wal_path(tmp_path) -> str:
+    return str(tmp_path / WAL_FILE)
+
+
+def write_records(path: str, count: int) -> None:
+    wal = WriteAheadLog(path)
+    for i in range(count):
+        wal.sync(wal.append("operation", (i,)))
+    wal.close()
+
+
+def read_records(path: str, last_lsn: int = 0) -> list:
+    wal = WriteAheadLog(path, last_lsn=last_lsn)
+    records = list(wal.records())
+    wal.close()
+    return records
+
+
+def test_records_round_trip(wal_path):
+    write_records(wal_path, 3)
+    assert read_records(wal_path) == [(1, "operation", (0,)), (2, "operation", (1,)), (3, "operation", (2,))]
+
+
+def test_torn_tail_is_truncated(wal_path):
+    write_records(wal_path, 3)
+    size = os.path.getsize(wal_path)
+    with open(wal_path, "r+b") as f:
+        f.truncate(size - 5)    # Crash in the middle of the last append
+
+    assert [lsn for lsn, _, _ in read_records(wal_path)] == [1, 2]
+    # The torn record is gone, the next append continues the sequence
+    wal = WriteAheadLog(wal_path)
+    list(wal.records())
+    assert wal.append("operation", ("new",)) == 3
+    wal.close()
+    assert read_records(wal_path)[-1] == (3, "operation", ("new",))
+
+
+def test_bad_crc_tail_is_truncated(wal_path):
+    write_records(wal_path, 3)
+    with open(wal_path, "r+b") as f:
+        f.seek(-1, os.SEEK_END)
+        last = f.read(1)
+        f.seek(-1, os.SEEK_END)
+        f.write(bytes([last[0] ^ 0xFF]))
+
+    assert [lsn for lsn, _, _ in read_records(wal_path)] == [1, 2]
+    assert read_records(wal_path) == read_records(wal_path)     # Truncated on disk, not only skipped
+
+
+def test_truncate_keeps_later_records_and_lsns(wal_path):
+    wal = WriteAheadLog(wal_path)
+    wal.append("operation", (0,))
+    wal.append("operation", (1,))
+    offset = wal.size
+    wal.append("operation", (2,))
+    wal.truncate(offset)
+    assert wal.append("operation", (3,)) == 4
+    wal.close()
+
+    assert [lsn for lsn, _, _ in read_records(wal_path, last_lsn=2)] == [3, 4]
+
+
+def test_truncate_everything_keeps_lsns(wal_path):
+    wal = WriteAheadLog(wal_path)
+    wal.append("operation", (0,))
+    wal.append("operation", (1,))
+    wal.truncate()
+    assert wal.size == 0
+    assert wal.append("operation", (2,)) == 3
+    wal.close()
+
+    assert read_records(wal_path, last_lsn=2) == [(3, "operation", (2,))]
+
+
+def recover(persist_dir: str) -> VectorStore:
+    vector_store = VectorStore(persist_dir=persist_dir)
+    vector_store.load()
+    return vector_store
+
+
+def titles(vector_store: VectorStore, index_name: str) -> list:
+    results = vector_store.query_index(index_name, [1.0] * 8, top_k=100, algorithm="linear")
+    return sorted(result["metadata"]["title"] for result in results)
+
+
+def test_replay_after_crash(store, persist_dir):
+    # No save nor close: the process "crashes" with everything only in the WAL
+    store.create_index("docs", make_index_body())
+    document = make_document("old", seed=1)
+    store.index_document("docs", document)
+    store.index_document("docs", make_document("other", seed=2))
+    store.update_document("docs", make_document("new", seed=3, document=document))
+
+    recovered = recover(persist_dir)
+    try:
+        assert titles(recovered, "docs") == ["new"] * 3 + ["other"] * 3
+    finally:
+        recovered.close()
+
+
+def test_replay_skips_records_in_snapshot(store, persist_dir):
+    store.create_index("docs", make_index_body())
+    store.index_document("docs", make_document("first", seed=1))
+    store.save()
+    store.index_document("docs", make_document("second", seed=2))
+
+    recovered = recover(persist_dir)
+    try:
+        assert titles(recovered, "docs") == ["first"] * 3 + ["second"] * 3
+    finally:
+        recovered.close()
+
+
+def test_replay_with_torn_tail(store, persist_dir):
+    store.create_index("docs", make_index_body())
+    store.index_document("docs", make_document("first", seed=1))
+    store.index_document("docs", make_document("torn", seed=2))
+
+    path = os.path.join(index_directory(persist_dir, "docs"), WAL_FILE)
+    with open(path, "r+b") as f:
+        f.truncate(os.path.getsize(path) - 3)
+
+    recovered = recover(persist_dir)
+    try:
+        assert titles(recovered, "docs") == ["first"] * 3
+        # The recovered store keeps logging after the last good record
+        recovered.index_document("docs", make_document("after", seed=3))
+    finally:
+        recovered.close()
+
+    recovered = recover(persist_dir)
+    try:
+        assert titles(recovered, "docs") == ["after"] * 3 + ["first"] * 3
+    finally:
+        recovered.close()